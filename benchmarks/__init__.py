@@ -0,0 +1,2 @@
+# Benchmarks for the simulation and rendering hot paths.
+# This file is intentionally left empty to make the directory a Python package.
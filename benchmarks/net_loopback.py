@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# Multiplayer scaling benchmark over loopback UDP.
+#
+# Races a server against N scripted clients in one process for each player
+# count and reports per-client bandwidth and server tick cost:
+#
+#   python benchmarks/net_loopback.py --players 1 2 4 8 16 32
+#   python benchmarks/net_loopback.py --latency-ms 50 --jitter-ms 10 --loss 0.05
+import os
+import sys
+import json
+import argparse
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+# Add the repository root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.net.conditions import NetworkConditions
+from src.net.loopback import UDP_OVERHEAD, format_reports, scaling_report
+from src.net.server import DEFAULT_SNAPSHOT_RATE
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Measure multiplayer bandwidth and tick cost on loopback")
+    parser.add_argument('--players', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32],
+                        help="player counts to measure (default: %(default)s)")
+    parser.add_argument('--seconds', type=float, default=3.0,
+                        help="length of each race (default: %(default)s)")
+    parser.add_argument('--snapshot-rate', type=int, default=DEFAULT_SNAPSHOT_RATE,
+                        help="snapshots per second (default: %(default)s)")
+    parser.add_argument('--latency-ms', type=float, default=0.0,
+                        help="simulated one-way latency")
+    parser.add_argument('--jitter-ms', type=float, default=0.0,
+                        help="simulated extra random delay")
+    parser.add_argument('--loss', type=float, default=0.0,
+                        help="simulated packet loss probability")
+    parser.add_argument('--seed', type=int, default=1,
+                        help="track, driver and network seed (default: %(default)s)")
+    parser.add_argument('--output', metavar='PATH', default=None,
+                        help="write the reports as JSON to PATH")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    conditions = None
+    if args.latency_ms or args.jitter_ms or args.loss:
+        conditions = NetworkConditions(args.latency_ms / 1000.0, args.jitter_ms / 1000.0, args.loss)
+    reports = scaling_report(args.players, args.seconds, seed=args.seed, conditions=conditions,
+                             snapshot_rate=args.snapshot_rate)
+    print(format_reports(reports))
+    print(f"Bandwidth is UDP payload; add {UDP_OVERHEAD} bytes of headers per datagram.")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump([report._asdict() for report in reports], f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
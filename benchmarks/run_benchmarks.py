@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+# Benchmark suite for the simulation and rendering hot paths.
+#
+# Runs headless, writes results as JSON and compares them against a stored
+# baseline so performance regressions fail the run:
+#
+#   python benchmarks/run_benchmarks.py --save-baseline   # record a baseline
+#   python benchmarks/run_benchmarks.py                   # compare against it
+import os
+import sys
+import json
+import time
+import timeit
+import itertools
+import argparse
+import platform
+import statistics
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# Must be set before pygame initialises the display
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import numpy as np
+import pygame
+
+# Add the repository root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.car import Car
+from src.core.car_batch import CarBatch
+from src.core.env import VectorRacingEnv
+from src.core.track import Track
+from src.ui.hud import HUD
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+DEFAULT_THRESHOLD = 0.25  # Fail when 25% slower than the baseline
+
+SCREEN_SIZE = (1200, 800)
+TRACK_POINTS = (1_000, 100_000, 1_000_000)
+CAR_COUNTS = (1, 10, 100)
+BATCH_CAR_COUNTS = (100, 10_000)
+SCREEN_WIDTHS = (800, 1200, 2400)
+ENV_OBSTACLE_COUNTS = (20, 20_000)
+ENV_COUNT = 256
+RENDER_SIZES = ((800, 600), (1200, 800), (2400, 1200))
+RENDER_CAR_COUNTS = (1, 10, 50)
+
+# A benchmark is a name and a factory that builds its fixtures and returns
+# the zero-argument function timed per call. Factories only run for the
+# benchmarks that pass the name filter.
+Benchmark = Tuple[str, Callable[[], Callable[[], None]]]
+
+
+def make_track(points: int) -> Track:
+    """Build a track with a synthetic path of the given number of points."""
+    track = Track(*SCREEN_SIZE, seed=1, cache_dir=None)
+    xs = np.linspace(0.0, points * 12.0, points)
+    track._set_path(xs, SCREEN_SIZE[1] * 0.5 + np.sin(xs / 500.0) * 150)
+    return track
+
+
+def track_benchmarks() -> Iterator[Benchmark]:
+    """Path lookups on tracks of several sizes, path generation and collisions."""
+    for points in TRACK_POINTS:
+        def lookup(points=points):
+            track = make_track(points)
+            distances = itertools.cycle(np.random.default_rng(0).uniform(0, track.path_length, 4096).tolist())
+            return lambda: track.get_path_point(next(distances))
+        yield f"track.get_path_point[points={points}]", lookup
+
+    for width in SCREEN_WIDTHS:
+        def generate(width=width):
+            track = Track(width, SCREEN_SIZE[1], seed=1, cache_dir=None)
+
+            def run():
+                track.biome_boundaries = []
+                track._generate_path()
+            return run
+        yield f"track._generate_path[width={width}]", generate
+
+    def collide():
+        # A car-sized rectangle swept along the road, hitting edges and obstacles
+        track = Track(*SCREEN_SIZE, seed=1, cache_dir=None)
+        rects = itertools.cycle([pygame.Rect(x, y, 60, 100)
+                                 for x in range(0, int(track.track_length), 10)
+                                 for y in (100, 300, 500)])
+        return lambda: track.check_collision(next(rects))
+    yield "track.check_collision", collide
+
+
+def car_benchmarks() -> Iterator[Benchmark]:
+    """Car physics for several car counts, one call updating every car."""
+    for count in CAR_COUNTS:
+        def update(count=count):
+            track = Track(*SCREEN_SIZE, seed=1, cache_dir=None)
+            cars = [Car(100, SCREEN_SIZE[1] // 2) for _ in range(count)]
+
+            def run():
+                for car in cars:
+                    car.update(1.0, 0.0, 1 / 60, track)
+            return run
+        yield f"car.update[cars={count}]", update
+
+    for count in BATCH_CAR_COUNTS:
+        def step(count=count):
+            batch = CarBatch(Track(*SCREEN_SIZE, seed=1, cache_dir=None), count)
+            throttle = np.ones(count)
+            steering = np.zeros(count)
+            return lambda: batch.step(throttle, steering, 1 / 60)
+        yield f"car_batch.step[cars={count}]", step
+
+
+def env_benchmarks() -> Iterator[Benchmark]:
+    """Vectorised environment steps, including obstacle collisions and observations."""
+    for count in ENV_OBSTACLE_COUNTS:
+        def step(count=count):
+            rng = np.random.default_rng(0)
+            track = Track(*SCREEN_SIZE, seed=1, cache_dir=None)
+            track.obstacles = [pygame.Rect(int(x), int(y), 30, 30) for x, y in
+                               zip(rng.uniform(0, track.track_length, count), rng.uniform(100, 700, count))]
+            track.rebuild_obstacle_index()
+            env = VectorRacingEnv(ENV_COUNT, track=track, seed=1)
+            env.reset()
+            actions = np.tile([1.0, 0.0], (ENV_COUNT, 1))
+            return lambda: env.step(actions)
+        yield f"env.step[envs={ENV_COUNT},obstacles={count}]", step
+
+
+def render_benchmarks(display: pygame.Surface) -> Iterator[Benchmark]:
+    """Track, car and HUD rendering onto display-format surfaces of several sizes."""
+    def surface(size: Tuple[int, int]) -> pygame.Surface:
+        return pygame.Surface(size).convert(display)
+
+    for width, height in RENDER_SIZES:
+        def render_track(size=(width, height)):
+            track = Track(*size, seed=1, cache_dir=None)
+            screen = surface(size)
+            camera = itertools.count(0.0, 7.3)
+            return lambda: track.render(screen, next(camera), 0)
+        yield f"track.render[size={width}x{height}]", render_track
+
+        def render_hud(size=(width, height)):
+            hud = HUD(surface(size))
+            ticks = itertools.count()
+            return lambda: hud.render(next(ticks) / 60, 62.5, 3, 80)
+        yield f"hud.render[size={width}x{height}]", render_hud
+
+    for count in RENDER_CAR_COUNTS:
+        def render_cars(count=count):
+            screen = surface(SCREEN_SIZE)
+            cars = [Car(100 + (i * 90) % (SCREEN_SIZE[0] - 200), 200 + (i % 4) * 120)
+                    for i in range(count)]
+            angles = itertools.cycle(np.linspace(-30, 30, 61).tolist())
+
+            def run():
+                rotation = next(angles)
+                for car in cars:
+                    car.rotation = rotation
+                    car.render(screen, 0, 0)
+            return run
+        yield f"car.render[cars={count}]", render_cars
+
+
+def collect_benchmarks(display: pygame.Surface) -> Iterator[Benchmark]:
+    yield from track_benchmarks()
+    yield from car_benchmarks()
+    yield from env_benchmarks()
+    yield from render_benchmarks(display)
+
+
+def measure(func: Callable[[], None], repeat: int, min_time: float) -> Dict[str, float]:
+    """Time a function, calibrating the number of calls per run.
+
+    Args:
+        func: Function to time.
+        repeat: Number of timed runs.
+        min_time: Minimum duration of each run in seconds.
+
+    Returns:
+        Median and best time per call in microseconds, and the calls per run.
+    """
+    timer = timeit.Timer(func)
+    number = 1
+    while True:
+        if timer.timeit(number) >= min_time:
+            break
+        number *= 2
+    runs = [timer.timeit(number) / number * 1e6 for _ in range(repeat)]
+    return {
+        'median_us': statistics.median(runs),
+        'min_us': min(runs),
+        'calls_per_run': number,
+    }
+
+
+def run_benchmarks(name_filter: Optional[str] = None, repeat: int = 5,
+                   min_time: float = 0.05) -> Dict:
+    """Run every benchmark whose name contains ``name_filter``.
+
+    Returns:
+        A report with environment metadata and per-benchmark timings.
+    """
+    pygame.init()
+    display = pygame.display.set_mode(SCREEN_SIZE)
+    results = {}
+    try:
+        for name, factory in collect_benchmarks(display):
+            if name_filter and name_filter not in name:
+                continue
+            results[name] = measure(factory(), repeat, min_time)
+            print(f"{name:<40} {results[name]['median_us']:>12.2f} us")
+    finally:
+        pygame.quit()
+
+    return {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'pygame': pygame.version.ver,
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+        },
+        'results': results,
+    }
+
+
+def compare(report: Dict, baseline: Dict, threshold: float) -> List[Dict]:
+    """Find benchmarks that are slower than the baseline by more than ``threshold``.
+
+    Benchmarks missing from either side are ignored.
+
+    Args:
+        report: Report from run_benchmarks.
+        baseline: Earlier report to compare against.
+        threshold: Allowed slowdown as a fraction, e.g. 0.25 for 25%.
+
+    Returns:
+        One entry per regression with the name, both medians and the ratio.
+    """
+    regressions = []
+    for name, result in report['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            continue
+        ratio = result['median_us'] / base['median_us']
+        if ratio > 1.0 + threshold:
+            regressions.append({'name': name, 'baseline_us': base['median_us'],
+                                'current_us': result['median_us'], 'ratio': ratio})
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the racing game hot paths")
+    parser.add_argument('--output', metavar='PATH', default=None,
+                        help="write the results as JSON to PATH")
+    parser.add_argument('--baseline', metavar='PATH', default=DEFAULT_BASELINE,
+                        help="baseline JSON to compare against (default: %(default)s)")
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="store these results as the new baseline instead of comparing")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown before failing, as a fraction (default: %(default)s)")
+    parser.add_argument('--filter', default=None,
+                        help="only run benchmarks whose name contains this text")
+    parser.add_argument('--repeat', type=int, default=5,
+                        help="timed runs per benchmark (default: %(default)s)")
+    parser.add_argument('--min-time', type=float, default=0.05,
+                        help="minimum seconds per timed run (default: %(default)s)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    report = run_benchmarks(args.filter, args.repeat, args.min_time)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline first")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+
+    regressions = compare(report, baseline, args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression['name']}: {regression['baseline_us']:.2f} us -> "
+              f"{regression['current_us']:.2f} us ({regression['ratio']:.2f}x)")
+    if regressions:
+        return 1
+    print(f"No regressions above {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,6 +3,8 @@
 # Main entry point for the game
 import sys
 import os
+import time
+import argparse
 import pygame
 
 # Add src directory to Python path
@@ -13,15 +15,77 @@ print(f"Python version: {sys.version}")
 print(f"Pygame version: {pygame.version.ver if hasattr(pygame, 'version') else 'Unknown'}")
 
 from core.game import RacingGame
+from core.controllers import ConstantController
+from core.replay import default_replay_path, load_replay
 
-def main():
+def parse_args(argv=None):
+    # Parse command line options
+    parser = argparse.ArgumentParser(description="2D Racing Game")
+    parser.add_argument('--headless', action='store_true',
+                        help="run without a window, as fast as possible, on full throttle")
+    parser.add_argument('--max-ticks', type=int, default=None,
+                        help="stop after this many physics steps")
+    parser.add_argument('--max-laps', type=int, default=None,
+                        help="stop after this many completed laps")
+    parser.add_argument('--render-every', type=int, default=1,
+                        help="render every Nth frame (0 disables rendering)")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="track seed (seeded tracks are reproducible and cached)")
+    parser.add_argument('--endless', action='store_true',
+                        help="drive an endless track generated ahead of the car")
+    parser.add_argument('--dirty-rects', action='store_true',
+                        help="push only changed screen areas to the display while the camera is still")
+    parser.add_argument('--fps', type=int, default=60,
+                        help="target frame rate, e.g. 60, 120 or 144 (default: %(default)s)")
+    parser.add_argument('--vsync', action='store_true',
+                        help="pace frames by the display refresh instead of timers")
+    parser.add_argument('--adaptive-quality', action='store_true',
+                        help="lower rendering quality when frames run over budget and "
+                             "raise it again when there is headroom")
+    parser.add_argument('--record', metavar='PATH', nargs='?', const='', default=None,
+                        help="record input to a replay file (default: a timestamped file "
+                             "under data/savegames/)")
+    parser.add_argument('--replay', metavar='PATH', default=None,
+                        help="re-simulate a recorded replay headlessly at full speed; "
+                             "combine with --render-every to also render")
+    parser.add_argument('--profile', metavar='PATH', default=None,
+                        help="record per-phase frame timings and write them to PATH on exit "
+                             "(F3 toggles the overlay)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    
     # Initialize and run the game
     try:
         print("Initializing game...")
-        game = RacingGame("2D Racing Game", 1200, 800)
+        if args.replay:
+            replay = load_replay(args.replay)
+            args.headless = True
+            args.max_ticks = replay.tick_count
+            game = RacingGame.from_replay(replay, "2D Racing Game (replay)",
+                                          render_every=args.render_every,
+                                          profile_path=args.profile,
+                                          dirty_rects=args.dirty_rects,
+                                          adaptive_quality=args.adaptive_quality)
+        else:
+            controller = ConstantController(throttle=1.0) if args.headless else None
+            record_path = default_replay_path() if args.record == '' else args.record
+            game = RacingGame("2D Racing Game", 1200, 800,
+                              headless=args.headless, controller=controller,
+                              render_every=args.render_every, profile_path=args.profile,
+                              seed=args.seed, endless=args.endless, record_path=record_path,
+                              dirty_rects=args.dirty_rects,
+                              adaptive_quality=args.adaptive_quality,
+                              fps=args.fps, vsync=args.vsync)
         print("Game initialized. Starting game loop...")
-        game.run()
+        start = time.perf_counter()
+        game.run(max_ticks=args.max_ticks, max_laps=args.max_laps)
+        elapsed = time.perf_counter() - start
         print("Game loop ended.")
+        if args.headless:
+            print(f"Simulated {game.tick_count} ticks ({game.lap_count} laps) "
+                  f"in {elapsed:.2f}s ({game.tick_count / max(elapsed, 1e-9):.0f} ticks/s)")
     except Exception as e:
         print(f"Error running game: {e}")
         import traceback
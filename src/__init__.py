@@ -8,3 +8,9 @@ This package contains the source code for the 2D Racing Game.
 from .core.game import RacingGame
 from .core.car import Car
 from .core.track import Track
+from .core.streaming_track import StreamingTrack
+from .core.car_batch import CarBatch
+from .core.env import RacingEnv, VectorRacingEnv
+from .core.rollouts import RolloutRunner
+from .net.server import RaceServer
+from .net.client import RaceClient
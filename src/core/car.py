@@ -1,15 +1,23 @@
 # Car module for the racing game.
 import os
 import sys
-import math
 import pygame
 from enum import Enum
-from typing import Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 
 # Add the src directory to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
 from src.utils.constants import *
+from src.utils.rotation_atlas import RotationAtlas
+from src.utils.text_cache import get_text_cache
+
+# Rotation atlases shared by all cars, keyed by (width, height, step, scale)
+_rotation_atlases: Dict[Tuple[int, int, float, float], RotationAtlas] = {}
+
+# Moves longer than this between two updates (e.g. wrapping to the start of
+# the track) are drawn as jumps instead of being interpolated
+INTERPOLATION_SNAP_DISTANCE = 200
 
 class Direction(Enum):
     LEFT = -1
@@ -18,7 +26,7 @@ class Direction(Enum):
 class Car:
     # Represents the player's car in the game.
     
-    def __init__(self, x: float, y: float):
+    def __init__(self, x: float, y: float, rotation_step: float = ROTATION_ATLAS_STEP):
         # Initialize the car with default position and properties
         # Position and movement
         self.x = x  # Starting x position (left side of screen)
@@ -26,11 +34,10 @@ class Car:
         self.target_y = y  # Target y position for lane changes
         self.lane = 2  # Current lane (1-4)
         self.lane_width = 80  # Width of each lane in pixels
-        self.lane_change_speed = 0.1  # Speed of lane changes (lower = smoother)
+        self.lane_change_speed = 0.2  # Fraction of the lane gap closed per update (lower = smoother)
         
         # Track following
         self.distance_along_track = 0  # Start at the beginning of the track
-        self.look_ahead = 150  # How far ahead to look for steering (pixels)
         
         # Lane changing state
         self.is_changing_lanes = False
@@ -45,7 +52,11 @@ class Car:
         self.friction = 0.98  # Increased friction for more controlled stopping
         self.rotation = 0  # Start facing right (0 degrees)
         self.max_rotation = 30  # Maximum rotation when turning
-        self.rotation_speed = 0.08  # How fast the car rotates (lower = smoother)
+        
+        # State before the last update, for render interpolation
+        self.prev_x = x
+        self.prev_y = y
+        self.prev_rotation = 0
         
         # Car dimensions
         self.width = 60
@@ -58,6 +69,17 @@ class Car:
         # Store the original surface for rotation
         self.original_surface = self.surface.copy()
         
+        # Pre-rendered rotations of the sprite, shared between cars
+        self.set_rotation_step(rotation_step)
+        
+        # Whether render draws the debug text
+        self.show_debug = True
+        
+        # What the last render drew, so it can report only what changed
+        self._last_sprite: Optional[pygame.Surface] = None
+        self._last_sprite_rect: Optional[pygame.Rect] = None
+        self._last_debug: Dict[int, Tuple[str, pygame.Rect]] = {}
+        
         # Debug info
         self.debug_info = {
             'speed': 0,
@@ -92,6 +114,30 @@ class Car:
         self.original_surface = car_surface
         self.surface = car_surface
     
+    def set_rotation_step(self, step: float):
+        """Switch to the shared rotation atlas for the given angle step in degrees."""
+        self.rotation_atlas = self._get_atlas(step, 1.0)
+    
+    def _get_atlas(self, step: float, scale: float) -> RotationAtlas:
+        """Get the shared rotation atlas for an angle step and sprite scale."""
+        key = (self.width, self.height, step, scale)
+        atlas = _rotation_atlases.get(key)
+        if atlas is None:
+            sprite = self.original_surface
+            if scale != 1.0:
+                sprite = pygame.transform.smoothscale(
+                    sprite, (max(1, round(self.width * scale)), max(1, round(self.height * scale))))
+            atlas = RotationAtlas(sprite, step,
+                                  prerender_range=(-self.max_rotation, self.max_rotation))
+            _rotation_atlases[key] = atlas
+        return atlas
+    
+    def get_rect(self) -> pygame.Rect:
+        """Get the car's hitbox in world coordinates."""
+        rect = pygame.Rect(0, 0, self.width, self.height)
+        rect.center = (round(self.x), round(self.y))
+        return rect
+    
     def change_lane(self, direction: Direction):
         """Initiate a lane change in the specified direction."""
         if self.is_changing_lanes:
@@ -140,20 +186,9 @@ class Car:
                 # Get current track point
                 current_point = track.get_path_point(self.distance_along_track)
                 
-                # Calculate lookahead distance based on speed (further lookahead at higher speeds)
-                look_ahead = max(10, abs(self.speed) * 2)
-                next_point = track.get_path_point((self.distance_along_track + look_ahead) % track.track_length)
-                
-                # Calculate direction vector
-                dx = next_point[0] - current_point[0]
-                dy = next_point[1] - current_point[1]
-                
-                # Calculate target rotation based on direction of travel
-                target_angle = math.degrees(math.atan2(dy, dx))
-                
-                # Smoothly interpolate rotation
-                angle_diff = (target_angle - self.rotation + 180) % 360 - 180
-                self.rotation += angle_diff * self.rotation_speed * dt * 5
+                # The sprite's rotation is only the lane-change tilt set below;
+                # the track heading is not looked up because the tilt would
+                # overwrite it every step
                 
                 # Calculate target y position based on lane
                 lane_offset = (self.lane - 2.5) * self.lane_width
@@ -164,7 +199,7 @@ class Car:
                 if abs(y_diff) > 1.0:  # Only update if we need to move
                     # Scale movement speed based on distance to target (easing)
                     move_speed = min(1.0, abs(y_diff) / (self.lane_width * 0.5))
-                    self.y += y_diff * move_speed * 0.2  # Reduced from 0.3 to 0.2 for smoother movement
+                    self.y += y_diff * move_speed * self.lane_change_speed
                     self.rotation = y_diff * 0.1  # Simple rotation based on y difference
                 else:
                     self.y = target_y
@@ -203,7 +238,7 @@ class Car:
                 if abs(y_diff) > 1.0:
                     # Move towards target y position
                     move_speed = min(1.0, abs(y_diff) / (self.lane_width * 0.5))
-                    self.y += y_diff * move_speed * 0.2
+                    self.y += y_diff * move_speed * self.lane_change_speed
                     self.rotation = y_diff * 0.1
                 else:
                     self.y = target_y
@@ -213,25 +248,46 @@ class Car:
         # Update car surface with rotation
         self._update_car_rotation()
         
-    def _update_car_rotation(self):
-        """Update the car's surface with the current rotation."""
-        # Create a new surface to hold the rotated car
-        rotated_surface = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
+    def save_previous_state(self):
+        """Remember the current pose so rendering can blend towards the next one."""
+        self.prev_x = self.x
+        self.prev_y = self.y
+        self.prev_rotation = self.rotation
+    
+    def get_interpolated_pose(self, alpha: float) -> Tuple[float, float, float]:
+        """Blend between the previous and current pose.
         
-        # Rotate the original surface
-        rotated = pygame.transform.rotate(self.original_surface, -self.rotation)
+        Args:
+            alpha: Blend factor, 0 for the previous pose and 1 for the current one.
         
-        # Get the rect of the rotated surface and center it
-        rect = rotated.get_rect(center=(self.width//2, self.height//2))
-        rotated_surface.blit(rotated, rect.topleft)
+        Returns:
+            Interpolated (x, y, rotation).
+        """
+        if alpha >= 1.0 or (abs(self.x - self.prev_x) > INTERPOLATION_SNAP_DISTANCE or
+                            abs(self.y - self.prev_y) > INTERPOLATION_SNAP_DISTANCE):
+            return (self.x, self.y, self.rotation)
         
-        # Update the car's surface
-        self.surface = rotated_surface
+        rotation_diff = (self.rotation - self.prev_rotation + 180) % 360 - 180
+        return (self.prev_x + (self.x - self.prev_x) * alpha,
+                self.prev_y + (self.y - self.prev_y) * alpha,
+                self.prev_rotation + rotation_diff * alpha)
     
-    def render(self, screen: pygame.Surface, camera_x: float, camera_y: float):
+    def _update_car_rotation(self):
+        """Update the car's surface with the current rotation."""
+        # Look up the pre-rendered rotation (negative because Pygame's y-axis is inverted)
+        self.surface = self.rotation_atlas.get(-self.rotation)
+    
+    def render(self, screen: pygame.Surface, camera_x: float, camera_y: float,
+               alpha: float = 1.0, scale: float = 1.0) -> List[pygame.Rect]:
+        # Draw the car and its debug text, and return the screen areas that
+        # changed since the previous render (old and new sprite and text areas)
+        #   scale: Render scale when drawing to a reduced-resolution surface
+        # Blend between the last two updates when rendering between physics steps
+        x, y, rotation = self.get_interpolated_pose(alpha)
+        
         # Calculate screen position
-        screen_x = self.x - camera_x
-        screen_y = self.y - camera_y
+        screen_x = (x - camera_x) * scale
+        screen_y = (y - camera_y) * scale
         
         # Update debug info
         self.debug_info['speed'] = self.speed
@@ -239,16 +295,27 @@ class Car:
         self.debug_info['rotation'] = self.rotation
         
         # Get rotated car surface (negative rotation because Pygame's y-axis is inverted)
-        rotated_car = pygame.transform.rotate(self.original_surface, -self.rotation)
+        atlas = self.rotation_atlas if scale == 1.0 else self._get_atlas(self.rotation_atlas.step, scale)
+        rotated_car = atlas.get(-rotation)
         
         # Get new rect for the rotated car (centered)
         rotated_rect = rotated_car.get_rect(center=(screen_x, screen_y))
         
         # Draw the rotated car
-        screen.blit(rotated_car, rotated_rect.topleft)
+        drawn = screen.blit(rotated_car, rotated_rect.topleft)
+        dirty = []
+        if drawn != self._last_sprite_rect or rotated_car is not self._last_sprite:
+            dirty.append(drawn.union(self._last_sprite_rect) if self._last_sprite_rect else drawn)
+            self._last_sprite_rect = drawn
+            self._last_sprite = rotated_car
+        
+        if not self.show_debug:
+            # Forget the text so it is reported again when shown
+            self._last_debug.clear()
+            return dirty
         
-        # Draw debug info
-        font = pygame.font.Font(None, 24)
+        # Draw debug info (unchanged lines are reused from the text cache)
+        text_cache = get_text_cache()
         debug_text = [
             f"Speed: {self.speed:.1f}",
             f"Distance: {self.distance_along_track:.0f}",
@@ -258,5 +325,10 @@ class Car:
         ]
         
         for i, text in enumerate(debug_text):
-            text_surface = font.render(text, True, (255, 255, 255))
-            screen.blit(text_surface, (10, 10 + i * 25))
+            text_surface = text_cache.render(text, (255, 255, 255), 24)
+            text_rect = screen.blit(text_surface, (10, 10 + i * 25))
+            previous = self._last_debug.get(i)
+            if previous is None or previous[0] != text:
+                dirty.append(text_rect.union(previous[1]) if previous else text_rect)
+                self._last_debug[i] = (text, text_rect)
+        return dirty
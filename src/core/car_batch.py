@@ -0,0 +1,226 @@
+# Vectorized car simulation for running many cars at once.
+import os
+import sys
+from typing import Dict, Iterable, Optional, Union
+
+import numpy as np
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.core.track import Track
+
+ArrayLike = Union[float, np.ndarray]
+
+# Per-car tuning, matching the defaults set in Car.__init__
+DEFAULT_TUNING: Dict[str, float] = {
+    'max_speed': 8,
+    'min_speed': 0.5,
+    'acceleration': 0.1,
+    'braking': 0.15,
+    'lane_change_speed': 0.2,
+    'lane_width': 80,
+}
+
+# Per-car state arrays
+STATE_ATTRIBUTES = ('speed', 'distance_along_track', 'lane', 'x', 'y', 'rotation',
+                    'is_changing_lanes', 'lane_change_direction')
+
+
+class CarBatch:
+    """Headless struct-of-arrays simulator for many cars on one track.
+
+    Every piece of car state is a NumPy array with one entry per car, and
+    ``step`` advances all cars with the same rules as ``Car.update`` in a
+    single vectorized pass. Tuning values can be given per car, which makes
+    the batch suitable for parameter sweeps.
+
+    Attributes:
+        speed: Current speed of each car.
+        distance_along_track: Arc-length distance travelled by each car.
+        lane: Current lane of each car (1 to num_lanes).
+        x: Horizontal position of each car.
+        y: Vertical position of each car.
+        rotation: Visual rotation of each car in degrees.
+        is_changing_lanes: Whether each car is part-way through a lane change.
+        lane_change_direction: -1, 0 or 1 for the lane change in progress.
+    """
+
+    def __init__(self, track: Track, num_cars: int, start_y: ArrayLike = 0.0,
+                 start_lane: ArrayLike = 2, num_lanes: int = 4,
+                 **tuning: ArrayLike):
+        """Create a batch of cars at the start of the track.
+
+        Args:
+            track: Track the cars drive along.
+            num_cars: Number of cars in the batch.
+            start_y: Initial y position, scalar or one value per car.
+            start_lane: Initial lane, scalar or one value per car.
+            num_lanes: Number of lanes cars may change between.
+            **tuning: Overrides for any key of ``DEFAULT_TUNING``, scalar or
+                one value per car.
+        """
+        unknown = set(tuning) - set(DEFAULT_TUNING)
+        if unknown:
+            raise ValueError(f"Unknown tuning parameters: {sorted(unknown)}")
+
+        self.track = track
+        self.num_cars = num_cars
+        self.num_lanes = num_lanes
+
+        # Tuning, one value per car
+        for name, default in DEFAULT_TUNING.items():
+            setattr(self, name, self._per_car(tuning.get(name, default)))
+
+        # Car state
+        self.speed = np.zeros(num_cars, dtype=np.float64)
+        self.distance_along_track = np.zeros(num_cars, dtype=np.float64)
+        self.lane = np.array(np.broadcast_to(start_lane, (num_cars,)), dtype=np.int64)
+        self.x = np.zeros(num_cars, dtype=np.float64)
+        self.y = self._per_car(start_y)
+        self.rotation = np.zeros(num_cars, dtype=np.float64)
+        self.is_changing_lanes = np.zeros(num_cars, dtype=bool)
+        self.lane_change_direction = np.zeros(num_cars, dtype=np.int8)
+
+    @classmethod
+    def from_cars(cls, track: Track, cars: Iterable) -> 'CarBatch':
+        """Build a batch that copies the state and tuning of existing cars.
+
+        Args:
+            track: Track the cars drive along.
+            cars: ``Car`` instances to copy.
+
+        Returns:
+            A new batch with one entry per car, in the same order.
+        """
+        cars = list(cars)
+        tuning = {name: np.array([getattr(car, name) for car in cars], dtype=np.float64)
+                  for name in DEFAULT_TUNING}
+        batch = cls(track, len(cars),
+                    start_y=np.array([car.y for car in cars], dtype=np.float64),
+                    start_lane=np.array([car.lane for car in cars]),
+                    **tuning)
+        batch.speed[:] = [car.speed for car in cars]
+        batch.distance_along_track[:] = [car.distance_along_track for car in cars]
+        batch.x[:] = [car.x for car in cars]
+        batch.rotation[:] = [car.rotation for car in cars]
+        batch.is_changing_lanes[:] = [car.is_changing_lanes for car in cars]
+        batch.lane_change_direction[:] = [
+            car.lane_change_direction.value if car.lane_change_direction else 0
+            for car in cars
+        ]
+        return batch
+
+    def reset(self, mask: Optional[np.ndarray] = None, distance: ArrayLike = 0.0,
+              lane: ArrayLike = 2):
+        """Put cars back on the track at rest, centred in a lane.
+
+        Args:
+            mask: Boolean array selecting the cars to reset, or None for all.
+            distance: Arc-length distance to place the cars at, scalar or
+                one value per selected car.
+            lane: Lane to place the cars in, scalar or one value per selected car.
+        """
+        if mask is None:
+            mask = np.ones(self.num_cars, dtype=bool)
+        count = int(np.count_nonzero(mask))
+        distance = np.broadcast_to(np.asarray(distance, dtype=np.float64), (count,))
+        lane = np.broadcast_to(np.asarray(lane, dtype=np.int64), (count,))
+        points = self.track.get_path_points(distance)
+
+        self.speed[mask] = 0.0
+        self.distance_along_track[mask] = distance
+        self.lane[mask] = lane
+        self.x[mask] = points[:, 0]
+        self.y[mask] = points[:, 1] + (lane - 2.5) * self.lane_width[mask]
+        self.rotation[mask] = 0.0
+        self.is_changing_lanes[mask] = False
+        self.lane_change_direction[mask] = 0
+
+    def _per_car(self, value: ArrayLike) -> np.ndarray:
+        # Broadcast a scalar or per-car value to a writable float array
+        return np.array(np.broadcast_to(value, (self.num_cars,)), dtype=np.float64)
+
+    def step(self, throttle: ArrayLike, steering: ArrayLike, dt: float):
+        """Advance every car by one update.
+
+        Args:
+            throttle: Throttle input in [-1, 1], scalar or one value per car.
+            steering: Steering input in [-1, 1], scalar or one value per car.
+            dt: Time step in seconds.
+        """
+        n = self.num_cars
+        throttle = np.broadcast_to(np.asarray(throttle, dtype=np.float64), (n,))
+        steering = np.broadcast_to(np.asarray(steering, dtype=np.float64), (n,))
+        frame_scale = dt * 60
+
+        # Throttle: accelerate on positive input, brake twice as hard on negative
+        abs_throttle = np.abs(throttle)
+        gain = np.where(throttle > 0, self.acceleration, self.braking * 2)
+        speed = np.where(abs_throttle > 0.1, self.speed + throttle * gain * frame_scale, self.speed)
+
+        # Limit speed, then coast down gently when there is no throttle
+        speed = np.maximum(self.min_speed, np.minimum(speed, self.max_speed))
+        coasting = (abs_throttle < 0.1) & (speed > self.min_speed)
+        speed[coasting] *= 0.99
+        self.speed = speed
+
+        # Start lane changes for cars that are not already changing lanes
+        direction = np.where(steering < 0, -1, 1)
+        new_lane = self.lane + direction
+        starting = (~self.is_changing_lanes & (np.abs(steering) > 0.1)
+                    & (new_lane >= 1) & (new_lane <= self.num_lanes))
+        self.lane[starting] = new_lane[starting]
+        self.is_changing_lanes |= starting
+        self.lane_change_direction[starting] = direction[starting]
+
+        # Move along the track
+        self.distance_along_track += speed * frame_scale
+        points = self.track.get_path_points(self.distance_along_track)
+
+        # Ease towards the centre of the current lane. Car.update overwrites
+        # its heading-based rotation with this lane-change tilt, so the batch
+        # skips the heading lookup entirely.
+        target_y = points[:, 1] + (self.lane - 2.5) * self.lane_width
+        y_diff = target_y - self.y
+        abs_diff = np.abs(y_diff)
+        moving = abs_diff > 1.0
+        move_speed = np.minimum(1.0, abs_diff / (self.lane_width * 0.5))
+        self.y = np.where(moving, self.y + y_diff * move_speed * self.lane_change_speed, target_y)
+        self.rotation = np.where(moving, y_diff * 0.1, 0.0)
+        self.is_changing_lanes &= moving
+
+        self.x = points[:, 0]
+
+    def get_state(self, index: int) -> Dict[str, float]:
+        """Get the state of one car as plain Python values.
+
+        Args:
+            index: Index of the car in the batch.
+
+        Returns:
+            Dictionary with the same keys as the matching ``Car`` attributes.
+        """
+        return {
+            'speed': float(self.speed[index]),
+            'distance_along_track': float(self.distance_along_track[index]),
+            'lane': int(self.lane[index]),
+            'x': float(self.x[index]),
+            'y': float(self.y[index]),
+            'rotation': float(self.rotation[index]),
+            'is_changing_lanes': bool(self.is_changing_lanes[index]),
+        }
+
+    def set_state(self, index: int, state: Dict[str, float]):
+        """Overwrite the state of one car.
+
+        Args:
+            index: Index of the car in the batch.
+            state: Values by state attribute name, e.g. as returned by
+                ``get_state``. Attributes not given are left unchanged.
+        """
+        unknown = set(state) - set(STATE_ATTRIBUTES)
+        if unknown:
+            raise ValueError(f"Unknown state attributes: {sorted(unknown)}")
+        for name, value in state.items():
+            getattr(self, name)[index] = value
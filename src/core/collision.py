@@ -0,0 +1,124 @@
+# Collision queries between cars, road edges and obstacles.
+import math
+
+import numpy as np
+import pygame
+
+
+def segments_intersect_rect(starts: np.ndarray, ends: np.ndarray, rect: pygame.Rect) -> np.ndarray:
+    """Test many line segments against one rectangle.
+
+    Uses Liang-Barsky clipping. A segment hits the rectangle if any part of
+    it lies inside or on the rectangle's border.
+
+    Args:
+        starts: (n, 2) array of segment start points.
+        ends: (n, 2) array of segment end points.
+        rect: Rectangle to test against.
+
+    Returns:
+        Boolean array with one entry per segment.
+    """
+    t_min = np.zeros(len(starts), dtype=np.float64)
+    t_max = np.ones(len(starts), dtype=np.float64)
+    hit = np.ones(len(starts), dtype=bool)
+    bounds = ((rect.left, rect.right), (rect.top, rect.bottom))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for axis, (low, high) in enumerate(bounds):
+            origin = starts[:, axis]
+            delta = ends[:, axis] - origin
+            parallel = delta == 0
+            # Segments parallel to this slab must start inside it
+            hit &= ~parallel | ((origin >= low) & (origin <= high))
+            t1 = (low - origin) / delta
+            t2 = (high - origin) / delta
+            near = np.where(parallel, -np.inf, np.minimum(t1, t2))
+            far = np.where(parallel, np.inf, np.maximum(t1, t2))
+            np.maximum(t_min, near, out=t_min)
+            np.minimum(t_max, far, out=t_max)
+
+    return hit & (t_min <= t_max)
+
+
+class SegmentGrid:
+    """Line segments bucketed into uniform columns along the x axis.
+
+    Road edges run left to right, so one-dimensional columns are enough to
+    cut a query down to the handful of segments near a rectangle. Bucket
+    membership is stored CSR-style in two flat arrays.
+    """
+
+    def __init__(self, starts: np.ndarray, ends: np.ndarray, cell_size: float = 128.0):
+        """Build the grid.
+
+        Args:
+            starts: (n, 2) array of segment start points.
+            ends: (n, 2) array of segment end points.
+            cell_size: Width of each grid column in pixels.
+        """
+        self.starts = np.asarray(starts, dtype=np.float64).reshape(-1, 2)
+        self.ends = np.asarray(ends, dtype=np.float64).reshape(-1, 2)
+        self.cell_size = cell_size
+
+        self._mins = np.minimum(self.starts, self.ends)
+        self._maxs = np.maximum(self.starts, self.ends)
+        self.origin = float(self._mins[:, 0].min()) if len(self.starts) else 0.0
+
+        # Columns covered by each segment
+        first = np.floor((self._mins[:, 0] - self.origin) / cell_size).astype(np.int64)
+        last = np.floor((self._maxs[:, 0] - self.origin) / cell_size).astype(np.int64)
+        counts = last - first + 1
+        self.num_cells = int(last.max()) + 1 if len(last) else 0
+
+        # One (cell, segment) entry per covered column, grouped by cell
+        segment_ids = np.repeat(np.arange(len(first)), counts)
+        run_starts = np.repeat(np.cumsum(counts) - counts, counts)
+        cells = np.repeat(first, counts) + (np.arange(len(segment_ids)) - run_starts)
+        order = np.argsort(cells, kind='stable')
+        self._cell_segments = segment_ids[order]
+        self._cell_offsets = np.searchsorted(cells[order], np.arange(self.num_cells + 1))
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def candidates(self, rect: pygame.Rect) -> np.ndarray:
+        """Get the segments whose bounding boxes overlap a rectangle.
+
+        Args:
+            rect: Query rectangle.
+
+        Returns:
+            Indices of candidate segments.
+        """
+        if not self.num_cells:
+            return np.zeros(0, dtype=np.int64)
+        first = max(0, int(math.floor((rect.left - self.origin) / self.cell_size)))
+        last = min(self.num_cells - 1, int(math.floor((rect.right - self.origin) / self.cell_size)))
+        if last < first:
+            return np.zeros(0, dtype=np.int64)
+
+        ids = np.unique(self._cell_segments[self._cell_offsets[first]:self._cell_offsets[last + 1]])
+        mins = self._mins[ids]
+        maxs = self._maxs[ids]
+        overlap = ((mins[:, 0] <= rect.right) & (maxs[:, 0] >= rect.left) &
+                   (mins[:, 1] <= rect.bottom) & (maxs[:, 1] >= rect.top))
+        return ids[overlap]
+
+    def query_rect(self, rect: pygame.Rect) -> np.ndarray:
+        """Get the segments that intersect a rectangle.
+
+        Args:
+            rect: Query rectangle.
+
+        Returns:
+            Indices of intersecting segments.
+        """
+        ids = self.candidates(rect)
+        if not len(ids):
+            return ids
+        return ids[segments_intersect_rect(self.starts[ids], self.ends[ids], rect)]
+
+    def intersects_rect(self, rect: pygame.Rect) -> bool:
+        """Check whether any segment intersects a rectangle."""
+        return len(self.query_rect(rect)) > 0
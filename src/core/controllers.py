@@ -0,0 +1,89 @@
+# Input sources that drive the player's car.
+from abc import ABC, abstractmethod
+from typing import Sequence, Tuple
+
+import pygame
+
+
+class Controller(ABC):
+    """Source of driver input for one car.
+
+    The game asks its controller for input once per physics step, so
+    controllers can be swapped for scripted or recorded input without
+    touching the keyboard.
+    """
+
+    def begin_step(self, timestamp: float):
+        """Announce the next physics step.
+
+        Args:
+            timestamp: perf_counter time the step's simulated time ends at,
+                for controllers that apply input by when it happened.
+        """
+
+    @abstractmethod
+    def get_input(self) -> Tuple[float, float]:
+        """Get the input for the next physics step.
+
+        Returns:
+            (throttle, steering), each in [-1, 1].
+        """
+
+
+class KeyboardController(Controller):
+    """Reads the arrow keys and WASD from the current keyboard state."""
+
+    def get_input(self) -> Tuple[float, float]:
+        keys = pygame.key.get_pressed()
+
+        # Car won't move until player presses up/down
+        throttle = 0.0
+        steering = 0.0
+
+        # Always allow steering, even when not moving
+        if keys[pygame.K_LEFT] or keys[pygame.K_a]:
+            steering = -1.0  # Move up (since we're doing horizontal movement)
+        if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
+            steering = 1.0   # Move down
+
+        # Throttle controls
+        if keys[pygame.K_UP] or keys[pygame.K_w]:
+            throttle = 1.0  # Move forward (right)
+        elif keys[pygame.K_DOWN] or keys[pygame.K_s]:
+            throttle = -0.5  # Move backward (left, slower)
+
+        return (throttle, steering)
+
+
+class ConstantController(Controller):
+    """Holds the same throttle and steering on every step."""
+
+    def __init__(self, throttle: float = 0.0, steering: float = 0.0):
+        self.throttle = throttle
+        self.steering = steering
+
+    def get_input(self) -> Tuple[float, float]:
+        return (self.throttle, self.steering)
+
+
+class ScriptedController(Controller):
+    """Plays back a fixed list of inputs, one entry per physics step.
+
+    Once the script runs out the controller returns no input.
+    """
+
+    def __init__(self, inputs: Sequence[Tuple[float, float]]):
+        self.inputs = inputs
+        self.index = 0
+
+    @property
+    def finished(self) -> bool:
+        """Whether every scripted input has been used."""
+        return self.index >= len(self.inputs)
+
+    def get_input(self) -> Tuple[float, float]:
+        if self.finished:
+            return (0.0, 0.0)
+        throttle, steering = self.inputs[self.index]
+        self.index += 1
+        return (float(throttle), float(steering))
@@ -0,0 +1,305 @@
+# Gym-style environments for training driving agents without a window.
+import os
+import sys
+import math
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.utils.constants import PHYSICS_HZ
+from src.core.car_batch import CarBatch
+from src.core.track import Track
+
+# Distances ahead of the car at which the path heading is sampled
+DEFAULT_HEADING_OFFSETS = (50.0, 100.0, 200.0, 400.0)
+
+# Car hitbox, matching Car.width and Car.height
+CAR_WIDTH = 60
+CAR_HEIGHT = 100
+
+COLLISION_PENALTY = 1.0
+
+
+class VectorRacingEnv:
+    """N independent cars on one shared track, stepped together.
+
+    All cars share one ``Track`` (and so its path, heading and obstacle
+    arrays) and are simulated by a single ``CarBatch``, so a step costs a
+    handful of NumPy operations regardless of N.
+
+    Observations are float32 arrays of shape ``(num_envs, observation_size)``
+    with these columns:
+
+    - lap progress, distance along the path over the path length (0 on
+      endless tracks)
+    - speed over max speed
+    - lane, scaled to [-1, 1]
+    - lateral offset from the path centre, in lane widths
+    - for each heading offset, the path heading that far ahead relative to
+      the heading at the car, in units of 90 degrees
+    - for each of the ``num_obstacles`` nearest obstacles ahead: dx over
+      ``obstacle_range``, dy in lane widths, and 1 (0 for empty slots)
+
+    Actions are ``(num_envs, 2)`` arrays of throttle and steering in [-1, 1].
+
+    The reward is the distance gained, relative to the most a car can gain
+    in one step, minus ``COLLISION_PENALTY`` when a car hits an obstacle.
+    Hitting an obstacle terminates an episode and reaching ``max_steps``
+    truncates it. Finished cars are reset automatically; the observation
+    they finished with is returned in ``info['final_observation']``.
+    """
+
+    def __init__(self, num_envs: int, track: Optional[Track] = None,
+                 screen_size: Tuple[int, int] = (1200, 800), seed: Optional[int] = None,
+                 max_steps: int = 3600, physics_hz: int = PHYSICS_HZ,
+                 heading_offsets: Sequence[float] = DEFAULT_HEADING_OFFSETS,
+                 num_obstacles: int = 4, obstacle_range: float = 600.0,
+                 random_start: bool = True, autoreset: bool = True, **tuning):
+        """Create the environments.
+
+        Args:
+            num_envs: Number of cars.
+            track: Track to share between all cars. When None a track is
+                generated from the reset seed.
+            screen_size: Screen size used to generate tracks.
+            seed: Seed for the first track and start positions.
+            max_steps: Steps before an episode is truncated.
+            physics_hz: Physics steps per second; one step is 1 / physics_hz.
+            heading_offsets: Distances ahead at which the heading is observed.
+            num_obstacles: Number of nearby obstacles in each observation.
+            obstacle_range: How far ahead obstacles are observed, in pixels.
+            random_start: Start episodes at random distances and lanes
+                instead of the start line in lane 2.
+            autoreset: Reset finished cars inside ``step``.
+            **tuning: Car tuning passed to ``CarBatch``.
+        """
+        self.num_envs = num_envs
+        self.screen_size = screen_size
+        self.max_steps = max_steps
+        self.dt = 1.0 / physics_hz
+        self.heading_offsets = np.asarray(heading_offsets, dtype=np.float64)
+        self.num_obstacles = num_obstacles
+        self.obstacle_range = obstacle_range
+        self.random_start = random_start
+        self.autoreset = autoreset
+        self._tuning = tuning
+
+        self._own_track = track is None
+        self.track = track if track is not None else Track(*screen_size, seed=seed, cache_dir=None)
+        self._rng = np.random.default_rng(seed)
+        self.cars = CarBatch(self.track, num_envs, **tuning)
+        self.steps = np.zeros(num_envs, dtype=np.int64)
+
+        self._geometry_source = None
+        self._geometry: Tuple[np.ndarray, ...] = ()
+        self._max_half_w = 0.0
+        # Heading is sampled at the car and at every offset in one lookup
+        self._heading_samples = np.concatenate([[0.0], self.heading_offsets])
+
+        self.observation_size = 4 + len(self.heading_offsets) + 3 * num_obstacles
+        self.action_size = 2
+
+    def _start_positions(self, count: int) -> Tuple[np.ndarray, np.ndarray]:
+        if not self.random_start:
+            return np.zeros(count), np.full(count, 2)
+        span = self.track.path_length if math.isfinite(self.track.path_length) else 0.0
+        distances = self._rng.uniform(0.0, span, count)
+        lanes = self._rng.integers(1, self.cars.num_lanes, size=count, endpoint=True)
+        return distances, lanes
+
+    def _reset_cars(self, mask: np.ndarray, distances: Optional[np.ndarray] = None,
+                    lanes: Optional[np.ndarray] = None):
+        if distances is None or lanes is None:
+            random_distances, random_lanes = self._start_positions(int(np.count_nonzero(mask)))
+            distances = random_distances if distances is None else distances
+            lanes = random_lanes if lanes is None else lanes
+        self.cars.reset(mask, distances, lanes)
+        self.steps[mask] = 0
+
+    def reset(self, seed: Optional[int] = None,
+              options: Optional[Dict] = None) -> Tuple[np.ndarray, Dict]:
+        """Start new episodes for every car.
+
+        Args:
+            seed: Reseeds start positions. A generated track is also
+                regenerated from this seed; a track passed in is kept.
+            options: May hold ``distance`` and ``lane``, scalar or one value
+                per car, to start the cars at chosen positions.
+
+        Returns:
+            The observations and an info dictionary.
+        """
+        if seed is not None:
+            self._rng = np.random.default_rng(seed)
+            if self._own_track and self.track.seed != seed:
+                self.track = Track(*self.screen_size, seed=seed, cache_dir=None)
+                self.cars = CarBatch(self.track, self.num_envs, **self._tuning)
+        options = options or {}
+        self._reset_cars(np.ones(self.num_envs, dtype=bool),
+                         options.get('distance'), options.get('lane'))
+        return self._observe(), {}
+
+    def step(self, actions: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, Dict]:
+        """Advance every car by one physics step.
+
+        Args:
+            actions: (num_envs, 2) array of throttle and steering.
+
+        Returns:
+            observations, rewards, terminated, truncated and an info
+            dictionary, following the Gymnasium vector API.
+        """
+        actions = np.asarray(actions, dtype=np.float64).reshape(self.num_envs, 2)
+        cars = self.cars
+        previous = cars.distance_along_track.copy()
+        cars.step(actions[:, 0], actions[:, 1], self.dt)
+        self.steps += 1
+
+        collided = self._collisions()
+        rewards = (cars.distance_along_track - previous) / (cars.max_speed * self.dt * 60)
+        rewards -= collided * COLLISION_PENALTY
+        terminated = collided
+        truncated = ~terminated & (self.steps >= self.max_steps)
+
+        observations = self._observe()
+        info = {}
+        done = terminated | truncated
+        if self.autoreset and done.any():
+            info['final_observation'] = observations[done]
+            info['done_indices'] = np.flatnonzero(done)
+            self._reset_cars(done)
+            observations[done] = self._observe()[done]
+        return observations, rewards.astype(np.float32), terminated, truncated, info
+
+    def _obstacle_geometry(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Obstacle centres and half sizes, sorted by centre x.
+
+        Like the left edges in ``ObstacleIndex``, the sorted centres let
+        every car find the obstacles in an x interval with a binary search.
+        Cached until the track's obstacle index changes.
+        """
+        index = self.track.obstacle_index
+        if self._geometry_source is not index:
+            boxes = index.boxes
+            half_w = boxes[:, 2] * 0.5
+            half_h = boxes[:, 3] * 0.5
+            center_x = boxes[:, 0] + half_w
+            order = np.argsort(center_x, kind='stable')
+            self._geometry = (center_x[order], (boxes[:, 1] + half_h)[order],
+                              half_w[order], half_h[order])
+            self._max_half_w = float(half_w.max()) if len(half_w) else 0.0
+            self._geometry_source = index
+        return self._geometry
+
+    @staticmethod
+    def _windows(starts: np.ndarray, ends: np.ndarray, width: int,
+                 size: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Gather ``width`` positions from each car's start, clipped to ``size``.
+
+        Returns:
+            (num_envs, width) positions, and which of them fall before the
+            car's end and so are inside its window.
+        """
+        positions = starts[:, None] + np.arange(width)
+        valid = positions < ends[:, None]
+        return np.minimum(positions, size - 1), valid
+
+    def _collisions(self) -> np.ndarray:
+        """Whether each car's hitbox overlaps an obstacle."""
+        center_x, center_y, half_w, half_h = self._obstacle_geometry()
+        if not len(center_x):
+            return np.zeros(self.num_envs, dtype=bool)
+        # Only obstacles whose centre is within reach along x can overlap
+        x = self.cars.x
+        reach = self._max_half_w + CAR_WIDTH / 2
+        starts = np.searchsorted(center_x, x - reach, side='right')
+        ends = np.searchsorted(center_x, x + reach, side='left')
+        width = int((ends - starts).max())
+        if width <= 0:
+            return np.zeros(self.num_envs, dtype=bool)
+        near, valid = self._windows(starts, ends, width, len(center_x))
+        hit = (valid & (np.abs(center_x[near] - x[:, None]) < half_w[near] + CAR_WIDTH / 2)
+               & (np.abs(center_y[near] - self.cars.y[:, None]) < half_h[near] + CAR_HEIGHT / 2))
+        return hit.any(axis=1)
+
+    def _observe(self) -> np.ndarray:
+        cars = self.cars
+        track = self.track
+        obs = np.zeros((self.num_envs, self.observation_size), dtype=np.float32)
+        distance = cars.distance_along_track
+
+        if math.isfinite(track.path_length) and track.path_length > 0:
+            obs[:, 0] = np.mod(distance, track.path_length) / track.path_length
+        obs[:, 1] = cars.speed / cars.max_speed
+        obs[:, 2] = (cars.lane - 1) / max(1, cars.num_lanes - 1) * 2 - 1
+        path_y = track.get_path_points(distance)[:, 1]
+        obs[:, 3] = (cars.y - path_y) / cars.lane_width
+
+        # Heading of the road ahead relative to the road under the car
+        k = len(self.heading_offsets)
+        headings = track.get_headings(distance[:, None] + self._heading_samples[None, :])
+        obs[:, 4:4 + k] = (headings[:, 1:] - headings[:, :1]) / 90.0
+
+        # Nearest obstacles ahead of each car: with centres sorted, they are
+        # the first ones past the car's rear within range
+        if self.num_obstacles:
+            center_x, center_y, _, _ = self._obstacle_geometry()
+            slots = obs[:, 4 + k:].reshape(self.num_envs, self.num_obstacles, 3)
+            if len(center_x):
+                starts = np.searchsorted(center_x, cars.x - CAR_WIDTH / 2, side='right')
+                ends = np.searchsorted(center_x, cars.x + self.obstacle_range, side='left')
+                count = min(self.num_obstacles, len(center_x))
+                nearest, present = self._windows(starts, ends, count, len(center_x))
+                dx = center_x[nearest] - cars.x[:, None]
+                dy = center_y[nearest] - cars.y[:, None]
+                slots[:, :count, 0] = np.where(present, dx / self.obstacle_range, 0.0)
+                slots[:, :count, 1] = np.where(present, dy / cars.lane_width[:, None], 0.0)
+                slots[:, :count, 2] = present
+        return obs
+
+
+class RacingEnv:
+    """Single-car environment following the Gymnasium ``Env`` API.
+
+    A thin wrapper over a one-car ``VectorRacingEnv`` without automatic
+    resets; call ``reset`` once an episode is terminated or truncated.
+    """
+
+    def __init__(self, track: Optional[Track] = None, **kwargs):
+        """Create the environment.
+
+        Args:
+            track: Track to drive on; generated from the reset seed when None.
+            **kwargs: Options passed to ``VectorRacingEnv``.
+        """
+        kwargs['autoreset'] = False
+        self.vector_env = VectorRacingEnv(1, track=track, **kwargs)
+        self.observation_size = self.vector_env.observation_size
+        self.action_size = self.vector_env.action_size
+
+    @property
+    def track(self) -> Track:
+        return self.vector_env.track
+
+    def reset(self, seed: Optional[int] = None,
+              options: Optional[Dict] = None) -> Tuple[np.ndarray, Dict]:
+        """Start a new episode.
+
+        Returns:
+            The observation and an info dictionary.
+        """
+        observations, info = self.vector_env.reset(seed, options)
+        return observations[0], info
+
+    def step(self, action: Sequence[float]) -> Tuple[np.ndarray, float, bool, bool, Dict]:
+        """Advance one physics step with a (throttle, steering) action.
+
+        Returns:
+            observation, reward, terminated, truncated and info.
+        """
+        observations, rewards, terminated, truncated, info = self.vector_env.step(
+            np.asarray(action, dtype=np.float64).reshape(1, 2))
+        return observations[0], float(rewards[0]), bool(terminated[0]), bool(truncated[0]), info
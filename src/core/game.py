@@ -1,81 +1,176 @@
 # Main game module containing the game loop and core game logic.
 import os
 import sys
+import time
 import pygame
-from typing import Tuple
+from typing import List, Optional, Sequence, Tuple
 
 # Add the src directory to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
 from src.utils.constants import *
 from src.core.car import Car
+from src.core.controllers import Controller
+from src.core.input_buffer import BufferedController, InputBuffer
+from src.core.replay import RecordingController, Replay, save_replay
 from src.core.track import Track
+from src.core.streaming_track import StreamingTrack
 from src.ui.hud import HUD
+from src.utils.frame_pacer import FramePacer
+from src.utils.profiler import FrameProfiler, NullProfiler
+from src.utils.quality import QUALITY_TIERS, QualityController, QualityTier
 
 class RacingGame:
     # Main game class that handles initialization, game loop, and cleanup.
     
-    def __init__(self, title: str, width: int, height: int):
+    def __init__(self, title: str, width: int, height: int,
+                 fixed_timestep: bool = True, physics_hz: int = PHYSICS_HZ,
+                 headless: bool = False, controller: Optional[Controller] = None,
+                 render_every: int = 1, profile: bool = False,
+                 profile_path: Optional[str] = None, seed: Optional[int] = None,
+                 endless: bool = False, record_path: Optional[str] = None,
+                 dirty_rects: bool = False, adaptive_quality: bool = False,
+                 quality_tiers: Sequence[QualityTier] = QUALITY_TIERS,
+                 fps: int = FPS, vsync: bool = False,
+                 cache_dir: Optional[str] = TRACK_CACHE_DIR):
         # Initialize the game window and resources
+        #   fixed_timestep: Run physics in fixed steps and interpolate rendering
+        #   physics_hz: Physics steps per second in fixed-timestep mode
+        #   headless: Use SDL's dummy video driver and run faster than real time
+        #   controller: Input source for the car (defaults to buffered keyboard
+        #       and gamepad input)
+        #   render_every: Render every Nth frame, or never when 0
+        #   profile: Record per-phase frame timings (F3 toggles the overlay)
+        #   profile_path: JSON file the timings are written to on exit
+        #   seed: Track seed; seeded tracks are reproducible and cached on disk
+        #   endless: Stream an endless track generated ahead of the car
+        #   record_path: Record every physics step's input to this replay file on exit
+        #   dirty_rects: Present only the changed screen areas while the camera is still
+        #   adaptive_quality: Lower rendering quality when frames run over budget
+        #       and raise it again when there is headroom
+        #   quality_tiers: Quality tiers to step through, highest quality first
+        #   fps: Target frame rate, e.g. 60, 120 or 144
+        #   vsync: Let the display's refresh pace frames instead of sleeping
+        #   cache_dir: Directory for baked seeded tracks, or None to disable the
+        #       cache (endless tracks are never cached)
+        self.headless = headless
+        if headless:
+            # Must be set before the display is initialised
+            os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+        
         pygame.init()
         pygame.display.set_caption(title)
         
-        # Set up the display
-        self.screen = pygame.display.set_mode((width, height))
-        self.clock = pygame.time.Clock()
+        # Set up the display; vsync needs a renderer-backed (SCALED) window
+        vsync = vsync and not headless
+        if vsync:
+            try:
+                self.screen = pygame.display.set_mode((width, height), pygame.SCALED, vsync=1)
+            except pygame.error as e:
+                print(f"Warning: vsync unavailable ({e}); pacing with timers instead")
+                vsync = False
+        if not vsync:
+            self.screen = pygame.display.set_mode((width, height))
+        self.fps = fps
+        self.clock = FramePacer(fps, vsync=vsync)
         self.running = False
-        self.fps = 60
         self.width = width
         self.height = height
+        self.render_every = render_every
+        
+        # Keyboard and gamepad events are timestamped as they are drained and
+        # applied in the physics step they fall into
+        self.input = InputBuffer()
+        if not headless:
+            self.input.open_joysticks()
+        self.controller = controller if controller is not None else BufferedController(self.input)
+        
+        # Input recording; replays need fixed physics steps to be deterministic
+        self.record_path = record_path
+        self.recorder = None
+        if record_path is not None:
+            if not fixed_timestep:
+                raise ValueError("Recording a replay requires fixed_timestep=True")
+            self.recorder = RecordingController(self.controller)
+            self.controller = self.recorder
+        
+        # Presentation: full flips, or only the areas that changed
+        self.dirty_rects = dirty_rects
+        self.force_full_present = True
+        self.last_present_rects: Optional[List[pygame.Rect]] = None  # None after a full flip
+        
+        # Frame profiling
+        self.profiler = FrameProfiler() if profile or profile_path else NullProfiler()
+        self.profile_path = profile_path
+        self.show_profiler = False
+        
+        # Fixed-timestep simulation state
+        self.fixed_timestep = fixed_timestep
+        self.physics_hz = physics_hz
+        self.physics_dt = 1.0 / physics_hz
+        self.accumulator = 0.0
+        self.render_alpha = 1.0  # Blend factor between the last two physics states
         
         # Game state
-        self.track = Track(width, height, num_lanes=4)
+        self.endless = endless
+        if endless:
+            self.track = StreamingTrack(width, height, num_lanes=4, seed=seed)
+        else:
+            self.track = Track(width, height, num_lanes=4, seed=seed, cache_dir=cache_dir)
         # Initialize car at the starting point of the track (left side, middle vertically)
         start_point = self.track.get_path_point(0)
         self.car = Car(100, height // 2)  # Start at x=100, middle of screen
         self.hud = HUD(self.screen)
+        
+        # Rendering quality; below full scale the world is drawn to a
+        # smaller surface and scaled up to the screen
+        self.quality = QualityController(quality_tiers, budget=1.0 / self.fps) if adaptive_quality else None
+        self.render_scale = 1.0
+        self.present_time = 0.0  # Time the last frame spent presenting, excluded from its work
+        self.world_surface = self.screen
+        if self.quality is not None:
+            self.apply_quality(self.quality.tier)
         # Initialize camera to follow car
         self.camera_x = 0
         self.camera_y = 0
+        self.prev_camera_x = 0
+        self.prev_camera_y = 0
         
         # Game metrics
+        self.tick_count = 0
         self.lap_time = 0
         self.best_lap = float('inf')
-        self.lap_count = 0
+        self.lap_count = 0  # Completed laps
         self.distance = 0
         self.speed = 0
         
     def handle_events(self):
-        # Process all events in the event queue
+        # Process all events in the event queue; also called while waiting
+        # for the next frame so input is timestamped close to when it happened
+        now = time.perf_counter()
         for event in pygame.event.get():
+            if self.input.push_event(event, now):
+                continue
             if event.type == pygame.QUIT:
                 self.running = False
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
                     self.running = False
+                elif event.key == pygame.K_F3:
+                    self.show_profiler = not self.show_profiler
+                    self.force_full_present = True  # Also clears a hidden overlay
     
     def update(self, dt: float):
-        # Get keyboard input
-        keys = pygame.key.get_pressed()
-        
-        # Handle car controls - car won't move until player presses up/down
-        throttle = 0.0  # Start with no throttle
-        steering = 0.0
-        
-        # Always allow steering, even when not moving
-        if keys[pygame.K_LEFT] or keys[pygame.K_a]:
-            steering = -1.0  # Move up (since we're doing horizontal movement)
-        if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
-            steering = 1.0   # Move down
-            
-        # Throttle controls
-        if keys[pygame.K_UP] or keys[pygame.K_w]:
-            throttle = 1.0  # Move forward (right)
-        elif keys[pygame.K_DOWN] or keys[pygame.K_s]:
-            throttle = -0.5  # Move backward (left, slower)
+        # Get driver input for this physics step
+        throttle, steering = self.controller.get_input()
         
         # Update car with track for path following
+        start = time.perf_counter()
         self.car.update(throttle, steering, dt, self.track)
+        self.profiler.add('car_update', time.perf_counter() - start)
+        
+        # Generate track ahead of the car (a no-op for static tracks)
+        self.track.prefetch(self.car.distance_along_track)
         
         # Update game state
         self.speed = self.car.speed
@@ -93,38 +188,153 @@ class RacingGame:
         
         # Update lap time
         self.lap_time += dt
+        self.tick_count += 1
+        
+        # Count a lap each time the car passes the end of the path
+        laps = int(self.car.distance_along_track // self.track.path_length)
+        if laps > self.lap_count:
+            self.best_lap = min(self.best_lap, self.lap_time)
+            self.lap_time = 0
+            self.lap_count = laps
+    
+    def _save_previous_state(self):
+        # Remember car and camera state before a physics step for interpolation
+        self.car.save_previous_state()
+        self.prev_camera_x = self.camera_x
+        self.prev_camera_y = self.camera_y
+    
+    def advance(self, frame_dt: float) -> int:
+        """Advance the simulation by the time covered by one rendered frame.
+        
+        In fixed-timestep mode the frame time is added to an accumulator and
+        consumed in ``physics_dt`` substeps. The leftover fraction becomes
+        ``render_alpha`` for interpolating the next render. Otherwise the
+        whole frame time is passed to a single ``update``.
+        
+        Before each step the controller is told the wall time the step's
+        simulated time ends at, so buffered input is applied in the step it
+        happened in rather than all at the start of the frame.
+        
+        Args:
+            frame_dt: Wall time since the previous frame in seconds.
+        
+        Returns:
+            The number of physics steps that were run.
+        """
+        now = time.perf_counter()
+        if not self.fixed_timestep:
+            self._save_previous_state()
+            self.controller.begin_step(now)
+            self.update(frame_dt)
+            self.render_alpha = 1.0
+            return 1
+        
+        self.accumulator += frame_dt
+        steps = 0
+        # Small tolerance so frame times that are exact multiples of the step
+        # are not left one step short by floating-point rounding
+        while self.accumulator >= self.physics_dt - 1e-9:
+            self._save_previous_state()
+            self.controller.begin_step(now - (self.accumulator - self.physics_dt))
+            self.update(self.physics_dt)
+            self.accumulator -= self.physics_dt
+            steps += 1
+        
+        self.render_alpha = max(0.0, self.accumulator / self.physics_dt)
+        return steps
     
     def _draw_background(self):
         """Draw the scrolling background based on current biome."""
         # The track class now handles biome-specific background drawing
         pass
     
+    def apply_quality(self, tier: QualityTier):
+        """Switch rendering to the settings of a quality tier."""
+        self.car.show_debug = tier.show_debug
+        self.car.set_rotation_step(tier.rotation_step)
+        self.track.max_visible_obstacles = tier.max_obstacles
+        if tier.render_scale != self.render_scale:
+            self.render_scale = tier.render_scale
+            if tier.render_scale == 1.0:
+                self.world_surface = self.screen
+            else:
+                size = (max(1, round(self.width * tier.render_scale)),
+                        max(1, round(self.height * tier.render_scale)))
+                self.world_surface = pygame.Surface(size).convert(self.screen)
+        self.force_full_present = True
+    
     def render(self):
-        # Clear the screen with sky blue background
-        self.screen.fill((135, 206, 235))  # Sky blue background
+        # The track background covers the whole screen, so no clear is needed
         
-        # Render track with camera offset for horizontal scrolling
-        self.track.render(self.screen, self.camera_x, self.camera_y)
+        # Interpolate the camera between the last two physics steps
+        alpha = self.render_alpha
+        camera_x = self.prev_camera_x + (self.camera_x - self.prev_camera_x) * alpha
+        camera_y = self.prev_camera_y + (self.camera_y - self.prev_camera_y) * alpha
+        
+        # Render track with camera offset for horizontal scrolling; capped
+        # obstacle counts keep the ones ahead of the car
+        car_x = self.car.get_interpolated_pose(alpha)[0]
+        dirty = self.track.render(self.world_surface, camera_x, camera_y, car_x)
+        self.profiler.mark('track_render')
         
         # Draw car with camera offset
-        self.car.render(self.screen, self.camera_x, self.camera_y)
+        dirty += self.car.render(self.world_surface, camera_x, camera_y, alpha, self.render_scale)
+        if self.world_surface is not self.screen:
+            # Scale the reduced-resolution world up to fill the screen
+            pygame.transform.scale(self.world_surface, (self.width, self.height), self.screen)
+            dirty = [self.screen.get_rect()]
+        self.profiler.mark('car_render')
         
         # Draw HUD
-        self.hud.render(
+        dirty += self.hud.render(
             self.lap_time, 
             self.best_lap, 
             self.lap_count, 
             abs(self.speed) * 10  # Use absolute value of speed for display
         )
+        if self.show_profiler and isinstance(self.profiler, FrameProfiler):
+            dirty.append(self.profiler.render_overlay(self.screen))
+        self.profiler.mark('hud_render')
+        
+        # Update the display; with vsync the flip blocks until the refresh,
+        # which is waiting rather than work
+        present_start = time.perf_counter()
+        self.present(dirty)
+        self.present_time = time.perf_counter() - present_start
+        self.profiler.mark('display_flip')
+    
+    def present(self, dirty: List[pygame.Rect]):
+        """Show the rendered frame.
+        
+        With dirty rectangles enabled only the changed areas are pushed to
+        the display. A scrolling camera changes the whole screen (the track
+        reports the full screen as dirty), which falls back to a full flip.
         
-        # Update the display
-        pygame.display.flip()
+        Args:
+            dirty: Screen areas that changed since the last presented frame.
+        """
+        screen_rect = self.screen.get_rect()
+        full = (not self.dirty_rects or self.force_full_present
+                or any(rect.contains(screen_rect) for rect in dirty))
+        self.force_full_present = False
+        self.last_present_rects = None if full else dirty
+        if not self.headless:
+            if full:
+                pygame.display.flip()
+            elif dirty:
+                pygame.display.update(dirty)
+        self.input.presented()
     
-    def run(self):
+    def run(self, max_ticks: Optional[int] = None, max_laps: Optional[int] = None):
         # Run the main game loop
+        #   max_ticks: Stop after this many physics steps
+        #   max_laps: Stop after this many completed laps
         self.running = True
-        last_time = pygame.time.get_ticks() / 1000.0
         frame_count = 0
+        # Headless runs simulate exactly one physics step per frame; otherwise
+        # each frame simulates the time the previous frame took
+        dt = self.physics_dt if self.headless else 1.0 / self.fps
+        self.clock.start()
         
         print("Starting game loop...")
         
@@ -132,26 +342,34 @@ class RacingGame:
             try:
                 frame_count += 1
                 
-                # Calculate delta time
-                current_time = pygame.time.get_ticks() / 1000.0
-                dt = current_time - last_time
-                last_time = current_time
-                
-                # Cap delta time to avoid spiral of death
-                dt = min(dt, 0.1)
-                
-                if frame_count % 60 == 0:  # Log every second at 60 FPS
-                    print(f"Frame {frame_count}: FPS={int(1/dt) if dt > 0 else 0}, "
-                          f"Car pos=({self.car.x:.1f}, {self.car.y:.1f}), "
-                          f"Speed={self.car.speed:.1f}, Lane={self.car.lane}")
-                
                 # Update game state
+                frame_start = time.perf_counter()
+                self.present_time = 0.0
+                self.profiler.begin_frame()
                 self.handle_events()
-                self.update(dt)
-                self.render()
+                self.profiler.mark('handle_events')
+                self.advance(dt)
+                self.profiler.mark('update')
+                if self.render_every and frame_count % self.render_every == 0:
+                    self.render()
+                
+                # Adapt rendering quality to the work done this frame
+                if self.quality is not None:
+                    tier = self.quality.record(time.perf_counter() - frame_start - self.present_time)
+                    if tier is not None:
+                        self.apply_quality(tier)
                 
-                # Cap the frame rate
-                self.clock.tick(self.fps)
+                # Wait for the next frame (headless runs as fast as possible)
+                if not self.headless:
+                    # Cap delta time to avoid spiral of death
+                    dt = min(self.clock.wait(poll=self.handle_events), 0.1)
+                self.profiler.mark('wait')
+                self.profiler.end_frame()
+                
+                if max_ticks is not None and self.tick_count >= max_ticks:
+                    self.running = False
+                if max_laps is not None and self.lap_count >= max_laps:
+                    self.running = False
                 
             except Exception as e:
                 print(f"Error in game loop: {e}")
@@ -163,7 +381,39 @@ class RacingGame:
         # Clean up
         self.cleanup()
     
+    def save_replay(self, path: str):
+        """Write the input recorded so far, with the track seed, to a replay file."""
+        replay = self.recorder.to_replay(self.track.seed, self.physics_hz,
+                                         self.width, self.height, self.endless)
+        save_replay(path, replay)
+    
+    @classmethod
+    def from_replay(cls, replay: Replay, title: str = "Replay", **kwargs) -> 'RacingGame':
+        """Create a headless game that plays a replay back.
+        
+        Call ``run(max_ticks=replay.tick_count)`` to re-simulate the whole
+        session. Extra keyword arguments (render_every, profile_path,
+        cache_dir, ...) are passed to the constructor.
+        """
+        kwargs.setdefault('headless', True)
+        return cls(title, replay.width, replay.height, physics_hz=replay.physics_hz,
+                   controller=replay.controller(), seed=replay.seed,
+                   endless=replay.endless, **kwargs)
+    
     def cleanup(self):
-        # Clean up resources
+        # Clean up resources; headless runs return to the caller instead of exiting
+        if self.profile_path and isinstance(self.profiler, FrameProfiler):
+            extra = {}
+            if not self.headless:
+                extra['pacing'] = self.clock.get_stats()
+            latency = self.input.get_latency_stats()
+            if latency:
+                extra['input_latency'] = latency
+            self.profiler.dump(self.profile_path, extra or None)
+            print(f"Frame profile written to {self.profile_path}")
+        if self.recorder is not None:
+            self.save_replay(self.record_path)
+            print(f"Replay of {self.recorder.tick_count} ticks written to {self.record_path}")
         pygame.quit()
-        sys.exit()
+        if not self.headless:
+            sys.exit()
@@ -0,0 +1,304 @@
+# Timestamped keyboard and gamepad input, applied per physics step.
+#
+# Events are stamped with time.perf_counter when they are taken off the
+# event queue. The game drains the queue at the start of every frame and,
+# through the frame pacer's poll callback, while it waits for the next one.
+# Each physics step then applies only the events up to the wall time that
+# step stands for, so input lands in the step where it happened instead of
+# being sampled once per frame.
+import os
+import sys
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Hashable, List, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+import pygame
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.core.controllers import Controller
+from src.utils.constants import INPUT_DEADZONE
+
+# Digital controls
+ACCELERATE = 'accelerate'
+BRAKE = 'brake'
+STEER_LEFT = 'steer_left'
+STEER_RIGHT = 'steer_right'
+# Analog controls, in [-1, 1] after the deadzone
+THROTTLE_AXIS = 'throttle_axis'
+STEERING_AXIS = 'steering_axis'
+
+KEY_BINDINGS: Dict[int, str] = {
+    pygame.K_UP: ACCELERATE, pygame.K_w: ACCELERATE,
+    pygame.K_DOWN: BRAKE, pygame.K_s: BRAKE,
+    pygame.K_LEFT: STEER_LEFT, pygame.K_a: STEER_LEFT,
+    pygame.K_RIGHT: STEER_RIGHT, pygame.K_d: STEER_RIGHT,
+}
+
+# Gamepad layout: left stick x steers, left stick y is throttle (pushed
+# up is negative), the first two buttons accelerate and brake, and the
+# d-pad steers
+JOYSTICK_AXES: Dict[int, Tuple[str, float]] = {0: (STEERING_AXIS, 1.0), 1: (THROTTLE_AXIS, -1.0)}
+JOYSTICK_BUTTONS: Dict[int, str] = {0: ACCELERATE, 1: BRAKE}
+
+REVERSE_THROTTLE = -0.5  # Braking input, matching KeyboardController
+
+
+class InputEvent(NamedTuple):
+    """A change of one control.
+
+    Attributes:
+        timestamp: perf_counter time the event was received.
+        control: Control name, e.g. ACCELERATE or STEERING_AXIS.
+        value: 1.0 or 0.0 for a digital press or release, the position
+            for an analog control.
+        source: Key, button or hat the event came from. A digital control
+            stays pressed while any of its sources is held.
+    """
+    timestamp: float
+    control: str
+    value: float
+    source: Hashable = None
+
+
+def apply_deadzone(value: float, deadzone: float = INPUT_DEADZONE) -> float:
+    """Zero small stick deflections and rescale the rest to [-1, 1].
+
+    Rescaling keeps the response continuous: just outside the deadzone the
+    output starts from 0 instead of jumping to the deadzone value.
+    """
+    magnitude = abs(value)
+    if magnitude <= deadzone:
+        return 0.0
+    scaled = min(1.0, (magnitude - deadzone) / (1.0 - deadzone))
+    return scaled if value > 0 else -scaled
+
+
+class InputBuffer:
+    """Queue of timestamped input events and the control state they build.
+
+    Also measures input latency: the time from an event being received to
+    the first presented frame that was simulated with it.
+    """
+
+    def __init__(self, deadzone: float = INPUT_DEADZONE, latency_capacity: int = 600,
+                 clock: Callable[[], float] = time.perf_counter):
+        """Create an empty buffer.
+
+        Args:
+            deadzone: Stick deflection ignored around the centre.
+            latency_capacity: Number of latency samples kept for statistics.
+            clock: Function returning the current time in seconds.
+        """
+        self.deadzone = deadzone
+        self.clock = clock
+        self.joysticks: Dict[int, 'pygame.joystick.JoystickType'] = {}
+
+        self._events: Deque[InputEvent] = deque()
+        self._held: Dict[str, Set[Hashable]] = {}  # Control -> sources holding it
+        self._tapped: Set[str] = set()
+        self._axes: Dict[str, float] = {THROTTLE_AXIS: 0.0, STEERING_AXIS: 0.0}
+        self._hats: Dict[Tuple[int, int], int] = {}  # (instance id, hat) -> last x
+        self._axis_sources: Dict[str, int] = {}  # Axis control -> instance id that last moved it
+
+        # Receive times of events applied since the last present
+        self._unpresented: List[float] = []
+        self.latency_capacity = latency_capacity
+        self.latencies = np.zeros(latency_capacity, dtype=np.float64)
+        self.latency_count = 0
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def open_joysticks(self):
+        """Open every connected joystick so it reports events."""
+        if not pygame.joystick.get_init():
+            pygame.joystick.init()
+        for index in range(pygame.joystick.get_count()):
+            self._open_joystick(index)
+
+    def _open_joystick(self, index: int):
+        joystick = pygame.joystick.Joystick(index)
+        self.joysticks[joystick.get_instance_id()] = joystick
+
+    def push(self, control: str, value: float, timestamp: Optional[float] = None,
+             source: Hashable = None):
+        """Queue a control change.
+
+        Args:
+            control: Control name.
+            value: New value of the control.
+            timestamp: When it happened; defaults to now.
+            source: Key, button or hat that changed; the control itself
+                when None.
+        """
+        self._events.append(InputEvent(self.clock() if timestamp is None else timestamp,
+                                       control, value, control if source is None else source))
+
+    def push_event(self, event: pygame.event.Event, timestamp: Optional[float] = None) -> bool:
+        """Queue a pygame keyboard or joystick event.
+
+        Args:
+            event: Event taken off the pygame queue.
+            timestamp: When it was received; defaults to now.
+
+        Returns:
+            True if the event was an input event, False if it was ignored.
+        """
+        if event.type in (pygame.KEYDOWN, pygame.KEYUP):
+            control = KEY_BINDINGS.get(event.key)
+            if control is None:
+                return False
+            self.push(control, 1.0 if event.type == pygame.KEYDOWN else 0.0, timestamp,
+                      ('key', event.key))
+        elif event.type in (pygame.JOYBUTTONDOWN, pygame.JOYBUTTONUP):
+            control = JOYSTICK_BUTTONS.get(event.button)
+            if control is None:
+                return False
+            self.push(control, 1.0 if event.type == pygame.JOYBUTTONDOWN else 0.0, timestamp,
+                      ('button', event.instance_id, event.button))
+        elif event.type == pygame.JOYAXISMOTION:
+            binding = JOYSTICK_AXES.get(event.axis)
+            if binding is None:
+                return False
+            control, sign = binding
+            value = apply_deadzone(event.value * sign, self.deadzone)
+            if value == self._axes[control] and not self._events:
+                return True  # Jitter inside the deadzone changes nothing
+            self.push(control, value, timestamp)
+            self._axis_sources[control] = event.instance_id
+        elif event.type == pygame.JOYHATMOTION:
+            # Only the hat's x steers, so moving it up or down changes nothing
+            self._set_hat(event.instance_id, event.hat, event.value[0], timestamp)
+        elif event.type == pygame.JOYDEVICEADDED:
+            self._open_joystick(event.device_index)
+        elif event.type == pygame.JOYDEVICEREMOVED:
+            self.joysticks.pop(event.instance_id, None)
+            # Centre an axis only if this pad set it, so another pad's stick is kept
+            for control in (THROTTLE_AXIS, STEERING_AXIS):
+                if self._axis_sources.get(control) == event.instance_id or not self.joysticks:
+                    self._axis_sources.pop(control, None)
+                    self.push(control, 0.0, timestamp)
+            for button, control in JOYSTICK_BUTTONS.items():
+                self.push(control, 0.0, timestamp, ('button', event.instance_id, button))
+            for instance_id, hat in [key for key in self._hats if key[0] == event.instance_id]:
+                self._set_hat(instance_id, hat, 0, timestamp)
+        else:
+            return False
+        return True
+
+    def _set_hat(self, instance_id: int, hat: int, x: int, timestamp: Optional[float]):
+        """Queue steering changes for a hat whose x moved to ``x``."""
+        key = (instance_id, hat)
+        previous = self._hats.get(key, 0)
+        if x == previous:
+            return
+        source = ('hat', instance_id, hat)
+        if previous:
+            self.push(STEER_LEFT if previous < 0 else STEER_RIGHT, 0.0, timestamp, source)
+        if x:
+            self.push(STEER_LEFT if x < 0 else STEER_RIGHT, 1.0, timestamp, source)
+            self._hats[key] = x
+        else:
+            del self._hats[key]
+
+    def apply_until(self, timestamp: float) -> Tuple[float, float]:
+        """Apply the events received up to a time and read the controls.
+
+        A digital control is pressed while any key, button or hat bound to
+        it is held. A press and release that both fall in the same step
+        still count as pressed for that step, so taps shorter than a step
+        are not lost.
+
+        Args:
+            timestamp: Wall time the physics step ends at.
+
+        Returns:
+            (throttle, steering), each in [-1, 1].
+        """
+        events = self._events
+        while events and events[0].timestamp <= timestamp:
+            event = events.popleft()
+            self._unpresented.append(event.timestamp)
+            if event.control in self._axes:
+                self._axes[event.control] = event.value
+            elif event.value:
+                self._held.setdefault(event.control, set()).add(event.source)
+                self._tapped.add(event.control)
+            else:
+                sources = self._held.get(event.control)
+                if sources is not None:
+                    sources.discard(event.source)
+                    if not sources:
+                        del self._held[event.control]
+
+        active = self._tapped.union(self._held)
+        self._tapped.clear()
+
+        # Digital input wins over the sticks, like KeyboardController
+        if ACCELERATE in active:
+            throttle = 1.0
+        elif BRAKE in active:
+            throttle = REVERSE_THROTTLE
+        else:
+            throttle = self._axes[THROTTLE_AXIS]
+            if throttle < 0:
+                throttle *= -REVERSE_THROTTLE
+        if STEER_RIGHT in active:
+            steering = 1.0
+        elif STEER_LEFT in active:
+            steering = -1.0
+        else:
+            steering = self._axes[STEERING_AXIS]
+        return (throttle, steering)
+
+    def presented(self, timestamp: Optional[float] = None):
+        """Record that a frame simulated with the applied events was shown.
+
+        Args:
+            timestamp: When the frame was presented; defaults to now.
+        """
+        if not self._unpresented:
+            return
+        now = self.clock() if timestamp is None else timestamp
+        for received in self._unpresented:
+            self.latencies[self.latency_count % self.latency_capacity] = now - received
+            self.latency_count += 1
+        self._unpresented.clear()
+
+    def get_latency_stats(self) -> Dict[str, float]:
+        """Get input-to-present latency statistics in milliseconds.
+
+        Returns:
+            p50/p95/p99, mean and max latency over the buffered samples and
+            the number of events measured. Empty if nothing was measured.
+        """
+        data = self.latencies[:min(self.latency_count, self.latency_capacity)] * 1000.0
+        if not len(data):
+            return {}
+        values = np.percentile(data, (50, 95, 99))
+        return {
+            'p50_ms': float(values[0]),
+            'p95_ms': float(values[1]),
+            'p99_ms': float(values[2]),
+            'mean_ms': float(data.mean()),
+            'max_ms': float(data.max()),
+            'events': self.latency_count,
+        }
+
+
+class BufferedController(Controller):
+    """Drives the car from an InputBuffer, one physics step at a time."""
+
+    def __init__(self, buffer: Optional[InputBuffer] = None):
+        self.buffer = buffer if buffer is not None else InputBuffer()
+        self._step_time: Optional[float] = None
+
+    def begin_step(self, timestamp: float):
+        self._step_time = timestamp
+
+    def get_input(self) -> Tuple[float, float]:
+        timestamp = self._step_time if self._step_time is not None else self.buffer.clock()
+        return self.buffer.apply_until(timestamp)
@@ -0,0 +1,147 @@
+# Recording and playback of driver input for deterministic replays.
+#
+# A replay is the track seed and simulation settings plus one quantised
+# (throttle, steering) pair per physics step. Because the track is seeded
+# and physics runs in fixed steps, feeding the same inputs back reproduces
+# the session exactly.
+#
+# File layout (little-endian): a HEADER struct followed by tick_count pairs
+# of int16 (throttle, steering) scaled by INPUT_SCALE.
+import os
+import struct
+import time
+from array import array
+from typing import NamedTuple, Tuple
+
+import numpy as np
+
+from src.core.controllers import Controller, ScriptedController
+from src.utils.constants import SAVEGAME_DIR
+
+MAGIC = b'RRPL'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sHHIIIQQ')  # magic, version, physics Hz, width, height, flags, seed, ticks
+INPUT_SCALE = 32767
+
+FLAG_ENDLESS = 1
+
+
+class ReplayFormatError(ValueError):
+    """Raised when a file is not a valid replay."""
+
+
+def quantize_input(value: float) -> int:
+    """Convert an input in [-1, 1] to the int16 stored in replays."""
+    return int(round(max(-1.0, min(value, 1.0)) * INPUT_SCALE))
+
+
+def dequantize_input(value: int) -> float:
+    """Convert a stored int16 back to an input in [-1, 1]."""
+    return value / INPUT_SCALE
+
+
+class Replay(NamedTuple):
+    """A recorded session.
+
+    Attributes:
+        seed: Track seed.
+        physics_hz: Physics steps per second the session ran at.
+        width: Screen width, which also shapes the track.
+        height: Screen height.
+        endless: Whether the session used an endless streaming track.
+        inputs: (ticks, 2) int16 array of quantised throttle and steering.
+    """
+    seed: int
+    physics_hz: int
+    width: int
+    height: int
+    endless: bool
+    inputs: np.ndarray
+
+    @property
+    def tick_count(self) -> int:
+        return len(self.inputs)
+
+    def controller(self) -> ScriptedController:
+        """Get a controller that plays the recorded inputs back."""
+        return ScriptedController((self.inputs / INPUT_SCALE).tolist())
+
+
+def default_replay_path() -> str:
+    """Get a timestamped replay file name under SAVEGAME_DIR."""
+    return os.path.join(SAVEGAME_DIR, time.strftime('replay_%Y%m%d_%H%M%S.rpl'))
+
+
+def save_replay(path: str, replay: Replay):
+    """Write a replay file.
+
+    Args:
+        path: Destination file path; missing directories are created.
+        replay: Replay to write.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    flags = FLAG_ENDLESS if replay.endless else 0
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, replay.physics_hz, replay.width, replay.height,
+                         flags, replay.seed, replay.tick_count)
+    # Write to a temporary file first so readers never see a partial file
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(header)
+        np.ascontiguousarray(replay.inputs, dtype='<i2').tofile(f)
+    os.replace(temp_path, path)
+
+
+def load_replay(path: str) -> Replay:
+    """Read a replay file.
+
+    Raises:
+        ReplayFormatError: If the file is not a valid replay.
+    """
+    with open(path, 'rb') as f:
+        raw = f.read(HEADER.size)
+        if len(raw) < HEADER.size:
+            raise ReplayFormatError(f"{path} is too short to be a replay")
+        magic, version, physics_hz, width, height, flags, seed, ticks = HEADER.unpack(raw)
+        if magic != MAGIC:
+            raise ReplayFormatError(f"{path} is not a replay (bad magic)")
+        if version != FORMAT_VERSION:
+            raise ReplayFormatError(f"Unsupported replay version {version}")
+        inputs = np.fromfile(f, dtype='<i2', count=ticks * 2)
+    if len(inputs) != ticks * 2:
+        raise ReplayFormatError(f"{path} is truncated")
+    return Replay(seed, physics_hz, width, height, bool(flags & FLAG_ENDLESS), inputs.reshape(-1, 2))
+
+
+class RecordingController(Controller):
+    """Wraps another controller and records its input every physics step.
+
+    Inputs are quantised before they are returned, so the live session
+    sees exactly the values a replay will feed back.
+    """
+
+    def __init__(self, source: Controller):
+        self.source = source
+        self._inputs = array('h')
+
+    @property
+    def tick_count(self) -> int:
+        return len(self._inputs) // 2
+
+    def begin_step(self, timestamp: float):
+        self.source.begin_step(timestamp)
+
+    def get_input(self) -> Tuple[float, float]:
+        throttle, steering = self.source.get_input()
+        throttle_q = quantize_input(throttle)
+        steering_q = quantize_input(steering)
+        self._inputs.append(throttle_q)
+        self._inputs.append(steering_q)
+        return (dequantize_input(throttle_q), dequantize_input(steering_q))
+
+    def to_replay(self, seed: int, physics_hz: int, width: int, height: int,
+                  endless: bool = False) -> Replay:
+        """Package the recorded inputs with the settings needed to replay them."""
+        inputs = np.frombuffer(self._inputs, dtype=np.int16).reshape(-1, 2).copy()
+        return Replay(seed, physics_hz, width, height, endless, inputs)
@@ -0,0 +1,240 @@
+# Parallel rollouts across a process pool sharing one baked track.
+#
+# The parent packs the track into the binary track format once and copies
+# it into a shared memory block. Each worker attaches to the block and
+# builds a Track whose arrays are views into it, so the track is neither
+# pickled per task nor regenerated per process. Tasks are sent in batches;
+# each batch runs as one vectorised environment in a worker and its results
+# come back as soon as it finishes.
+import os
+import sys
+import itertools
+import multiprocessing
+from multiprocessing import shared_memory
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.core.car_batch import DEFAULT_TUNING
+from src.core.env import VectorRacingEnv
+from src.core.track import Track
+from src.core.track_format import pack_track, read_track_buffer
+
+# Maps a (n, observation_size) observation array to (n, 2) actions. It must
+# be picklable, e.g. a module-level function, to reach the workers.
+Policy = Callable[[np.ndarray], np.ndarray]
+
+
+def full_throttle(observations: np.ndarray) -> np.ndarray:
+    """Policy that drives straight ahead on full throttle."""
+    actions = np.zeros((len(observations), 2))
+    actions[:, 0] = 1.0
+    return actions
+
+
+class RolloutTask(NamedTuple):
+    """One episode to simulate.
+
+    Attributes:
+        task_id: Caller's identifier, copied to the result.
+        tuning: Car tuning overrides, any key of ``DEFAULT_TUNING``; None
+            runs the defaults.
+        start_distance: Arc-length distance the car starts at.
+        lane: Lane the car starts in.
+    """
+    task_id: int
+    tuning: Optional[Dict[str, float]] = None
+    start_distance: float = 0.0
+    lane: int = 2
+
+
+class RolloutResult(NamedTuple):
+    """Outcome of one episode.
+
+    Attributes:
+        task_id: Identifier of the task that produced the result.
+        steps: Physics steps until the episode ended.
+        distance: Distance travelled along the track.
+        total_reward: Sum of the environment rewards.
+        collided: Whether the episode ended on an obstacle.
+    """
+    task_id: int
+    steps: int
+    distance: float
+    total_reward: float
+    collided: bool
+
+
+def sweep_tasks(grid: Dict[str, Sequence[float]], start_distances: Sequence[float] = (0.0,),
+                lanes: Sequence[int] = (2,)) -> List[RolloutTask]:
+    """Build one task per combination of tuning values and start positions.
+
+    Args:
+        grid: Values to try for each tuning parameter, e.g.
+            ``{'acceleration': [0.05, 0.1], 'braking': [0.1, 0.2]}``.
+        start_distances: Start distances to run every combination from.
+        lanes: Start lanes to run every combination from.
+
+    Returns:
+        Tasks numbered from 0.
+    """
+    unknown = set(grid) - set(DEFAULT_TUNING)
+    if unknown:
+        raise ValueError(f"Unknown tuning parameters: {sorted(unknown)}")
+    names = list(grid)
+    combinations = itertools.product(itertools.product(*grid.values()), start_distances, lanes)
+    return [RolloutTask(i, dict(zip(names, values)), float(distance), int(lane))
+            for i, (values, distance, lane) in enumerate(combinations)]
+
+
+def run_rollouts(track: Track, tasks: Sequence[RolloutTask], policy: Policy = full_throttle,
+                 max_steps: int = 3600, **env_kwargs) -> List[RolloutResult]:
+    """Simulate tasks together as one vectorised environment.
+
+    Every car runs until it hits an obstacle or reaches ``max_steps``.
+    Results do not depend on how tasks are grouped, so a task gives the
+    same result in a pool as in-process.
+
+    Args:
+        track: Track to drive on.
+        tasks: Episodes to simulate.
+        policy: Maps observations to actions.
+        max_steps: Steps before an episode is cut off.
+        **env_kwargs: Further options for ``VectorRacingEnv``.
+
+    Returns:
+        One result per task, in task order.
+    """
+    count = len(tasks)
+    if not count:
+        return []
+    overrides = [task.tuning or {} for task in tasks]
+    tuning = {name: np.array([task.get(name, default) for task in overrides], dtype=np.float64)
+              for name, default in DEFAULT_TUNING.items()}
+    env = VectorRacingEnv(count, track=track, max_steps=max_steps, autoreset=False,
+                          **env_kwargs, **tuning)
+    start = np.array([task.start_distance for task in tasks], dtype=np.float64)
+    observations, _ = env.reset(options={'distance': start,
+                                         'lane': np.array([task.lane for task in tasks])})
+
+    done = np.zeros(count, dtype=bool)
+    collided = np.zeros(count, dtype=bool)
+    steps = np.zeros(count, dtype=np.int64)
+    total_reward = np.zeros(count, dtype=np.float64)
+    end = start.copy()
+    while not done.all():
+        observations, rewards, terminated, truncated, _ = env.step(policy(observations))
+        active = ~done
+        steps[active] += 1
+        total_reward[active] += rewards[active]
+        finished = active & (terminated | truncated)
+        collided |= finished & terminated
+        end[finished] = env.cars.distance_along_track[finished]
+        done |= finished
+
+    return [RolloutResult(task.task_id, int(steps[i]), float(end[i] - start[i]),
+                          float(total_reward[i]), bool(collided[i]))
+            for i, task in enumerate(tasks)]
+
+
+# Per-worker state set up by _init_worker
+_worker: Dict = {}
+
+
+def _init_worker(shm_name: str, size: int, policy: Policy, max_steps: int, env_kwargs: Dict):
+    # Keep the block referenced for the life of the worker; the track's
+    # arrays are views into it
+    block = shared_memory.SharedMemory(name=shm_name)
+    _worker['block'] = block
+    _worker['track'] = Track.from_data(read_track_buffer(block.buf[:size]))
+    _worker['policy'] = policy
+    _worker['max_steps'] = max_steps
+    _worker['env_kwargs'] = env_kwargs
+
+
+def _run_batch(tasks: List[RolloutTask]) -> List[RolloutResult]:
+    return run_rollouts(_worker['track'], tasks, _worker['policy'], _worker['max_steps'],
+                        **_worker['env_kwargs'])
+
+
+class RolloutRunner:
+    """Runs rollouts on a process pool whose workers share one track.
+
+    Use as a context manager so the pool and the shared memory block are
+    released::
+
+        with RolloutRunner(track, processes=32) as runner:
+            for batch in runner.run(sweep_tasks({'acceleration': [0.05, 0.1, 0.2]})):
+                ...
+    """
+
+    def __init__(self, track: Track, processes: Optional[int] = None, batch_size: int = 256,
+                 policy: Policy = full_throttle, max_steps: int = 3600,
+                 start_method: Optional[str] = None, **env_kwargs):
+        """Start the pool.
+
+        Args:
+            track: Track to run every task on. It is packed into shared
+                memory once, so later changes to it are not seen.
+            processes: Number of worker processes; defaults to the CPU count.
+            batch_size: Tasks per batch. Each batch is simulated as one
+                vectorised environment and streamed back as one list.
+            policy: Picklable policy used for every task.
+            max_steps: Steps before an episode is cut off.
+            start_method: Multiprocessing start method, e.g. 'spawn';
+                defaults to the platform's.
+            **env_kwargs: Further options for ``VectorRacingEnv``.
+        """
+        self.batch_size = batch_size
+        self.processes = processes or os.cpu_count() or 1
+
+        self._pool = None
+        data = pack_track(track)
+        self._block = shared_memory.SharedMemory(create=True, size=len(data))
+        self._block.buf[:len(data)] = data
+        try:
+            context = multiprocessing.get_context(start_method)
+            self._pool = context.Pool(self.processes, initializer=_init_worker,
+                                      initargs=(self._block.name, len(data), policy,
+                                                max_steps, env_kwargs))
+        except BaseException:
+            self._release_block()
+            raise
+
+    def run(self, tasks: Iterable[RolloutTask]) -> Iterator[List[RolloutResult]]:
+        """Run tasks and yield each batch of results as soon as it is done.
+
+        Batches arrive in completion order, not task order.
+        """
+        tasks = iter(tasks)
+        batches = iter(lambda: list(itertools.islice(tasks, self.batch_size)), [])
+        yield from self._pool.imap_unordered(_run_batch, batches)
+
+    def run_all(self, tasks: Iterable[RolloutTask]) -> List[RolloutResult]:
+        """Run tasks and return every result, sorted by task id."""
+        results = [result for batch in self.run(tasks) for result in batch]
+        results.sort(key=lambda result: result.task_id)
+        return results
+
+    def _release_block(self):
+        if self._block is not None:
+            self._block.close()
+            self._block.unlink()
+            self._block = None
+
+    def close(self):
+        """Stop the workers and free the shared track."""
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+        self._release_block()
+
+    def __enter__(self) -> 'RolloutRunner':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
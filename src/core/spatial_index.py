@@ -0,0 +1,82 @@
+# Spatial index for fast obstacle queries along the track.
+from typing import Sequence
+
+import numpy as np
+import pygame
+
+
+class ObstacleIndex:
+    """Axis-aligned boxes sorted by left edge for range queries along x.
+
+    The track scrolls horizontally, so every query is an x interval. Boxes
+    are kept sorted by their left edge. A query does two binary searches
+    and then filters only the boxes that can reach into the interval.
+    That costs O(log n + k) for k results.
+
+    Attributes:
+        boxes: (n, 4) array of x, y, width, height in the original order.
+    """
+
+    def __init__(self, boxes: np.ndarray):
+        """Build the index.
+
+        Args:
+            boxes: Array-like of shape (n, 4) holding x, y, width and height.
+        """
+        self.boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        self._order = np.argsort(self.boxes[:, 0], kind='stable')
+        self._lefts = np.ascontiguousarray(self.boxes[self._order, 0])
+        self._rights = self._lefts + self.boxes[self._order, 2]
+        self._max_width = float(self.boxes[:, 2].max()) if len(self.boxes) else 0.0
+
+    @classmethod
+    def from_rects(cls, rects: Sequence[pygame.Rect]) -> 'ObstacleIndex':
+        """Build the index from pygame rectangles."""
+        return cls(np.array([(r.x, r.y, r.width, r.height) for r in rects],
+                            dtype=np.float64).reshape(-1, 4))
+
+    def __len__(self) -> int:
+        return len(self.boxes)
+
+    def query_range(self, x_min: float, x_max: float) -> np.ndarray:
+        """Find boxes that overlap the interval [x_min, x_max).
+
+        Args:
+            x_min: Left end of the interval.
+            x_max: Right end of the interval.
+
+        Returns:
+            Indices into ``boxes`` (and the obstacle list it was built
+            from), ordered by left edge.
+        """
+        # Any box overlapping the interval starts after x_min - max_width
+        lo = int(np.searchsorted(self._lefts, x_min - self._max_width, side='right'))
+        hi = int(np.searchsorted(self._lefts, x_max, side='left'))
+        if hi <= lo:
+            return self._order[:0]
+        overlapping = self._rights[lo:hi] > x_min
+        return self._order[lo:hi][overlapping]
+
+    def query_visible(self, camera_x: float, width: float) -> np.ndarray:
+        """Find boxes inside a viewport that starts at camera_x.
+
+        Args:
+            camera_x: World x of the left edge of the viewport.
+            width: Viewport width in pixels.
+
+        Returns:
+            Indices of the visible boxes.
+        """
+        return self.query_range(camera_x, camera_x + width)
+
+    def query_near(self, x: float, radius: float) -> np.ndarray:
+        """Find boxes within ``radius`` of x along the track.
+
+        Args:
+            x: World x position.
+            radius: Search radius in pixels.
+
+        Returns:
+            Indices of the nearby boxes.
+        """
+        return self.query_range(x - radius, x + radius)
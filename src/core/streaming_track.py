@@ -0,0 +1,369 @@
+# Endless track generated in chunks ahead of the car.
+import os
+import sys
+import math
+import bisect
+import numpy as np
+import pygame
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.utils.constants import *
+from src.core.spatial_index import ObstacleIndex
+from src.core.track import STEERING_SAMPLE_SPACING, BiomeType, Track
+from src.core.track_format import TrackFormatError
+
+# Stream keys mixed into each chunk's seed
+_CHUNK_STREAM = 0
+_BOUNDARY_STREAM = 1
+
+
+class EndlessTrackError(TrackFormatError):
+    """Raised when an endless track is asked for something that needs its end."""
+
+
+class TrackChunk(NamedTuple):
+    """One generated stretch of an endless track.
+
+    Chunk ``index`` covers world x from ``index * chunk_length`` to
+    ``(index + 1) * chunk_length``. ``arc_lengths`` are global distances
+    along the whole track.
+    """
+    index: int
+    xs: np.ndarray
+    ys: np.ndarray
+    arc_lengths: np.ndarray
+    obstacles: np.ndarray  # (n, 4) int32 x, y, width, height, sorted by x
+    biome: BiomeType
+
+    @property
+    def nbytes(self) -> int:
+        return self.xs.nbytes + self.ys.nbytes + self.arc_lengths.nbytes + self.obstacles.nbytes
+
+
+class StreamingTrack(Track):
+    """Track without an end, generated chunk by chunk from a seed.
+
+    Every chunk is derived from ``(seed, chunk index)`` alone, so any chunk
+    can be evicted and later regenerated identically. The resident chunks
+    always form one contiguous run. They are exposed through the usual
+    ``Track`` attributes (``path_xs``, ``obstacles``, ``biome_boundaries``
+    and so on), so lookups, rendering and collisions work unchanged across
+    chunk boundaries.
+
+    ``prefetch`` generates at most one chunk per call, which keeps the
+    per-frame cost bounded. Lookups outside the resident chunks generate
+    what they need immediately. When chunks join or leave the resident run
+    only their share of those attributes is added or sliced off.
+
+    ``track_length`` and ``path_length`` are infinite, so distances never
+    wrap and no laps are counted.
+    """
+
+    def __init__(self, screen_width: int, screen_height: int, num_lanes: int = 4,
+                 seed: Optional[int] = None, chunk_length: Optional[int] = None,
+                 points_per_chunk: int = 200, prefetch_distance: Optional[float] = None,
+                 memory_cap: int = 256 * 1024):
+        """Create the track and generate its first chunk.
+
+        Args:
+            screen_width: Screen width in pixels.
+            screen_height: Screen height in pixels.
+            num_lanes: Number of lanes on the road.
+            seed: Seed for generation; a random seed is picked when None.
+            chunk_length: Width of each chunk in pixels, two screens by default.
+            points_per_chunk: Path segments per chunk.
+            prefetch_distance: How far ahead of the car ``prefetch`` keeps
+                chunks generated, two screens by default.
+            memory_cap: Bytes of chunk data to keep before evicting the
+                chunks furthest from the car. The chunks currently in use
+                are never evicted, so the cap can be exceeded briefly.
+        """
+        self._init_state(screen_width, screen_height, num_lanes, seed)
+        self.cache_path = None
+        self.track_length = math.inf
+
+        self.chunk_length = chunk_length or screen_width * 2
+        self.points_per_chunk = points_per_chunk
+        self.prefetch_distance = prefetch_distance if prefetch_distance is not None else screen_width * 2
+        self.memory_cap = memory_cap
+
+        # Global arc length at the start of every chunk, plus the end of the
+        # furthest chunk generated so far. One float per chunk, so this grows
+        # by kilobytes per hour of driving.
+        self._chunk_arc_starts: List[float] = [0.0]
+
+        # Resident chunks, always the contiguous run first_chunk..last_chunk
+        self._chunks: Dict[int, TrackChunk] = {}
+        self.first_chunk = 0
+        self.last_chunk = -1
+        self._measured: Optional[TrackChunk] = None
+        self.chunks_generated = 0
+        self.chunks_evicted = 0
+
+        # Chunks currently exposed through the Track attributes, with each
+        # one's obstacle and steering sample counts for slicing them off
+        self._window = (0, -1)
+        self._window_counts: Dict[int, Tuple[int, int]] = {}
+        self._window_boxes = np.zeros((0, 4), dtype=np.int32)
+
+        self._ensure_chunks(0, 0)
+
+    def _boundary_y(self, index: int) -> float:
+        """Path y where chunk ``index`` starts; shared with the previous chunk."""
+        center = self.screen_height * 0.5
+        if index == 0:
+            return center
+        rng = np.random.default_rng([self.seed, _BOUNDARY_STREAM, index])
+        return center + rng.uniform(-1.0, 1.0) * (center - self.lane_width * 3)
+
+    def _generate_chunk(self, index: int) -> TrackChunk:
+        """Generate one chunk; its arc start must already be measured."""
+        rng = np.random.default_rng([self.seed, _CHUNK_STREAM, index])
+        n = self.points_per_chunk
+        t = np.arange(n + 1) / n
+        xs = (index + t) * self.chunk_length
+
+        # Blend between the boundary heights, plus whole half-waves of
+        # curvature that vanish at both ends so chunks join smoothly
+        y0, y1 = self._boundary_y(index), self._boundary_y(index + 1)
+        ease = t * t * (3 - 2 * t)
+        ys = y0 + (y1 - y0) * ease
+        if rng.random() >= 0.2:  # Otherwise a straight section
+            ys += np.sin(t * math.pi * rng.integers(1, 5)) * rng.uniform(30, 150)
+
+        # Ensure the path stays within screen bounds with padding
+        padding = self.lane_width * 2
+        ys = np.maximum(padding, np.minimum(ys, self.screen_height - padding))
+
+        arc_lengths = np.zeros(n + 1, dtype=np.float64)
+        np.cumsum(np.hypot(np.diff(xs), np.diff(ys)), out=arc_lengths[1:])
+        arc_lengths += self._chunk_arc_starts[index]
+
+        # A few obstacles per chunk, placed in lanes like the static track
+        count = int(rng.integers(1, 5, endpoint=True))
+        lanes = rng.integers(0, self.num_lanes, size=count)
+        obstacles = np.empty((count, 4), dtype=np.int32)
+        obstacles[:, 0] = index * self.chunk_length + rng.integers(0, self.chunk_length, size=count)
+        obstacles[:, 1] = (self.start_y + lanes * self.lane_width +
+                           rng.integers(10, self.lane_width - 30, size=count, endpoint=True))
+        obstacles[:, 2:] = 30
+        # Sorted, so the window's obstacles are in x order chunk after chunk
+        obstacles = obstacles[np.argsort(obstacles[:, 0], kind='stable')]
+
+        biomes = list(BiomeType)
+        biome = biomes[int(rng.integers(0, len(biomes)))]
+        self.chunks_generated += 1
+        if index == len(self._chunk_arc_starts) - 1:
+            self._chunk_arc_starts.append(float(arc_lengths[-1]))
+        return TrackChunk(index, xs, ys, arc_lengths, obstacles, biome)
+
+    def _take_chunk(self, index: int) -> TrackChunk:
+        """Get a chunk, reusing the one generated last while measuring."""
+        if self._measured is not None and self._measured.index == index:
+            chunk, self._measured = self._measured, None
+            return chunk
+        return self._generate_chunk(index)
+
+    def _measure_through(self, index: int):
+        """Make sure the arc start of every chunk up to ``index`` is known."""
+        while len(self._chunk_arc_starts) <= index:
+            # Arc starts chain from chunk to chunk, so measuring generates.
+            # The newest chunk is kept since it is usually needed next.
+            self._measured = self._generate_chunk(len(self._chunk_arc_starts) - 1)
+
+    def _ensure_chunks(self, first: int, last: int):
+        """Make chunks first..last resident, evicting others over the memory cap."""
+        first = max(0, first)
+        if first >= self.first_chunk and last <= self.last_chunk:
+            return
+        self._measure_through(last)
+
+        if last < self.first_chunk - 1 or first > self.last_chunk + 1:
+            # Not touching the resident run; start a new run
+            self._chunks.clear()
+            self.first_chunk, self.last_chunk = first, last
+        else:
+            self.first_chunk = min(self.first_chunk, first)
+            self.last_chunk = max(self.last_chunk, last)
+        for k in range(self.first_chunk, self.last_chunk + 1):
+            if k not in self._chunks:
+                self._chunks[k] = self._take_chunk(k)
+
+        # Evict from whichever end of the run is further from the chunks in use
+        resident = sum(chunk.nbytes for chunk in self._chunks.values())
+        while resident > self.memory_cap:
+            if first - self.first_chunk >= self.last_chunk - last:
+                if self.first_chunk >= first:
+                    break
+                victim = self.first_chunk
+                self.first_chunk += 1
+            else:
+                victim = self.last_chunk
+                self.last_chunk -= 1
+            resident -= self._chunks.pop(victim).nbytes
+            self.chunks_evicted += 1
+
+        self._update_window()
+
+    def _chunk_steering(self, chunk: TrackChunk) -> Tuple[np.ndarray, np.ndarray]:
+        """Heading and curvature samples for one chunk.
+
+        Samples sit on a grid of STEERING_SAMPLE_SPACING from distance 0,
+        so the samples of neighbouring chunks join into one uniform table.
+        Chunks advance in x, so headings stay within 90 degrees of zero and
+        need no unwrapping.
+        """
+        spacing = STEERING_SAMPLE_SPACING
+        arc = chunk.arc_lengths
+        samples = np.arange(math.ceil(arc[0] / spacing), math.ceil(arc[-1] / spacing)) * spacing
+        dx = np.interp(samples + spacing, arc, chunk.xs) - np.interp(samples - spacing, arc, chunk.xs)
+        dy = np.interp(samples + spacing, arc, chunk.ys) - np.interp(samples - spacing, arc, chunk.ys)
+        headings = np.arctan2(dy, dx)
+        return np.degrees(headings), np.gradient(headings, spacing)
+
+    def _update_window(self):
+        """Expose the resident chunks through the regular Track attributes.
+
+        Chunks still exposed from the last update are sliced out of the
+        current arrays; only chunks that joined the run are converted.
+        """
+        first, last = self.first_chunk, self.last_chunk
+        old_first, old_last = self._window
+        keep_first, keep_last = max(first, old_first), min(last, old_last)
+        counts = self._window_counts
+        if keep_first <= keep_last:
+            # Where the kept chunks sit in the current arrays. Each chunk
+            # holds its points but the last, which is the next chunk's first.
+            n = self.points_per_chunk
+            bounds = np.cumsum([(0, 0)] + [counts[k] for k in range(old_first, keep_last + 1)], axis=0)
+            skip, stop = bounds[keep_first - old_first], bounds[-1]
+            points = slice((keep_first - old_first) * n, (keep_last + 1 - old_first) * n)
+            obstacles = slice(int(skip[0]), int(stop[0]))
+            samples = slice(int(skip[1]), int(stop[1]))
+        else:
+            keep_first, keep_last = first, first - 1  # Nothing carried over
+            points = obstacles = samples = slice(0, 0)
+
+        _, headings, curvatures = self._steering_table or (0.0, np.zeros(0), np.zeros(0))
+        kept = (self.path_xs[points], self.path_ys[points], self.arc_lengths[points],
+                self._window_boxes[obstacles], headings[samples], curvatures[samples])
+        before = [self._window_part(k) for k in range(first, keep_first)]
+        after = [self._window_part(k) for k in range(keep_last + 1, last + 1)]
+        parts = before + [kept] + after
+
+        def join(column: int, *tail: np.ndarray) -> np.ndarray:
+            return np.concatenate([part[column] for part in parts] + list(tail))
+
+        # The last chunk's end point closes the path
+        end = self._chunks[last]
+        self._set_path(join(0, end.xs[-1:]), join(1, end.ys[-1:]), join(2, end.arc_lengths[-1:]))
+        self.path_length = math.inf
+        start = math.ceil(self._chunks[first].arc_lengths[0] / STEERING_SAMPLE_SPACING)
+        self._steering_table = (start * STEERING_SAMPLE_SPACING, join(4), join(5))
+
+        def rects(added: List[Tuple[np.ndarray, ...]]) -> List[pygame.Rect]:
+            return [pygame.Rect(*box) for part in added for box in part[3].tolist()]
+
+        self.obstacles = rects(before) + self.obstacles[obstacles] + rects(after)
+        # Boxes stay in x order, so building the index sorts nothing
+        self._window_boxes = join(3)
+        self.obstacle_index = ObstacleIndex(self._window_boxes)
+
+        for k in range(old_first, old_last + 1):
+            if not first <= k <= last:
+                del counts[k]
+        for k, part in zip(list(range(first, keep_first)) + list(range(keep_last + 1, last + 1)),
+                           before + after):
+            counts[k] = (len(part[3]), len(part[4]))
+        self._window = (first, last)
+
+        self.biome_boundaries = [(k * self.chunk_length, self._chunks[k].biome)
+                                 for k in range(first, last + 1)]
+        self.rebuild_biome_table()
+
+    def _window_part(self, index: int) -> Tuple[np.ndarray, ...]:
+        """Arrays one chunk adds to the window: path without its last point,
+        obstacles and steering samples."""
+        chunk = self._chunks[index]
+        headings, curvatures = self._chunk_steering(chunk)
+        return (chunk.xs[:-1], chunk.ys[:-1], chunk.arc_lengths[:-1], chunk.obstacles,
+                headings, curvatures)
+
+    def _chunk_at_distance(self, distance: float) -> int:
+        """Index of the chunk containing an arc-length distance."""
+        while self._chunk_arc_starts[-1] <= distance:
+            self._measure_through(len(self._chunk_arc_starts))
+        return max(0, bisect.bisect_right(self._chunk_arc_starts, distance) - 1)
+
+    def _chunk_at_x(self, x: float) -> int:
+        """Index of the chunk containing a world x position."""
+        return max(0, int(x // self.chunk_length))
+
+    @property
+    def resident_bytes(self) -> int:
+        """Bytes of chunk data currently held."""
+        return sum(chunk.nbytes for chunk in self._chunks.values())
+
+    def prefetch(self, distance: float):
+        """Generate ahead of and evict behind a car at ``distance``.
+
+        Call once per update. At most one chunk ahead is generated per
+        call, so the cost per frame stays bounded by one chunk.
+        """
+        current = self._chunk_at_distance(distance)
+        self._ensure_chunks(current - 1, current)
+        run_end = self._chunk_arc_starts[self.last_chunk + 1]
+        if run_end < distance + self.prefetch_distance:
+            self._ensure_chunks(current - 1, self.last_chunk + 1)
+
+    def get_path_points(self, distances: np.ndarray) -> np.ndarray:
+        distances = np.asarray(distances, dtype=np.float64)
+        self._ensure_distances(distances)
+        return super().get_path_points(distances)
+
+    def _ensure_distance(self, distance: float):
+        """Make the chunk containing ``distance`` resident."""
+        # Fast path: the distance is inside the resident chunks
+        if not self.arc_lengths[0] <= distance < self.arc_lengths[-1]:
+            chunk = self._chunk_at_distance(distance)
+            self._ensure_chunks(chunk, chunk)
+
+    def _ensure_distances(self, distances: np.ndarray):
+        """Make the chunks spanning an array of distances resident."""
+        if distances.size:
+            self._ensure_chunks(self._chunk_at_distance(float(distances.min())),
+                                self._chunk_at_distance(float(distances.max())))
+
+    def get_path_point(self, distance: float):
+        self._ensure_distance(distance)
+        return super().get_path_point(distance)
+
+    def get_heading(self, distance: float) -> float:
+        self._ensure_distance(distance)
+        return super().get_heading(distance)
+
+    def get_curvature(self, distance: float) -> float:
+        self._ensure_distance(distance)
+        return super().get_curvature(distance)
+
+    def get_headings(self, distances: np.ndarray) -> np.ndarray:
+        distances = np.asarray(distances, dtype=np.float64)
+        self._ensure_distances(distances)
+        return super().get_headings(distances)
+
+    def get_curvatures(self, distances: np.ndarray) -> np.ndarray:
+        distances = np.asarray(distances, dtype=np.float64)
+        self._ensure_distances(distances)
+        return super().get_curvatures(distances)
+
+    def render(self, screen: pygame.Surface, camera_x: float, camera_y: float,
+               focus_x: Optional[float] = None) -> List[pygame.Rect]:
+        self._ensure_chunks(self._chunk_at_x(camera_x),
+                            self._chunk_at_x(camera_x + self.screen_width))
+        return super().render(screen, camera_x, camera_y, focus_x)
+
+    def save(self, path: str):
+        raise EndlessTrackError("Streaming tracks have no end and cannot be saved")
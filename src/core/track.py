@@ -4,13 +4,30 @@ import sys
 import math
 import pygame
 import random
+import bisect
+import zipfile
+import numpy as np
 from enum import Enum
-from typing import List, Tuple, Optional
+from typing import Callable, Dict, List, Tuple, Optional
 
 # Add the src directory to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
 from src.utils.constants import *
+from src.core.collision import SegmentGrid
+from src.core.spatial_index import ObstacleIndex
+from src.core.track_format import TrackData, read_track_file, write_track_file
+from src.utils.text_cache import get_text_cache
+
+# Dashed lane markings repeat every LANE_MARKING_SPACING pixels
+LANE_MARKING_SPACING = 60
+LANE_MARKING_LENGTH = 30
+
+# Arc-length spacing of the precomputed heading and curvature samples
+STEERING_SAMPLE_SPACING = 8.0
+
+# Bump when generation changes so stale baked tracks are not loaded
+TRACK_CACHE_VERSION = 1
 
 class BiomeType(Enum):
     FOREST = "forest"
@@ -19,6 +36,9 @@ class BiomeType(Enum):
     MOUNTAIN = "mountain"
     RAINFOREST = "rainforest"
 
+# Called with (previous_biome, new_biome); previous_biome is None on the first lookup
+BiomeListener = Callable[[Optional[BiomeType], BiomeType], None]
+
 class LaneMarking:
     def __init__(self, x: int, y: int, width: int = 2, height: int = 30):
         self.rect = pygame.Rect(x, y, width, height)
@@ -27,7 +47,35 @@ class LaneMarking:
 class Track:
     """Represents the racing track in the side-scrolling game."""
     
-    def __init__(self, screen_width: int, screen_height: int, num_lanes: int = 4):
+    def __init__(self, screen_width: int, screen_height: int, num_lanes: int = 4,
+                 seed: Optional[int] = None, cache_dir: Optional[str] = TRACK_CACHE_DIR):
+        """Generate the track, or load it from the baked-track cache.
+        
+        Args:
+            screen_width: Screen width in pixels.
+            screen_height: Screen height in pixels.
+            num_lanes: Number of lanes on the road.
+            seed: Seed for generation. The same seed and parameters always
+                give the same track. A random seed is picked when None.
+            cache_dir: Directory for baked tracks, or None to disable the
+                cache. Only tracks with an explicit seed are cached.
+        """
+        self._init_state(screen_width, screen_height, num_lanes, seed)
+        
+        # Initialize track elements, loading baked arrays when available
+        self.cache_path = (self.get_cache_path(cache_dir)
+                           if seed is not None and cache_dir is not None else None)
+        if self.cache_path is None or not self._load_baked(self.cache_path):
+            self._generate_track_elements()
+            self._generate_path()
+            if self.cache_path is not None:
+                self._save_baked(self.cache_path)
+        self.rebuild_obstacle_index()
+        self.rebuild_biome_table()
+    
+    def _init_state(self, screen_width: int, screen_height: int, num_lanes: int,
+                    seed: Optional[int]):
+        """Set up parameters and empty track elements."""
         # Initialize track parameters
         self.screen_width = screen_width
         self.screen_height = screen_height
@@ -36,21 +84,53 @@ class Track:
         self.road_color = (50, 50, 50)  # Dark gray road
         self.shoulder_color = (100, 100, 100)  # Lighter gray for shoulders
         
+        # All randomness comes from one seeded generator
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        self._rng = np.random.default_rng(self.seed)
+        
         # Track elements
         self.lane_markings: List[LaneMarking] = []
         self.obstacles: List[pygame.Rect] = []
         self.biome_boundaries: List[Tuple[int, BiomeType]] = []
         
-        # Track path points (for car following)
-        self.path_points: List[Tuple[float, float]] = []
+        # Track path (for car following)
         self.track_length = 0
+        self._path_points: Optional[List[Tuple[float, float]]] = None
         
-        # Initialize track elements
-        self._generate_track_elements()
-        self._generate_path()
+        # Arc-length table over the path (contiguous arrays for lookups)
+        self.path_xs = np.zeros(0, dtype=np.float64)
+        self.path_ys = np.zeros(0, dtype=np.float64)
+        self.arc_lengths = np.zeros(0, dtype=np.float64)
+        self.path_length = 0.0
+        
+        # Sorted biome table for bisect lookups, and the span last looked up
+        self.biome_starts: List[float] = []
+        self.biome_types: List[BiomeType] = []
+        self._biome_span: Tuple[float, float, Optional[BiomeType]] = (0.0, 0.0, None)
+        self._current_biome: Optional[BiomeType] = None
+        self._biome_listeners: List[BiomeListener] = []
+        
+        # Heading and curvature sampled uniformly along the path, built on first use
+        self._steering_table: Optional[Tuple[float, np.ndarray, np.ndarray]] = None
+        
+        # Road-edge collision segments, built on first collision query
+        self._road_edges: Optional[SegmentGrid] = None
+        
+        # Pre-rendered background, road and lane markings per biome, and
+        # copies scaled for rendering at a reduced resolution
+        self._background_layers: Dict[BiomeType, pygame.Surface] = {}
+        self._scaled_layers: Dict[Tuple[BiomeType, Tuple[int, int]], pygame.Surface] = {}
+        # Camera, biome and screen size of the last render, for dirty tracking
+        self._last_render_state: Optional[tuple] = None
+        
+        # Most obstacles drawn per frame, nearest ahead of the car first;
+        # None draws them all. Collisions always use every obstacle.
+        self.max_visible_obstacles: Optional[int] = None
+        
+        self._generate_lane_markings()
     
-    def _generate_track_elements(self):
-        """Generate lane markings and obstacles for the track."""
+    def _generate_lane_markings(self):
+        """Generate the lane markings; these do not depend on the seed."""
         # Calculate lane positions (vertical lanes for left-to-right movement)
         self.start_y = (self.screen_height - (self.num_lanes * self.lane_width)) // 2
         
@@ -60,7 +140,9 @@ class Track:
             # Create dashed lane markers (3 screens worth of markers)
             for x in range(-100, self.track_length + 100, 60):
                 self.lane_markings.append(LaneMarking(x, y, 30, 2))
-        
+    
+    def _generate_track_elements(self):
+        """Generate biome boundaries and obstacles for the track."""
         # Define biome boundaries (in pixels from start)
         biome_length = 2000  # pixels per biome
         self.biome_boundaries = [
@@ -73,17 +155,15 @@ class Track:
         self.track_length = biome_length * 5  # Total track length for all biomes
         
         # Generate random obstacles (for demonstration)
-        for _ in range(20):
-            lane = random.randint(0, self.num_lanes - 1)
-            y = self.start_y + (lane * self.lane_width) + random.randint(10, self.lane_width - 30)
-            x = random.randint(0, self.track_length)
-            self.obstacles.append(pygame.Rect(x, y, 30, 30))
+        num_obstacles = 20
+        lanes = self._rng.integers(0, self.num_lanes, size=num_obstacles)
+        ys = (self.start_y + lanes * self.lane_width +
+              self._rng.integers(10, self.lane_width - 30, size=num_obstacles, endpoint=True))
+        xs = self._rng.integers(0, self.track_length, size=num_obstacles, endpoint=True)
+        self.obstacles = [pygame.Rect(x, y, 30, 30) for x, y in zip(xs.tolist(), ys.tolist())]
     
     def _generate_path(self):
         """Generate a smooth horizontal path for the car to follow."""
-        # Clear existing path points
-        self.path_points = []
-        
         # Generate points along the track (10x screen width for a long track)
         num_points = 1000
         self.track_length = self.screen_width * 10  # 10 screens long
@@ -99,76 +179,413 @@ class Track:
             (0.9, 1.0, 0, 0, True)         # Final straight
         ]
         
-        for i in range(num_points + 1):
-            # Calculate x position (0 to track_length)
-            x = (i / num_points) * self.track_length
-            t = i / num_points
-            
-            # Default y position (center of screen)
-            y = self.screen_height * 0.5
-            
-            # Find which section this point is in
-            for start_t, end_t, amplitude, frequency, is_straight in sections:
-                if start_t <= t < end_t and not is_straight:
-                    # Calculate position within this section (0 to 1)
-                    section_t = (t - start_t) / (end_t - start_t)
-                    # Create smooth curve within this section
-                    y_offset = math.sin(section_t * frequency * math.pi * 2) * amplitude
-                    y = self.screen_height * 0.5 + y_offset
-                    break
-            
-            # Ensure the path stays within screen bounds with padding
-            padding = self.lane_width * 2
-            y = max(padding, min(y, self.screen_height - padding))
-            
-            # Add some small random variation for more natural look
-            if not any(start_t <= t < end_t and is_straight for start_t, end_t, _, _, is_straight in sections):
-                y += (random.random() - 0.5) * 5
-            
-            self.path_points.append((x, y))
-            
-            # Add biome boundaries at regular intervals
-            if i % 100 == 0 and i > 0:
-                biome = random.choice(list(BiomeType))
-                self.biome_boundaries.append((x, biome))
+        # Calculate x positions (0 to track_length) for all points at once
+        t = np.arange(num_points + 1) / num_points
+        xs = t * self.track_length
+        
+        # Default y position (center of screen)
+        ys = np.full(num_points + 1, self.screen_height * 0.5)
+        straight = np.zeros(num_points + 1, dtype=bool)
+        
+        # Shape each section; sections do not overlap
+        for start_t, end_t, amplitude, frequency, is_straight in sections:
+            in_section = (t >= start_t) & (t < end_t)
+            if is_straight:
+                straight |= in_section
+                continue
+            # Create smooth curve within this section (0 to 1 across it)
+            section_t = (t[in_section] - start_t) / (end_t - start_t)
+            ys[in_section] += np.sin(section_t * frequency * math.pi * 2) * amplitude
+        
+        # Ensure the path stays within screen bounds with padding
+        padding = self.lane_width * 2
+        ys = np.maximum(padding, np.minimum(ys, self.screen_height - padding))
+        
+        # Add some small random variation for more natural look
+        noise = (self._rng.random(num_points + 1) - 0.5) * 5
+        ys = np.where(straight, ys, ys + noise)
+        
+        # Add biome boundaries at regular intervals
+        boundary_indices = np.arange(100, num_points + 1, 100)
+        biomes = list(BiomeType)
+        choices = self._rng.integers(0, len(biomes), size=len(boundary_indices))
+        for i, choice in zip(boundary_indices.tolist(), choices.tolist()):
+            self.biome_boundaries.append((float(xs[i]), biomes[choice]))
+        
+        self._set_path(xs, ys)
+    
+    def _set_path(self, xs: np.ndarray, ys: np.ndarray, arc_lengths: Optional[np.ndarray] = None):
+        """Store the path arrays and derive everything that depends on them.
+        
+        Float arrays are kept as they are (float32 memory maps from a track
+        file are not copied). A precomputed arc-length table may be passed
+        in to skip building one.
+        """
+        self.path_xs = np.ascontiguousarray(xs, dtype=xs.dtype if xs.dtype.kind == 'f' else np.float64)
+        self.path_ys = np.ascontiguousarray(ys, dtype=ys.dtype if ys.dtype.kind == 'f' else np.float64)
+        self._path_points = None
+        self._steering_table = None
+        if arc_lengths is None:
+            self._build_arc_length_table()
+        else:
+            self.arc_lengths = arc_lengths
+            self.path_length = float(arc_lengths[-1]) if len(arc_lengths) else 0.0
+            self._road_edges = None
+    
+    @property
+    def path_points(self) -> List[Tuple[float, float]]:
+        """Path as a list of (x, y) tuples, built on first use.
+        
+        Prefer ``path_xs``/``path_ys`` for long tracks; this list costs far
+        more memory than the arrays.
+        """
+        if self._path_points is None:
+            self._path_points = list(zip(self.path_xs.tolist(), self.path_ys.tolist()))
+        return self._path_points
+    
+    @classmethod
+    def from_data(cls, data: TrackData) -> 'Track':
+        """Build a track around arrays read from the binary track format.
+        
+        The path and arc-length arrays are used as they are, so a memory
+        mapped file stays on disk until pages are touched.
+        
+        Args:
+            data: Track data from ``read_track_file`` or ``read_track_buffer``.
+        
+        Returns:
+            The loaded track.
+        """
+        track = cls.__new__(cls)
+        track._init_state(data.screen_width, data.screen_height, data.num_lanes, data.seed)
+        track.cache_path = None
+        
+        track_length = float(data.track_length)
+        track.track_length = int(track_length) if track_length.is_integer() else track_length
+        biomes = list(BiomeType)
+        track.biome_boundaries = [(p, biomes[i]) for p, i in
+                                  zip(data.biomes['position'].tolist(), data.biomes['biome'].tolist())]
+        track.obstacles = [pygame.Rect(*box) for box in data.obstacles.tolist()]
+        track._set_path(data.path_xs, data.path_ys, data.arc_lengths)
+        track.obstacle_index = ObstacleIndex(data.obstacles)
+        track.rebuild_biome_table()
+        return track
+    
+    @classmethod
+    def from_file(cls, path: str) -> 'Track':
+        """Load a track from a binary track file through a memory map.
+        
+        Args:
+            path: File written by ``save``.
+        
+        Returns:
+            The loaded track.
+        
+        Raises:
+            TrackFormatError: If the file is not a valid track file.
+        """
+        return cls.from_data(read_track_file(path))
+    
+    def save(self, path: str):
+        """Write the track to a binary track file.
+        
+        The path is stored as float32, so a reloaded track can differ from
+        this one by float32 rounding.
+        
+        Args:
+            path: Destination file path, conventionally under TRACK_DATA_DIR.
+        
+        Raises:
+            TrackFormatError: If the track cannot be stored in the format,
+                such as an endless track.
+        """
+        write_track_file(path, self)
+    
+    def get_cache_path(self, cache_dir: str) -> str:
+        """Get the baked-track file for this seed and these parameters."""
+        name = (f"track_v{TRACK_CACHE_VERSION}_s{self.seed}_"
+                f"{self.screen_width}x{self.screen_height}_l{self.num_lanes}.npz")
+        return os.path.join(cache_dir, name)
+    
+    def _save_baked(self, path: str):
+        """Write the generated path, obstacles and biomes to the cache."""
+        biomes = list(BiomeType)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temporary file first so readers never see a partial file
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with open(temp_path, 'wb') as f:
+                np.savez(
+                    f,
+                    track_length=np.float64(self.track_length),
+                    path=np.column_stack([self.path_xs, self.path_ys]),
+                    obstacles=np.array([(r.x, r.y, r.width, r.height) for r in self.obstacles],
+                                       dtype=np.int32).reshape(-1, 4),
+                    biome_positions=np.array([p for p, _ in self.biome_boundaries], dtype=np.float64),
+                    biome_types=np.array([biomes.index(b) for _, b in self.biome_boundaries],
+                                         dtype=np.int8),
+                )
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"Warning: could not cache track to {path}: {e}")
+    
+    def _load_baked(self, path: str) -> bool:
+        """Load a baked track from the cache.
+        
+        Returns:
+            True if the track was loaded, False if it must be generated.
+        """
+        if not os.path.exists(path):
+            return False
+        biomes = list(BiomeType)
+        try:
+            with np.load(path) as data:
+                track_length = float(data['track_length'])
+                path_array = data['path']
+                obstacles = data['obstacles']
+                positions = data['biome_positions']
+                types = data['biome_types']
+        except (OSError, KeyError, ValueError, EOFError, zipfile.BadZipFile) as e:
+            print(f"Warning: ignoring unreadable cached track {path}: {e}")
+            return False
+        
+        self.track_length = int(track_length) if track_length.is_integer() else track_length
+        self.obstacles = [pygame.Rect(*box) for box in obstacles.tolist()]
+        self.biome_boundaries = [(p, biomes[i]) for p, i in zip(positions.tolist(), types.tolist())]
+        self._set_path(path_array[:, 0], path_array[:, 1])
+        return True
+    
+    def _build_arc_length_table(self):
+        """Precompute the cumulative arc length at every path point."""
+        # Accumulate in float64 even when the path itself is float32
+        segment_lengths = np.hypot(np.diff(self.path_xs.astype(np.float64, copy=False)),
+                                   np.diff(self.path_ys.astype(np.float64, copy=False)))
+        self.arc_lengths = np.zeros(len(self.path_xs), dtype=np.float64)
+        np.cumsum(segment_lengths, out=self.arc_lengths[1:])
+        self.path_length = float(self.arc_lengths[-1]) if len(self.path_xs) else 0.0
+        self._road_edges = None
+    
+    def get_path_points(self, distances: np.ndarray) -> np.ndarray:
+        """Get the path points at many arc-length distances in one call.
+        
+        Args:
+            distances: Array of distances along the path. Distances wrap
+                around the total path length.
+        
+        Returns:
+            Array of shape ``distances.shape + (2,)`` holding (x, y) points.
+        """
+        distances = np.asarray(distances, dtype=np.float64)
+        if len(self.arc_lengths) < 2:
+            points = np.empty(distances.shape + (2,), dtype=np.float64)
+            points[..., 0] = self.screen_width // 2
+            points[..., 1] = 0
+            return points
+        
+        # Wrap distances around the path length
+        distances = np.mod(distances, self.path_length)
+        
+        # Locate the segment for each distance in the arc-length table
+        segment = np.searchsorted(self.arc_lengths, distances, side='right') - 1
+        segment = np.clip(segment, 0, len(self.arc_lengths) - 2)
+        
+        # Interpolation factor (0 to 1) within each segment
+        start_dist = self.arc_lengths[segment]
+        t = (distances - start_dist) / (self.arc_lengths[segment + 1] - start_dist)
+        
+        # Linear interpolation between the segment end points
+        start_x = self.path_xs[segment]
+        start_y = self.path_ys[segment]
+        points = np.empty(distances.shape + (2,), dtype=np.float64)
+        points[..., 0] = start_x + (self.path_xs[segment + 1] - start_x) * t
+        points[..., 1] = start_y + (self.path_ys[segment + 1] - start_y) * t
+        return points
     
     def get_path_point(self, distance: float) -> Tuple[float, float]:
-        """Get a point along the path at the given distance."""
-        if not self.path_points:
+        """Get a point along the path at the given arc-length distance."""
+        if len(self.arc_lengths) < 2:
             return (self.screen_width // 2, 0)
-            
-        # Wrap distance around track length
-        distance = distance % self.track_length
         
-        # Find the segment where this distance falls
-        segment_length = self.track_length / (len(self.path_points) - 1)
-        segment = int(distance / segment_length)
-        segment = min(segment, len(self.path_points) - 2)  # Ensure we don't go out of bounds
+        # Scalar version of get_path_points; avoids array overhead per call
+        distance = distance % self.path_length
+        segment = int(self.arc_lengths.searchsorted(distance, side='right')) - 1
+        segment = max(0, min(segment, len(self.arc_lengths) - 2))
         
-        # Get the start and end points of the segment
-        start_point = self.path_points[segment]
-        end_point = self.path_points[segment + 1]
+        start_dist = float(self.arc_lengths[segment])
+        t = (distance - start_dist) / (float(self.arc_lengths[segment + 1]) - start_dist)
         
-        # Calculate interpolation factor (0 to 1) within the segment
-        segment_start_dist = segment * segment_length
-        t = (distance - segment_start_dist) / segment_length
+        start_x = float(self.path_xs[segment])
+        start_y = float(self.path_ys[segment])
+        x = start_x + (float(self.path_xs[segment + 1]) - start_x) * t
+        y = start_y + (float(self.path_ys[segment + 1]) - start_y) * t
+        return (x, y)
+    
+    def _build_steering_table(self) -> Tuple[float, np.ndarray, np.ndarray]:
+        """Sample heading and curvature every STEERING_SAMPLE_SPACING along the path.
         
-        # Linear interpolation between points
-        x = start_point[0] + (end_point[0] - start_point[0]) * t
-        y = start_point[1] + (end_point[1] - start_point[1]) * t
+        Returns:
+            The arc length of the first sample, headings in degrees
+            (unwrapped, so neighbouring samples never jump by 360) and
+            signed curvatures in radians per pixel.
+        """
+        start = float(self.arc_lengths[0])
+        count = int((float(self.arc_lengths[-1]) - start) // STEERING_SAMPLE_SPACING) + 1
+        samples = start + np.arange(max(count, 2)) * STEERING_SAMPLE_SPACING
+        xs = np.interp(samples, self.arc_lengths, self.path_xs)
+        ys = np.interp(samples, self.arc_lengths, self.path_ys)
         
-        return (x, y)
+        headings = np.unwrap(np.arctan2(np.gradient(ys), np.gradient(xs)))
+        curvatures = np.gradient(headings, STEERING_SAMPLE_SPACING)
+        return start, np.degrees(headings), curvatures
+    
+    @property
+    def steering_table(self) -> Tuple[float, np.ndarray, np.ndarray]:
+        """Heading and curvature samples, built on first use."""
+        if self._steering_table is None:
+            self._steering_table = self._build_steering_table()
+        return self._steering_table
+    
+    def _sample_steering(self, distance: float, column: int) -> float:
+        """Interpolate one steering table column at a distance."""
+        start, *columns = self.steering_table
+        values = columns[column]
+        
+        # Uniform spacing turns the lookup into an index computation
+        position = (distance % self.path_length - start) / STEERING_SAMPLE_SPACING
+        index = max(0, min(int(position), len(values) - 2))
+        t = max(0.0, min(position - index, 1.0))
+        low = float(values[index])
+        return low + (float(values[index + 1]) - low) * t
+    
+    def _sample_steering_array(self, distances: np.ndarray, column: int) -> np.ndarray:
+        """Vectorised _sample_steering."""
+        start, *columns = self.steering_table
+        values = columns[column]
+        position = (np.mod(distances, self.path_length) - start) / STEERING_SAMPLE_SPACING
+        index = np.clip(np.floor(position), 0, len(values) - 2).astype(np.int64)
+        t = np.clip(position - index, 0.0, 1.0)
+        return values[index] + (values[index + 1] - values[index]) * t
+    
+    def get_heading(self, distance: float) -> float:
+        """Get the path direction at an arc-length distance.
+        
+        Returns:
+            Heading in degrees, measured like atan2 in screen coordinates.
+        """
+        if len(self.arc_lengths) < 2:
+            return 0.0
+        return self._sample_steering(distance, 0)
+    
+    def get_curvature(self, distance: float) -> float:
+        """Get the signed path curvature at an arc-length distance.
+        
+        Returns:
+            Curvature in radians per pixel; positive when the path turns
+            towards +y.
+        """
+        if len(self.arc_lengths) < 2:
+            return 0.0
+        return self._sample_steering(distance, 1)
+    
+    def get_headings(self, distances: np.ndarray) -> np.ndarray:
+        """Vectorised get_heading for an array of distances."""
+        distances = np.asarray(distances, dtype=np.float64)
+        if len(self.arc_lengths) < 2:
+            return np.zeros(distances.shape)
+        return self._sample_steering_array(distances, 0)
+    
+    def get_curvatures(self, distances: np.ndarray) -> np.ndarray:
+        """Vectorised get_curvature for an array of distances."""
+        distances = np.asarray(distances, dtype=np.float64)
+        if len(self.arc_lengths) < 2:
+            return np.zeros(distances.shape)
+        return self._sample_steering_array(distances, 1)
+    
+    def prefetch(self, distance: float):
+        """Prepare the track around a car at ``distance``; call once per update.
+        
+        A static track is fully generated up front, so there is nothing to do.
+        """
+        pass
+    
+    def rebuild_obstacle_index(self):
+        """Rebuild the obstacle spatial index; call after changing obstacles."""
+        self.obstacle_index = ObstacleIndex.from_rects(self.obstacles)
+    
+    def query_visible_obstacles(self, camera_x: float, width: Optional[float] = None) -> np.ndarray:
+        """Get the indices of obstacles inside the viewport.
+        
+        Args:
+            camera_x: World x of the left edge of the viewport.
+            width: Viewport width, defaults to the screen width.
+        
+        Returns:
+            Indices into ``obstacles``.
+        """
+        if width is None:
+            width = self.screen_width
+        return self.obstacle_index.query_visible(camera_x, width)
+    
+    def query_obstacles_near(self, distance: float, radius: float) -> np.ndarray:
+        """Get the indices of obstacles near a distance along the path.
+        
+        Args:
+            distance: Arc-length distance along the path.
+            radius: Search radius in pixels along x.
+        
+        Returns:
+            Indices into ``obstacles``.
+        """
+        x, _ = self.get_path_point(distance)
+        return self.obstacle_index.query_near(x, radius)
+    
+    def rebuild_biome_table(self):
+        """Rebuild the sorted biome table; call after changing biome_boundaries."""
+        # Stable sort: of two boundaries at the same position the later one wins
+        boundaries = sorted(self.biome_boundaries, key=lambda boundary: boundary[0])
+        self.biome_starts = [float(position) for position, _ in boundaries]
+        self.biome_types = [biome for _, biome in boundaries]
+        self._biome_span = (0.0, 0.0, None)
+    
+    def add_biome_listener(self, listener: BiomeListener):
+        """Register a callback that runs once each time the current biome changes.
+        
+        Args:
+            listener: Called with (previous_biome, new_biome). previous_biome
+                is None the first time a biome is looked up.
+        """
+        self._biome_listeners.append(listener)
     
-    def get_current_biome(self, camera_y: float) -> BiomeType:
-        """Get the current biome based on camera position."""
-        distance = camera_y % (len(BiomeType) * 2000)  # Loop through biomes
+    def remove_biome_listener(self, listener: BiomeListener):
+        """Unregister a callback added with add_biome_listener."""
+        self._biome_listeners.remove(listener)
+    
+    def get_current_biome(self, position: float) -> BiomeType:
+        """Get the biome at a horizontal world position, usually camera_x.
+        
+        The span of the last lookup is cached, so repeated lookups inside
+        the same biome cost two comparisons. Biome listeners fire when the
+        result differs from the previous lookup.
+        """
+        # Biomes repeat every track length
+        distance = position % self.track_length if self.track_length else position
         
-        # Find the current biome based on camera position
-        current_biome = BiomeType.GRASSLAND  # Default
-        for boundary, biome in sorted(self.biome_boundaries, key=lambda x: x[0]):
-            if distance >= boundary:
-                current_biome = biome
-        return current_biome
+        start, end, biome = self._biome_span
+        if not start <= distance < end:
+            index = bisect.bisect_right(self.biome_starts, distance) - 1
+            if index < 0:
+                # Before the first boundary
+                start, biome = -math.inf, BiomeType.GRASSLAND
+            else:
+                start, biome = self.biome_starts[index], self.biome_types[index]
+            end = self.biome_starts[index + 1] if index + 1 < len(self.biome_starts) else math.inf
+            self._biome_span = (start, end, biome)
+        
+        if biome is not self._current_biome:
+            previous, self._current_biome = self._current_biome, biome
+            for listener in list(self._biome_listeners):
+                listener(previous, biome)
+        return biome
     
     def get_biome_color(self, biome: BiomeType) -> Tuple[int, int, int]:
         """Get the background color for a biome."""
@@ -180,84 +597,185 @@ class Track:
             BiomeType.RAINFOREST: (0, 100, 0)    # Dark green
         }.get(biome, (50, 150, 50))  # Default to green
     
-    def render(self, screen: pygame.Surface, camera_x: float, camera_y: float):
-        """Render the track with the current camera position."""
-        # Get current biome and set background color
-        current_biome = self.get_current_biome(camera_y)
-        screen.fill(self.get_biome_color(current_biome))
+    def _get_background_layer(self, biome: BiomeType) -> pygame.Surface:
+        """Get the static background, road and lane markings for a biome.
         
-        # Draw the road surface
-        road_width = self.num_lanes * self.lane_width
-        road_left = (self.screen_width - road_width) // 2
+        The layer is one marking period wider than the screen, so scrolling
+        only needs a single blit at an offset of less than one period.
+        """
+        layer = self._background_layers.get(biome)
+        if layer is not None:
+            return layer
+        
+        layer = pygame.Surface((self.screen_width + LANE_MARKING_SPACING, self.screen_height))
+        layer_width = layer.get_width()
+        layer.fill(self.get_biome_color(biome))
         
         # Draw the road (horizontal)
+        road_width = self.num_lanes * self.lane_width
         road_top = (self.screen_height - road_width) // 2
-        pygame.draw.rect(screen, self.road_color, 
-                        (0, road_top, self.screen_width, road_width))
+        pygame.draw.rect(layer, self.road_color, (0, road_top, layer_width, road_width))
         
         # Draw shoulders (top and bottom of screen)
         shoulder_width = (self.screen_height - road_width) // 2
-        pygame.draw.rect(screen, self.shoulder_color, 
-                        (0, 0, self.screen_width, shoulder_width))  # Top shoulder
-        pygame.draw.rect(screen, self.shoulder_color, 
+        pygame.draw.rect(layer, self.shoulder_color, 
+                        (0, 0, layer_width, shoulder_width))  # Top shoulder
+        pygame.draw.rect(layer, self.shoulder_color, 
                         (0, self.screen_height - shoulder_width, 
-                         self.screen_width, shoulder_width))  # Bottom shoulder
+                         layer_width, shoulder_width))  # Bottom shoulder
         
         # Draw lane markings (horizontal dashed lines between lanes)
         for i in range(1, self.num_lanes):
             y = road_top + (i * self.lane_width)
-            # Draw dashed lane markers for visible area
-            for x in range(-60, self.screen_width + 60, 60):
-                pygame.draw.rect(screen, (255, 255, 255), 
-                              (x, y - 1, 30, 2))
-        
-        # Draw obstacles
-        for obstacle in self.obstacles:
-            # Only draw obstacles that are visible on screen
-            obstacle_screen_y = obstacle.y - camera_y
-            if -obstacle.height <= obstacle_screen_y <= self.screen_height:
-                pygame.draw.rect(screen, (200, 50, 50), 
-                              (obstacle.x, obstacle_screen_y, 
-                               obstacle.width, obstacle.height))
+            for x in range(0, layer_width, LANE_MARKING_SPACING):
+                pygame.draw.rect(layer, (255, 255, 255), 
+                              (x, y - 1, LANE_MARKING_LENGTH, 2))
+        
+        # Match the display format so per-frame blits need no conversion
+        if pygame.display.get_surface() is not None:
+            layer = layer.convert()
         
-        # Draw biome name (for debugging)
-        font = pygame.font.Font(None, 36)
+        self._background_layers[biome] = layer
+        return layer
+    
+    def _get_scaled_layer(self, biome: BiomeType, scale_x: float, size: Tuple[int, int]) -> pygame.Surface:
+        """Get a biome's background layer scaled to a reduced render size."""
+        layer = self._scaled_layers.get((biome, size))
+        if layer is None:
+            full = self._get_background_layer(biome)
+            layer = pygame.transform.smoothscale(
+                full, (max(1, round(full.get_width() * scale_x)), size[1]))
+            self._scaled_layers[(biome, size)] = layer
+        return layer
+    
+    def render(self, screen: pygame.Surface, camera_x: float, camera_y: float,
+               focus_x: Optional[float] = None) -> List[pygame.Rect]:
+        """Render the track with the current camera position.
+        
+        Everything is drawn at the whole-pixel camera position, so frames
+        with the same whole-pixel camera and biome are identical. A surface
+        smaller than the track's screen size is drawn at a reduced
+        resolution, with the view scaled to fit.
+        
+        Args:
+            screen: Surface to draw on.
+            camera_x: World x of the left edge of the view.
+            camera_y: World y of the top edge of the view.
+            focus_x: World x of the player's car, defaults to the left edge.
+                When ``max_visible_obstacles`` caps the obstacles drawn,
+                the ones nearest ahead of it are kept.
+        
+        Returns:
+            The screen areas that differ from the previous render: the
+            whole screen after a scroll, a biome change or a change in
+            the obstacles drawn, otherwise nothing.
+        """
+        current_biome = self.get_current_biome(camera_x)
+        view_x = int(math.floor(camera_x))
+        view_y = int(math.floor(camera_y))
+        offset = view_x % LANE_MARKING_SPACING
+        visible = self.query_visible_obstacles(camera_x)
+        if self.max_visible_obstacles is not None and len(visible) > self.max_visible_obstacles:
+            visible = self._nearest_ahead(visible, camera_x if focus_x is None else focus_x,
+                                          self.max_visible_obstacles)
         biome_text = f"{current_biome.value.upper()}"
-        text_surface = font.render(biome_text, True, (255, 255, 255))
-        screen.blit(text_surface, (self.screen_width - 150, 20))
+        text_surface = get_text_cache().render(biome_text, (255, 255, 255), 36)
+        
+        if screen.get_size() == (self.screen_width, self.screen_height):
+            # Scroll the road and lane markings with the camera in one blit
+            screen.blit(self._get_background_layer(current_biome), (-offset, 0))
             
-    def check_collision(self, car_rect):
-        # Check if the car collides with track boundaries
-        # Args:
-        #   car_rect: Pygame Rect representing the car's hitbox
-        #   bool: True if collision detected, False otherwise
-        # Simple AABB collision with track boundaries
-        for boundary in self.boundaries:
-            if self._line_rect_intersect(boundary, car_rect):
-                return True
-        return False
-    
-    def _line_rect_intersect(self, line, rect):
-        # Check if a line segment intersects with a rectangle
-        # Convert rect to lines
-        rect_lines = [
-            [(rect.left, rect.top), (rect.right, rect.top)],
-            [(rect.right, rect.top), (rect.right, rect.bottom)],
-            [(rect.right, rect.bottom), (rect.left, rect.bottom)],
-            [(rect.left, rect.bottom), (rect.left, rect.top)]
-        ]
+            # Draw only the obstacles inside the viewport
+            for x, y, width, height in self.obstacle_index.boxes[visible].tolist():
+                pygame.draw.rect(screen, (200, 50, 50), 
+                              (x - view_x, y - view_y, width, height))
+            
+            # Draw biome name (for debugging)
+            screen.blit(text_surface, (self.screen_width - 150, 20))
+        else:
+            # Reduced resolution: the same drawing with every position scaled
+            scale_x = screen.get_width() / self.screen_width
+            scale_y = screen.get_height() / self.screen_height
+            layer = self._get_scaled_layer(current_biome, scale_x, screen.get_size())
+            screen.blit(layer, (-round(offset * scale_x), 0))
+            for x, y, width, height in self.obstacle_index.boxes[visible].tolist():
+                pygame.draw.rect(screen, (200, 50, 50), 
+                              (round((x - view_x) * scale_x), round((y - view_y) * scale_y),
+                               math.ceil(width * scale_x), math.ceil(height * scale_y)))
+            screen.blit(text_surface, (round((self.screen_width - 150) * scale_x), round(20 * scale_y)))
+        
+        # The obstacles drawn depend on the car and the cap, not only the camera
+        state = (view_x, view_y, current_biome, screen.get_size(), tuple(visible.tolist()))
+        if state == self._last_render_state:
+            return []
+        self._last_render_state = state
+        return [screen.get_rect()]
+    
+    def _nearest_ahead(self, visible: np.ndarray, focus_x: float, count: int) -> np.ndarray:
+        """Pick the ``count`` obstacles nearest ahead of ``focus_x``.
+        
+        ``visible`` is ordered by left edge, so the obstacles not yet passed
+        follow the first one whose right edge is past ``focus_x``. Any room
+        left is filled with the obstacles just passed.
+        """
+        boxes = self.obstacle_index.boxes[visible]
+        ahead = boxes[:, 0] + boxes[:, 2] > focus_x
+        start = int(np.argmax(ahead)) if ahead.any() else len(visible)
+        end = min(len(visible), start + count)
+        return visible[max(0, end - count):end]
+    
+    def _build_road_edges(self) -> SegmentGrid:
+        """Build the grid of road-edge segments that bound the lanes."""
+        # Edges run parallel to the path, half the road width either side
+        half_road = self.num_lanes * self.lane_width / 2
+        xs = self.path_xs
+        top = self.path_ys - half_road
+        bottom = self.path_ys + half_road
+        starts = np.concatenate([np.column_stack([xs[:-1], top[:-1]]),
+                                 np.column_stack([xs[:-1], bottom[:-1]])])
+        ends = np.concatenate([np.column_stack([xs[1:], top[1:]]),
+                               np.column_stack([xs[1:], bottom[1:]])])
+        return SegmentGrid(starts, ends)
+    
+    @property
+    def road_edges(self) -> SegmentGrid:
+        """Road-edge segments, built on first use."""
+        if self._road_edges is None:
+            self._road_edges = self._build_road_edges()
+        return self._road_edges
+    
+    def collide_road_edges(self, rect: pygame.Rect) -> bool:
+        """Check whether a rectangle crosses either edge of the road.
         
-        # Check for line-line intersection with each rect edge
-        for rect_line in rect_lines:
-            if self._line_intersect(line[0], line[1], rect_line[0], rect_line[1]):
-                return True
-        return False
+        Args:
+            rect: Hitbox in world coordinates.
+        
+        Returns:
+            True if the rectangle touches a road edge.
+        """
+        return self.road_edges.intersects_rect(rect)
     
-    def _line_intersect(self, a1, a2, b1, b2):
-        # Check if two line segments a1-a2 and b1-b2 intersect
-        # Implementation of line segment intersection test
-        # Using cross product method
-        def ccw(A, B, C):
-            return (C[1]-A[1]) * (B[0]-A[0]) > (B[1]-A[1]) * (C[0]-A[0])
+    def collide_obstacles(self, rect: pygame.Rect) -> np.ndarray:
+        """Find the obstacles that overlap a rectangle.
+        
+        Args:
+            rect: Hitbox in world coordinates.
+        
+        Returns:
+            Indices into ``obstacles``.
+        """
+        ids = self.obstacle_index.query_range(rect.left, rect.right)
+        boxes = self.obstacle_index.boxes[ids]
+        overlap = (boxes[:, 1] < rect.bottom) & (boxes[:, 1] + boxes[:, 3] > rect.top)
+        return ids[overlap]
+    
+    def check_collision(self, car_rect: pygame.Rect) -> bool:
+        """Check if a car hits a road edge or an obstacle.
+        
+        Args:
+            car_rect: Pygame Rect representing the car's hitbox.
         
-        return ccw(a1, b1, b2) != ccw(a2, b1, b2) and ccw(a1, a2, b1) != ccw(a1, a2, b2)
+        Returns:
+            True if a collision was detected, False otherwise.
+        """
+        return self.collide_road_edges(car_rect) or len(self.collide_obstacles(car_rect)) > 0
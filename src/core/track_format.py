@@ -0,0 +1,205 @@
+# Versioned binary track format with zero-copy loading.
+#
+# Layout (little-endian). Every section starts on a SECTION_ALIGNMENT
+# boundary and the header records each section's offset:
+#
+#   header      HEADER struct, padded to HEADER_SIZE bytes
+#   path_xs     float32[path_count]
+#   path_ys     float32[path_count]
+#   arc         float64[path_count]  cumulative arc length of the float32 path
+#   obstacles   int32[obstacle_count, 4]  x, y, width, height
+#   biomes      BIOME_DTYPE[biome_count]  (position, biome index)
+import struct
+from typing import List, NamedTuple, Tuple, Union
+
+import numpy as np
+
+MAGIC = b'RTRK'
+FORMAT_VERSION = 1
+HEADER_SIZE = 128
+SECTION_ALIGNMENT = 64
+
+HEADER = struct.Struct(
+    '<4sHH'  # magic, version, header size
+    'IIII'   # screen width, screen height, lanes, flags (reserved)
+    'Qd'     # seed, track length
+    'QII'    # path, obstacle and biome counts
+    'QQQQQ'  # offsets of path_xs, path_ys, arc, obstacles, biomes
+)
+
+PATH_DTYPE = np.dtype('<f4')
+ARC_DTYPE = np.dtype('<f8')
+OBSTACLE_DTYPE = np.dtype('<i4')
+BIOME_DTYPE = np.dtype([('position', '<f8'), ('biome', 'u1')], align=True)
+
+
+class TrackFormatError(ValueError):
+    """Raised when track data is not a valid track file."""
+
+
+class TrackData(NamedTuple):
+    """Arrays and parameters stored in a track file.
+
+    When read from a file the arrays are read-only memory maps, and when
+    read from a buffer they are views into it. In both cases no data is
+    copied.
+    """
+    screen_width: int
+    screen_height: int
+    num_lanes: int
+    seed: int
+    track_length: float
+    path_xs: np.ndarray
+    path_ys: np.ndarray
+    arc_lengths: np.ndarray
+    obstacles: np.ndarray
+    biomes: np.ndarray
+
+
+def _align(offset: int) -> int:
+    return (offset + SECTION_ALIGNMENT - 1) // SECTION_ALIGNMENT * SECTION_ALIGNMENT
+
+
+def _layout(track) -> Tuple[bytes, List[Tuple[int, np.ndarray]], int]:
+    # Header bytes, (offset, array) per section, and total size for a track
+    from src.core.track import BiomeType
+
+    xs = np.ascontiguousarray(track.path_xs, dtype=PATH_DTYPE)
+    ys = np.ascontiguousarray(track.path_ys, dtype=PATH_DTYPE)
+    # Arc lengths are measured on the stored float32 points so lookups stay consistent
+    arc = np.zeros(len(xs), dtype=ARC_DTYPE)
+    np.cumsum(np.hypot(np.diff(xs.astype(np.float64)), np.diff(ys.astype(np.float64))), out=arc[1:])
+
+    boxes = np.array([(r.x, r.y, r.width, r.height) for r in track.obstacles],
+                     dtype=OBSTACLE_DTYPE).reshape(-1, 4)
+
+    order = list(BiomeType)
+    biomes = np.zeros(len(track.biome_boundaries), dtype=BIOME_DTYPE)
+    biomes['position'] = [position for position, _ in track.biome_boundaries]
+    biomes['biome'] = [order.index(biome) for _, biome in track.biome_boundaries]
+
+    sections = []
+    offset = HEADER_SIZE
+    for array in (xs, ys, arc, boxes, biomes):
+        offset = _align(offset)
+        sections.append((offset, array))
+        offset += array.nbytes
+
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, HEADER_SIZE,
+                         track.screen_width, track.screen_height, track.num_lanes, 0,
+                         track.seed, float(track.track_length),
+                         len(xs), len(boxes), len(biomes),
+                         *(start for start, _ in sections))
+    return header, sections, offset
+
+
+def pack_track(track) -> bytes:
+    """Serialise a track to the binary format.
+
+    Args:
+        track: ``Track`` to serialise.
+
+    Returns:
+        The encoded track.
+    """
+    header, sections, size = _layout(track)
+    data = bytearray(size)
+    data[:len(header)] = header
+    for start, array in sections:
+        data[start:start + array.nbytes] = array.tobytes()
+    return bytes(data)
+
+
+def write_track_file(path: str, track):
+    """Write a track to a binary track file.
+
+    Sections are streamed to the file one at a time, so writing never
+    holds a second copy of the whole track in memory.
+
+    Args:
+        path: Destination file path.
+        track: ``Track`` to write.
+    """
+    header, sections, _ = _layout(track)
+    with open(path, 'wb') as f:
+        f.write(header)
+        for start, array in sections:
+            f.write(bytes(start - f.tell()))
+            array.tofile(f)
+
+
+def _parse_header(raw: bytes) -> tuple:
+    if len(raw) < HEADER.size:
+        raise TrackFormatError("Track data is too short for a header")
+    fields = HEADER.unpack_from(raw)
+    if fields[0] != MAGIC:
+        raise TrackFormatError("Not a track file (bad magic)")
+    if fields[1] != FORMAT_VERSION:
+        raise TrackFormatError(f"Unsupported track format version {fields[1]}")
+    return fields
+
+
+def _load(raw_header: bytes, size: int, section) -> TrackData:
+    # Build TrackData from a header and a function that maps one section
+    (_, _, _, width, height, lanes, _, seed, track_length,
+     path_count, obstacle_count, biome_count,
+     xs_offset, ys_offset, arc_offset, obstacle_offset, biome_offset) = _parse_header(raw_header)
+
+    required = [(xs_offset, PATH_DTYPE, (path_count,)),
+                (ys_offset, PATH_DTYPE, (path_count,)),
+                (arc_offset, ARC_DTYPE, (path_count,)),
+                (obstacle_offset, OBSTACLE_DTYPE, (obstacle_count, 4)),
+                (biome_offset, BIOME_DTYPE, (biome_count,))]
+    arrays = []
+    for offset, dtype, shape in required:
+        count = int(np.prod(shape))
+        if offset + count * dtype.itemsize > size:
+            raise TrackFormatError("Track data is truncated")
+        # Empty sections cannot be memory-mapped
+        arrays.append(section(offset, dtype, shape) if count else np.zeros(shape, dtype=dtype))
+
+    return TrackData(width, height, lanes, seed, track_length, *arrays)
+
+
+def read_track_file(path: str) -> TrackData:
+    """Memory-map a binary track file.
+
+    Args:
+        path: Track file to open.
+
+    Returns:
+        Track data whose arrays are read-only memory maps of the file.
+
+    Raises:
+        TrackFormatError: If the file is not a valid track file.
+    """
+    with open(path, 'rb') as f:
+        raw_header = f.read(HEADER_SIZE)
+        f.seek(0, 2)
+        size = f.tell()
+
+    def section(offset, dtype, shape):
+        return np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=shape)
+
+    return _load(raw_header, size, section)
+
+
+def read_track_buffer(buffer: Union[bytes, bytearray, memoryview]) -> TrackData:
+    """Read track data in place from a buffer, e.g. shared memory.
+
+    Args:
+        buffer: Object supporting the buffer protocol holding a packed track.
+
+    Returns:
+        Track data whose arrays are views into the buffer.
+
+    Raises:
+        TrackFormatError: If the buffer does not hold a valid track.
+    """
+    view = memoryview(buffer)
+
+    def section(offset, dtype, shape):
+        count = int(np.prod(shape))
+        return np.frombuffer(view, dtype=dtype, count=count, offset=offset).reshape(shape)
+
+    return _load(bytes(view[:HEADER_SIZE]), view.nbytes, section)
@@ -0,0 +1,2 @@
+# Networked multiplayer: an authoritative UDP race server, clients with
+# prediction and interpolation, and a loopback harness for testing them.
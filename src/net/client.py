@@ -0,0 +1,374 @@
+# Race client over asyncio UDP with prediction and interpolation.
+#
+# The client samples its controller once per tick, sends the input to the
+# server and immediately applies it to a local copy of its own car, so the
+# player sees their input without waiting a round trip. Each snapshot
+# carries the newest input the server applied; the client resets its car to
+# the server's state and replays the inputs the server has not seen yet.
+#
+# Other cars are drawn interpolation_delay behind the newest snapshot,
+# between the two snapshots around that time, so they move smoothly even
+# though snapshots arrive at a lower rate than frames and with jitter.
+import os
+import sys
+import asyncio
+import random
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+import numpy as np
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.core.car_batch import CarBatch
+from src.core.controllers import Controller
+from src.core.track import Track
+from src.net import protocol
+from src.net.conditions import LinkSimulator, NetworkConditions
+from src.net.protocol import ProtocolError, Snapshot, Welcome
+
+INTERPOLATION_DELAY = 0.1  # Seconds other cars are drawn behind the newest snapshot
+INPUT_REDUNDANCY = 4  # Inputs repeated in every INPUT packet to cover losses
+MAX_PENDING_INPUTS = 120  # Unacknowledged inputs kept for replay
+BASELINE_HISTORY = 32  # Received snapshots kept as delta baselines
+
+# Share of the difference to a slower clock offset sample adopted per
+# snapshot; faster samples are adopted at once
+OFFSET_SMOOTHING = 0.05
+
+Pose = Tuple[float, float, float]
+
+
+class _ClientProtocol(asyncio.DatagramProtocol):
+    def __init__(self, client: 'RaceClient'):
+        self.client = client
+
+    def datagram_received(self, data: bytes, addr):
+        self.client._receive(data)
+
+
+class RaceClient:
+    """Connects to a ``RaceServer`` and drives one car in the race.
+
+    Typical use::
+
+        client = RaceClient(KeyboardController())
+        await client.connect(host, port)
+        await client.run()
+    """
+
+    def __init__(self, controller: Controller, track: Optional[Track] = None,
+                 interpolation_delay: float = INTERPOLATION_DELAY,
+                 input_redundancy: int = INPUT_REDUNDANCY,
+                 conditions: Optional[NetworkConditions] = None, seed: Optional[int] = None,
+                 clock: Callable[[], float] = time.perf_counter):
+        """Create an unconnected client.
+
+        Args:
+            controller: Input source for the player's car.
+            track: Track to reuse when its seed matches the server's;
+                otherwise the track is generated from the server's seed.
+            interpolation_delay: Seconds other cars are drawn in the past.
+            input_redundancy: Number of recent inputs sent in every packet.
+            conditions: Latency, jitter and loss to simulate in each
+                direction, for testing on loopback.
+            seed: Seed for the simulated conditions.
+            clock: Function returning the current time in seconds.
+        """
+        self.controller = controller
+        self.track = track
+        self.interpolation_delay = interpolation_delay
+        self.input_redundancy = input_redundancy
+        self.clock = clock
+        self.transport: Optional[asyncio.DatagramTransport] = None
+        self.connected = False
+        self.dt = 0.0
+        self.welcome: Optional[Welcome] = None
+        self._welcome_future: Optional[asyncio.Future] = None
+        self._nonce = random.getrandbits(32)
+
+        self._uplink = self._downlink = None
+        if conditions is not None:
+            self._uplink = LinkSimulator(conditions, seed)
+            self._downlink = LinkSimulator(conditions, None if seed is None else seed + 1)
+
+        # Prediction: the player's car and the inputs the server has not
+        # applied yet, as (sequence, quantised input, predicted distance, y)
+        self.car: Optional[CarBatch] = None
+        self.sequence = 0
+        self._pending: Deque[Tuple[int, Tuple[int, int], float, float]] = deque()
+
+        # Received snapshots by tick, and the local clock minus server time
+        self.snapshots: 'OrderedDict[int, Snapshot]' = OrderedDict()
+        self.latest_tick = protocol.NO_SNAPSHOT
+        self._clock_offset: Optional[float] = None
+
+        # Statistics
+        self.connected_at = 0.0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.snapshots_received = 0
+        self.snapshots_rejected = 0
+        self.prediction_errors = 0
+        self.prediction_error_total = 0.0
+        self.prediction_error_max = 0.0
+
+    @property
+    def player_id(self) -> Optional[int]:
+        return self.welcome.player_id if self.welcome is not None else None
+
+    async def connect(self, host: str, port: int, timeout: float = 2.0,
+                      retry_interval: float = 0.25) -> Welcome:
+        """Join the server, resending the request until it answers.
+
+        Args:
+            host: Server address.
+            port: Server port.
+            timeout: Seconds to keep trying.
+            retry_interval: Seconds between requests.
+
+        Returns:
+            The session settings.
+
+        Raises:
+            ConnectionError: If the server does not answer in time.
+        """
+        loop = asyncio.get_running_loop()
+        self.transport, _ = await loop.create_datagram_endpoint(
+            lambda: _ClientProtocol(self), remote_addr=(host, port))
+        self._welcome_future = loop.create_future()
+        deadline = self.clock() + timeout
+        while not self._welcome_future.done():
+            remaining = deadline - self.clock()
+            if remaining <= 0:
+                self.close()
+                raise ConnectionError(f"No answer from {host}:{port} within {timeout}s")
+            self._send(protocol.encode_hello(self._nonce))
+            try:
+                await asyncio.wait_for(asyncio.shield(self._welcome_future),
+                                       min(retry_interval, remaining))
+            except asyncio.TimeoutError:
+                pass
+        return self._welcome_future.result()
+
+    def _on_welcome(self, welcome: Welcome):
+        if welcome.nonce != self._nonce or self.welcome is not None:
+            return
+        self.welcome = welcome
+        if self.track is None or self.track.seed != welcome.seed:
+            self.track = Track(welcome.width, welcome.height, num_lanes=protocol.NUM_LANES,
+                               seed=welcome.seed)
+        self.dt = 1.0 / welcome.tick_rate
+        self.car = CarBatch(self.track, 1, num_lanes=protocol.NUM_LANES)
+        self.car.reset(lane=protocol.start_lane(welcome.player_id))
+        self.connected = True
+        self.connected_at = self.clock()
+        if self._welcome_future is not None and not self._welcome_future.done():
+            self._welcome_future.set_result(welcome)
+
+    async def run(self, duration: Optional[float] = None):
+        """Tick at the server's tick rate while connected.
+
+        Args:
+            duration: Seconds to run for, or None until disconnected.
+        """
+        start = self.clock()
+        deadline = start
+        while self.connected and (duration is None or self.clock() - start < duration):
+            self.tick()
+            deadline += self.dt
+            delay = deadline - self.clock()
+            if delay < -self.dt * 4:
+                deadline = self.clock()  # Too far behind to catch up
+            await asyncio.sleep(max(0.0, delay))
+
+    def tick(self):
+        """Send this tick's input and predict its effect on the player's car."""
+        if not self.connected:
+            return
+        throttle, steering = self.controller.get_input()
+        quantized = (protocol.quantize_input(throttle), protocol.quantize_input(steering))
+        self.sequence += 1
+        # Predict with exactly the values the server will apply
+        self._step(quantized)
+        self._pending.append((self.sequence, quantized,
+                              float(self.car.distance_along_track[0]), float(self.car.y[0])))
+        if len(self._pending) > MAX_PENDING_INPUTS:
+            self._pending.popleft()
+
+        recent = list(self._pending)[-self.input_redundancy:]
+        packet = protocol.InputPacket(self.welcome.player_id, self.latest_tick, self.sequence,
+                                      [entry[1] for entry in recent])
+        self._send(protocol.encode_input(packet))
+
+    def _step(self, quantized: Tuple[int, int]):
+        self.car.step(protocol.dequantize_input(quantized[0]),
+                      protocol.dequantize_input(quantized[1]), self.dt)
+
+    def _send(self, data: bytes):
+        if self.transport is None or self.transport.is_closing():
+            return
+        self.bytes_sent += len(data)
+        if self._uplink is not None:
+            self._uplink.deliver(self._send_now, data)
+        else:
+            self.transport.sendto(data)
+
+    def _send_now(self, data: bytes):
+        if self.transport is not None and not self.transport.is_closing():
+            self.transport.sendto(data)
+
+    def _receive(self, data: bytes):
+        if self._downlink is not None:
+            self._downlink.deliver(self.handle_datagram, data)
+        else:
+            self.handle_datagram(data)
+
+    def handle_datagram(self, data: bytes):
+        """Handle one datagram from the server; malformed ones are ignored."""
+        if not data or self.transport is None:
+            return
+        self.bytes_received += len(data)
+        try:
+            kind = data[0]
+            if kind == protocol.SNAPSHOT and self.connected:
+                self._on_snapshot(*protocol.decode_snapshot(data, self.snapshots))
+            elif kind == protocol.WELCOME:
+                self._on_welcome(protocol.decode_welcome(data))
+            elif kind == protocol.BYE and protocol.decode_bye(data) == self.player_id:
+                self.connected = False
+        except ProtocolError:
+            self.snapshots_rejected += data[0] == protocol.SNAPSHOT
+
+    def _on_snapshot(self, snapshot: Snapshot, input_ack: int):
+        self.snapshots_received += 1
+        self.snapshots[snapshot.tick] = snapshot
+        while len(self.snapshots) > BASELINE_HISTORY:
+            del self.snapshots[min(self.snapshots)]
+
+        if self.latest_tick != protocol.NO_SNAPSHOT and snapshot.tick <= self.latest_tick:
+            return  # Arrived out of order; only useful as a baseline
+        self.latest_tick = snapshot.tick
+
+        # Estimate the clock offset from the least delayed snapshots
+        offset = self.clock() - snapshot.tick * self.dt
+        if self._clock_offset is None or offset < self._clock_offset:
+            self._clock_offset = offset
+        else:
+            self._clock_offset += (offset - self._clock_offset) * OFFSET_SMOOTHING
+
+        state = snapshot.get(self.player_id)
+        if state is not None:
+            self._reconcile(protocol.dequantize_car(state), input_ack)
+
+    def _reconcile(self, server_state: Dict[str, float], input_ack: int):
+        # Compare with what was predicted for the acknowledged input
+        pending = self._pending
+        while pending and pending[0][0] < input_ack:
+            pending.popleft()
+        if pending and pending[0][0] == input_ack:
+            _, _, distance, y = pending.popleft()
+            error = float(np.hypot(distance - server_state['distance_along_track'],
+                                   y - server_state['y']))
+            self.prediction_errors += 1
+            self.prediction_error_total += error
+            self.prediction_error_max = max(self.prediction_error_max, error)
+
+        # Restart from the server's state and replay the newer inputs
+        server_state['x'] = float(self.track.get_path_points(
+            np.array([server_state['distance_along_track']]))[0, 0])
+        self.car.set_state(0, server_state)
+        for index, (sequence, quantized, _, _) in enumerate(pending):
+            self._step(quantized)
+            pending[index] = (sequence, quantized, float(self.car.distance_along_track[0]),
+                              float(self.car.y[0]))
+
+    def server_time(self, now: Optional[float] = None) -> Optional[float]:
+        """Estimate the server's simulation time, in seconds since it started."""
+        if self._clock_offset is None:
+            return None
+        return (self.clock() if now is None else now) - self._clock_offset
+
+    def get_predicted_pose(self) -> Optional[Pose]:
+        """Get the (x, y, rotation) of the player's predicted car."""
+        if self.car is None:
+            return None
+        return (float(self.car.x[0]), float(self.car.y[0]), float(self.car.rotation[0]))
+
+    def get_remote_poses(self, now: Optional[float] = None) -> Dict[int, Pose]:
+        """Get the interpolated (x, y, rotation) of every other car.
+
+        Args:
+            now: Local clock time to draw for; defaults to now.
+
+        Returns:
+            Poses by player id, ``interpolation_delay`` behind the server.
+        """
+        server_time = self.server_time(now)
+        if server_time is None or self.latest_tick == protocol.NO_SNAPSHOT:
+            return {}
+        render_tick = (server_time - self.interpolation_delay) / self.dt
+
+        # The two snapshots around the render time; hold the nearest one
+        # when the time is outside the buffer instead of extrapolating
+        before = after = None
+        for tick in self.snapshots:
+            if tick <= render_tick and (before is None or tick > before):
+                before = tick
+            if tick >= render_tick and (after is None or tick < after):
+                after = tick
+        if before is None:
+            before = after
+        if after is None:
+            after = before
+        start, end = self.snapshots[before], self.snapshots[after]
+        t = 0.0 if after == before else (render_tick - before) / (after - before)
+
+        ids = end.ids[end.ids != self.player_id]
+        if not len(ids):
+            return {}
+        end_states = end.states[np.searchsorted(end.ids, ids)]
+        # Cars that joined after the earlier snapshot are held at the later one
+        start_states = end_states.copy()
+        if len(start.ids):
+            index = np.minimum(np.searchsorted(start.ids, ids), len(start.ids) - 1)
+            known = start.ids[index] == ids
+            start_states[known] = start.states[index[known]]
+        states = start_states + (end_states - start_states) * t
+
+        distance = states[:, protocol.DISTANCE] / protocol.DISTANCE_SCALE
+        x = self.track.get_path_points(distance)[:, 0]
+        y = states[:, protocol.Y] / protocol.Y_SCALE
+        rotation = states[:, protocol.ROTATION] / protocol.ROTATION_SCALE
+        return {player_id: (float(x[i]), float(y[i]), float(rotation[i]))
+                for i, player_id in enumerate(ids.tolist())}
+
+    def close(self):
+        """Leave the race and close the socket."""
+        if self.transport is not None:
+            if self.connected:
+                self.transport.sendto(protocol.encode_bye(self.player_id))
+            self.transport.close()
+            self.transport = None
+        self.connected = False
+
+    def get_stats(self) -> Dict[str, float]:
+        """Get bandwidth and prediction statistics.
+
+        Returns:
+            Bytes per second sent and received since connecting, snapshot
+            counts, and the mean and max distance in pixels between the
+            predicted car and the server's car for acknowledged inputs.
+        """
+        elapsed = max(self.clock() - self.connected_at, 1e-9)
+        return {
+            'up_bytes_per_s': self.bytes_sent / elapsed,
+            'down_bytes_per_s': self.bytes_received / elapsed,
+            'snapshots': self.snapshots_received,
+            'snapshots_rejected': self.snapshots_rejected,
+            'mean_snapshot_bytes': self.bytes_received / max(self.snapshots_received, 1),
+            'prediction_error_mean_px': self.prediction_error_total / max(self.prediction_errors, 1),
+            'prediction_error_max_px': self.prediction_error_max,
+        }
@@ -0,0 +1,49 @@
+# Simulated latency, jitter and packet loss for loopback testing.
+import asyncio
+import random
+from typing import Callable, NamedTuple, Optional
+
+
+class NetworkConditions(NamedTuple):
+    """Network behaviour to simulate in one direction of a link.
+
+    Attributes:
+        latency: Delay added to every datagram, in seconds.
+        jitter: Extra random delay of up to this many seconds. Datagrams
+            can arrive out of order when it exceeds the sending interval.
+        loss: Probability that a datagram is dropped.
+    """
+    latency: float = 0.0
+    jitter: float = 0.0
+    loss: float = 0.0
+
+
+class LinkSimulator:
+    """Delays or drops datagrams according to ``NetworkConditions``."""
+
+    def __init__(self, conditions: NetworkConditions, seed: Optional[int] = None):
+        """Create the simulator.
+
+        Args:
+            conditions: Behaviour to simulate.
+            seed: Seed for the loss and jitter draws.
+        """
+        self.conditions = conditions
+        self.rng = random.Random(seed)
+        self.dropped = 0
+
+    def deliver(self, callback: Callable, *args):
+        """Call ``callback(*args)`` after the simulated delay, unless dropped.
+
+        Must be called from a running event loop.
+        """
+        conditions = self.conditions
+        if conditions.loss and self.rng.random() < conditions.loss:
+            self.dropped += 1
+            return
+        delay = conditions.latency + (self.rng.uniform(0.0, conditions.jitter)
+                                      if conditions.jitter else 0.0)
+        if delay > 0:
+            asyncio.get_running_loop().call_later(delay, callback, *args)
+        else:
+            callback(*args)
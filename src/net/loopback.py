@@ -0,0 +1,156 @@
+# Loopback races: a server and N scripted clients in one event loop.
+#
+# Used to test the networking end to end and to measure how bandwidth and
+# server tick cost grow with the number of players, optionally under
+# simulated latency, jitter and loss.
+import os
+import sys
+import asyncio
+from typing import List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.utils.constants import PHYSICS_HZ
+from src.core.controllers import ScriptedController
+from src.core.track import Track
+from src.net.client import RaceClient
+from src.net.conditions import NetworkConditions
+from src.net.server import DEFAULT_SNAPSHOT_RATE, RaceServer
+
+UDP_OVERHEAD = 28  # IPv4 and UDP header bytes per datagram, not included in payload counts
+
+
+class LoopbackReport(NamedTuple):
+    """Measurements from one loopback race.
+
+    Attributes:
+        players: Number of clients.
+        seconds: Length of the race.
+        ticks: Server ticks run.
+        tick_p50_ms: Median server tick cost.
+        tick_p95_ms: 95th percentile server tick cost.
+        tick_mean_ms: Mean server tick cost.
+        snapshot_mean_ms: Mean cost of quantising, encoding and sending
+            one round of snapshots, included in the tick costs.
+        down_bytes_per_s: Payload received per client per second, mean.
+        up_bytes_per_s: Payload sent per client per second, mean.
+        snapshot_bytes: Mean snapshot datagram payload.
+        prediction_error_px: Mean distance between a client's predicted
+            car and the server's, over all clients.
+        prediction_error_max_px: Largest such distance.
+    """
+    players: int
+    seconds: float
+    ticks: int
+    tick_p50_ms: float
+    tick_p95_ms: float
+    tick_mean_ms: float
+    snapshot_mean_ms: float
+    down_bytes_per_s: float
+    up_bytes_per_s: float
+    snapshot_bytes: float
+    prediction_error_px: float
+    prediction_error_max_px: float
+
+
+def driving_script(steps: int, tick_rate: int = PHYSICS_HZ, seed: Optional[int] = None) -> np.ndarray:
+    """Generate (throttle, steering) inputs for a scripted driver.
+
+    The driver mostly holds full throttle, sometimes brakes or coasts, and
+    taps the steering now and then to change lanes. Each input is held for
+    a quarter to one second.
+    """
+    rng = np.random.default_rng(seed)
+    inputs = np.zeros((steps, 2))
+    step = 0
+    while step < steps:
+        hold = int(rng.integers(tick_rate // 4, tick_rate + 1))
+        inputs[step:step + hold, 0] = rng.choice([1.0, 0.0, -0.5], p=[0.7, 0.2, 0.1])
+        if rng.random() < 0.5:
+            inputs[step:step + 3, 1] = rng.choice([-1.0, 1.0])
+        step += hold
+    return inputs
+
+
+async def run_loopback(players: int, seconds: float = 3.0, seed: int = 1,
+                       conditions: Optional[NetworkConditions] = None,
+                       tick_rate: int = PHYSICS_HZ, snapshot_rate: int = DEFAULT_SNAPSHOT_RATE,
+                       track: Optional[Track] = None) -> LoopbackReport:
+    """Race scripted clients against a server on 127.0.0.1.
+
+    Args:
+        players: Number of clients.
+        seconds: How long the clients drive.
+        seed: Seed for the track, the driving scripts and the conditions.
+        conditions: Latency, jitter and loss simulated by every client.
+        tick_rate: Server and client ticks per second.
+        snapshot_rate: Snapshots per second.
+        track: Track to race on; generated from ``seed`` when None.
+
+    Returns:
+        The measurements.
+    """
+    server = RaceServer(track=track, seed=seed, max_players=max(players, 1),
+                        tick_rate=tick_rate, snapshot_rate=snapshot_rate)
+    host, port = await server.start()
+    serving = asyncio.ensure_future(server.serve())
+    steps = int(seconds * tick_rate) + tick_rate
+    clients = [RaceClient(ScriptedController(driving_script(steps, tick_rate, seed + i)),
+                          track=server.track, conditions=conditions, seed=seed + i)
+               for i in range(players)]
+    try:
+        await asyncio.gather(*(client.connect(host, port) for client in clients))
+        await asyncio.gather(*(client.run(seconds) for client in clients))
+        server_stats = server.get_stats()
+        client_stats = [client.get_stats() for client in clients]
+    finally:
+        for client in clients:
+            client.close()
+        server.stop()
+        await serving
+        server.close()
+
+    return LoopbackReport(
+        players=players,
+        seconds=seconds,
+        ticks=server_stats['ticks'],
+        tick_p50_ms=server_stats['tick_p50_ms'],
+        tick_p95_ms=server_stats['tick_p95_ms'],
+        tick_mean_ms=server_stats['tick_mean_ms'],
+        snapshot_mean_ms=server_stats['snapshot_mean_ms'],
+        down_bytes_per_s=float(np.mean([s['down_bytes_per_s'] for s in client_stats])),
+        up_bytes_per_s=float(np.mean([s['up_bytes_per_s'] for s in client_stats])),
+        snapshot_bytes=float(np.mean([s['mean_snapshot_bytes'] for s in client_stats])),
+        prediction_error_px=float(np.mean([s['prediction_error_mean_px'] for s in client_stats])),
+        prediction_error_max_px=max(s['prediction_error_max_px'] for s in client_stats),
+    )
+
+
+def scaling_report(player_counts: Sequence[int], seconds: float = 3.0,
+                   **kwargs) -> List[LoopbackReport]:
+    """Run one loopback race per player count.
+
+    Args:
+        player_counts: Numbers of clients to measure.
+        seconds: Length of each race.
+        **kwargs: Further options for ``run_loopback``.
+
+    Returns:
+        One report per player count, in order.
+    """
+    return [asyncio.run(run_loopback(count, seconds, **kwargs)) for count in player_counts]
+
+
+def format_reports(reports: Sequence[LoopbackReport]) -> str:
+    """Format reports as a table, one row per player count."""
+    lines = [f"{'players':>7} {'tick p50':>9} {'tick p95':>9} {'snapshot':>9} "
+             f"{'down/client':>12} {'up/client':>10} {'pkt bytes':>9} {'pred err':>9}"]
+    for r in reports:
+        lines.append(f"{r.players:>7} {r.tick_p50_ms:>7.3f}ms {r.tick_p95_ms:>7.3f}ms "
+                     f"{r.snapshot_mean_ms:>7.3f}ms {r.down_bytes_per_s / 1024:>8.2f}KB/s "
+                     f"{r.up_bytes_per_s / 1024:>6.2f}KB/s {r.snapshot_bytes:>9.1f} "
+                     f"{r.prediction_error_px:>7.2f}px")
+    return '\n'.join(lines)
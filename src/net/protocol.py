@@ -0,0 +1,399 @@
+# Wire format for networked races.
+#
+# Every datagram starts with a one-byte packet type. All values are
+# little-endian. Car state is quantised to integers before it is sent, and
+# a snapshot only carries the fields that changed since a baseline snapshot
+# the client has acknowledged. Because server and client both hold the
+# quantised baseline, deltas never accumulate error.
+#
+#   HELLO     client -> server  version, nonce
+#   WELCOME   server -> client  version, nonce, player id, track seed and
+#                               size, tick rate, ticks between snapshots
+#   INPUT     client -> server  player id, newest snapshot tick received,
+#                               newest input sequence number, then the last
+#                               few (throttle, steering) pairs as int16, so
+#                               a lost packet is covered by the next one
+#   SNAPSHOT  server -> client  tick, baseline tick, newest input sequence
+#                               number applied for this client, removed
+#                               player ids, then one record per changed car
+#   BYE       either way       player id
+#
+# Decoding functions raise ProtocolError for malformed datagrams.
+#
+# A car record is the player id, a field mask and the fields named by the
+# mask. Distance is sent as an int16 change from the baseline when it fits,
+# otherwise in full. The x position is not sent: it follows from the
+# distance along the shared track.
+import os
+import sys
+import struct
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.core.replay import dequantize_input, quantize_input  # Inputs share the replay encoding
+
+PROTOCOL_VERSION = 1
+MAX_DATAGRAM = 1200  # Stays under a typical path MTU
+
+HELLO = 1
+WELCOME = 2
+INPUT = 3
+SNAPSHOT = 4
+BYE = 5
+
+HELLO_FORMAT = struct.Struct('<BBI')  # type, version, nonce
+WELCOME_FORMAT = struct.Struct('<BBIBQHHHH')  # type, version, nonce, player, seed, width, height, tick rate, snapshot interval
+INPUT_HEADER = struct.Struct('<BBIIB')  # type, player, ack tick, newest sequence, input count
+INPUT_PAIR = struct.Struct('<hh')
+SNAPSHOT_HEADER = struct.Struct('<BIIIBB')  # type, tick, baseline tick, input ack, car count, removed count
+BYE_FORMAT = struct.Struct('<BB')  # type, player
+
+NO_BASELINE = 0xFFFFFFFF  # Baseline tick of a full snapshot
+NO_SNAPSHOT = 0xFFFFFFFF  # Ack tick before any snapshot has arrived
+
+NUM_LANES = 4
+
+# Quantisation of the car state fields
+DISTANCE_SCALE = 16  # 1/16 pixel
+Y_SCALE = 8  # 1/8 pixel
+SPEED_SCALE = 4096
+ROTATION_SCALE = 100  # 1/100 degree
+
+# Columns of a quantised state array
+DISTANCE, Y, SPEED, ROTATION, LANE = range(5)
+STATE_FIELDS = 5
+
+# Field mask bits of a car record, with the struct code and state column
+# of each field
+FIELD_DISTANCE = 1
+FIELD_DISTANCE_DELTA = 2
+FIELD_Y = 4
+FIELD_SPEED = 8
+FIELD_ROTATION = 16
+FIELD_LANE = 32
+_FIELDS = ((FIELD_DISTANCE, 'I', DISTANCE), (FIELD_DISTANCE_DELTA, 'h', DISTANCE),
+           (FIELD_Y, 'h', Y), (FIELD_SPEED, 'H', SPEED), (FIELD_ROTATION, 'h', ROTATION),
+           (FIELD_LANE, 'B', LANE))
+FULL_RECORD = FIELD_DISTANCE | FIELD_Y | FIELD_SPEED | FIELD_ROTATION | FIELD_LANE
+
+# Mask bit of each state column except distance, which has two encodings
+_CHANGE_BITS = np.array([0, FIELD_Y, FIELD_SPEED, FIELD_ROTATION, FIELD_LANE], dtype=np.int64)
+
+# Struct and state columns of a record, per field mask, built on first use
+_record_layouts: Dict[int, Tuple[struct.Struct, Tuple[int, ...]]] = {}
+
+class ProtocolError(ValueError):
+    """Raised when a datagram cannot be decoded."""
+
+
+class Welcome(NamedTuple):
+    """Session settings sent to a client that joined.
+
+    Attributes:
+        nonce: Nonce of the HELLO being answered.
+        player_id: Id of the client's car in snapshots.
+        seed: Track seed; the client generates the same track from it.
+        width: Screen width the track was generated for.
+        height: Screen height the track was generated for.
+        tick_rate: Server simulation steps per second.
+        snapshot_interval: Ticks between snapshots.
+    """
+    nonce: int
+    player_id: int
+    seed: int
+    width: int
+    height: int
+    tick_rate: int
+    snapshot_interval: int
+
+
+class InputPacket(NamedTuple):
+    """Recent inputs of one client.
+
+    Attributes:
+        player_id: Sending player.
+        ack_tick: Newest snapshot tick the client received, or NO_SNAPSHOT.
+        sequence: Sequence number of the last input in ``inputs``.
+        inputs: Quantised (throttle, steering) pairs, oldest first.
+    """
+    player_id: int
+    ack_tick: int
+    sequence: int
+    inputs: List[Tuple[int, int]]
+
+
+class Snapshot(NamedTuple):
+    """Quantised state of every car at one server tick.
+
+    Attributes:
+        tick: Server tick.
+        ids: Player ids, sorted, as a uint8 array.
+        states: (len(ids), STATE_FIELDS) int64 array of quantised state.
+    """
+    tick: int
+    ids: np.ndarray
+    states: np.ndarray
+
+    def get(self, player_id: int) -> Optional[np.ndarray]:
+        """Get the quantised state of one player's car, or None."""
+        index = np.searchsorted(self.ids, player_id)
+        if index < len(self.ids) and self.ids[index] == player_id:
+            return self.states[index]
+        return None
+
+
+def start_lane(player_id: int) -> int:
+    """Lane a player's car starts in; both ends place new cars the same way."""
+    return player_id % NUM_LANES + 1
+
+
+def quantize_cars(tick: int, ids: np.ndarray, distance: np.ndarray, y: np.ndarray,
+                  speed: np.ndarray, rotation: np.ndarray, lane: np.ndarray,
+                  is_changing_lanes: np.ndarray, lane_change_direction: np.ndarray) -> Snapshot:
+    """Quantise the state of several cars into a snapshot.
+
+    Args:
+        tick: Server tick of the state.
+        ids: Player id of each car, sorted.
+        distance, y, speed, rotation, lane, is_changing_lanes,
+        lane_change_direction: Car state arrays, as in ``CarBatch``.
+
+    Returns:
+        The snapshot.
+    """
+    states = np.empty((len(ids), STATE_FIELDS), dtype=np.int64)
+    states[:, DISTANCE] = np.clip(np.round(distance * DISTANCE_SCALE), 0, 0xFFFFFFFF)
+    states[:, Y] = np.clip(np.round(y * Y_SCALE), -32768, 32767)
+    states[:, SPEED] = np.clip(np.round(speed * SPEED_SCALE), 0, 0xFFFF)
+    states[:, ROTATION] = np.clip(np.round(rotation * ROTATION_SCALE), -32768, 32767)
+    # Lane in the low nibble, then the lane-change flag and direction + 1
+    states[:, LANE] = (lane & 0xF) | (is_changing_lanes.astype(np.int64) << 4) \
+        | ((lane_change_direction.astype(np.int64) + 1) << 5)
+    return Snapshot(tick, np.asarray(ids, dtype=np.uint8), states)
+
+
+def dequantize_car(state: np.ndarray) -> Dict[str, float]:
+    """Convert one car's quantised state back to ``CarBatch`` state values.
+
+    Returns:
+        Dictionary with the keys accepted by ``CarBatch.set_state``,
+        without ``x``.
+    """
+    lane = int(state[LANE])
+    return {
+        'distance_along_track': state[DISTANCE] / DISTANCE_SCALE,
+        'y': state[Y] / Y_SCALE,
+        'speed': state[SPEED] / SPEED_SCALE,
+        'rotation': state[ROTATION] / ROTATION_SCALE,
+        'lane': lane & 0xF,
+        'is_changing_lanes': bool(lane & 0x10),
+        'lane_change_direction': ((lane >> 5) & 0x3) - 1,
+    }
+
+
+def _record_layout(mask: int) -> Tuple[struct.Struct, Tuple[int, ...]]:
+    layout = _record_layouts.get(mask)
+    if layout is None:
+        fields = [(code, column) for bit, code, column in _FIELDS if mask & bit]
+        layout = (struct.Struct('<BB' + ''.join(code for code, _ in fields)),
+                  tuple(column for _, column in fields))
+        _record_layouts[mask] = layout
+    return layout
+
+
+def record_size(mask: int = FULL_RECORD) -> int:
+    """Size in bytes of a car record with the given fields."""
+    return _record_layout(mask)[0].size
+
+
+def encode_hello(nonce: int) -> bytes:
+    """Encode a request to join, answered by a WELCOME with the same nonce."""
+    return HELLO_FORMAT.pack(HELLO, PROTOCOL_VERSION, nonce)
+
+
+def encode_welcome(welcome: Welcome) -> bytes:
+    """Encode the settings of a session a client joined."""
+    return WELCOME_FORMAT.pack(WELCOME, PROTOCOL_VERSION, *welcome)
+
+
+def encode_input(packet: InputPacket) -> bytes:
+    """Encode a client's recent inputs."""
+    header = INPUT_HEADER.pack(INPUT, packet.player_id, packet.ack_tick, packet.sequence,
+                               len(packet.inputs))
+    return header + b''.join(INPUT_PAIR.pack(*pair) for pair in packet.inputs)
+
+
+def encode_bye(player_id: int) -> bytes:
+    """Encode a player leaving, or being dropped by the server."""
+    return BYE_FORMAT.pack(BYE, player_id)
+
+
+def encode_snapshot_body(snapshot: Snapshot, baseline: Optional[Snapshot] = None) -> Tuple[bytes, int, int]:
+    """Encode the car records of a snapshot as changes from a baseline.
+
+    The body does not depend on the receiving client, only on its
+    baseline, so the server can share one body between every client that
+    acknowledged the same snapshot.
+
+    Args:
+        snapshot: Snapshot to send.
+        baseline: Snapshot the client already has, or None for a full
+            snapshot.
+
+    Returns:
+        (body, car record count, removed id count).
+    """
+    ids, states = snapshot.ids, snapshot.states
+    masks = np.full(len(ids), FULL_RECORD, dtype=np.int64)
+    values = states
+    removed = b''
+
+    if baseline is not None and len(baseline.ids):
+        # Align the baseline with the current cars; new cars get full records
+        index = np.minimum(np.searchsorted(baseline.ids, ids), len(baseline.ids) - 1)
+        known = baseline.ids[index] == ids
+        previous = baseline.states[index]
+        changed = states != previous
+        delta = states[:, DISTANCE] - previous[:, DISTANCE]
+        small = known & (np.abs(delta) < 32768)
+
+        masks = changed @ _CHANGE_BITS
+        masks += np.where(changed[:, DISTANCE],
+                          np.where(small, FIELD_DISTANCE_DELTA, FIELD_DISTANCE), 0)
+        masks[~known] = FULL_RECORD
+        values = states.copy()
+        values[small, DISTANCE] = delta[small]
+        # Ids are bytes, so a lookup table finds the removed cars without sorting
+        present = np.zeros(256, dtype=bool)
+        present[ids] = True
+        removed = baseline.ids[~present[baseline.ids]].tobytes()
+
+    parts = [removed]
+    for player_id, mask, row in zip(ids.tolist(), masks.tolist(), values.tolist()):
+        if not mask:
+            continue  # Unchanged since the baseline
+        record, columns = _record_layout(mask)
+        parts.append(record.pack(player_id, mask, *[row[column] for column in columns]))
+    return b''.join(parts), len(parts) - 1, len(removed)
+
+
+def encode_snapshot(snapshot: Snapshot, baseline: Optional[Snapshot], input_ack: int,
+                    body: Optional[Tuple[bytes, int, int]] = None) -> bytes:
+    """Encode a snapshot datagram for one client.
+
+    Args:
+        snapshot: Snapshot to send.
+        baseline: Snapshot the client acknowledged, or None.
+        input_ack: Newest input sequence number applied for the client.
+        body: Result of ``encode_snapshot_body`` for this baseline, when
+            already encoded for another client.
+
+    Returns:
+        The datagram.
+    """
+    if body is None:
+        body = encode_snapshot_body(snapshot, baseline)
+    data, count, removed = body
+    baseline_tick = NO_BASELINE if baseline is None else baseline.tick
+    return SNAPSHOT_HEADER.pack(SNAPSHOT, snapshot.tick, baseline_tick, input_ack,
+                                count, removed) + data
+
+
+def decode_snapshot(data: bytes, baselines: Dict[int, Snapshot]) -> Tuple[Snapshot, int]:
+    """Decode a snapshot datagram.
+
+    Args:
+        data: Datagram starting with the SNAPSHOT type.
+        baselines: Snapshots received earlier, by tick.
+
+    Returns:
+        (snapshot, input ack).
+
+    Raises:
+        ProtocolError: If the datagram is malformed or its baseline is not
+            in ``baselines``.
+    """
+    try:
+        _, tick, baseline_tick, input_ack, count, removed = SNAPSHOT_HEADER.unpack_from(data)
+    except struct.error as e:
+        raise ProtocolError(f"Truncated snapshot: {e}") from None
+
+    cars: Dict[int, List[int]] = {}
+    if baseline_tick != NO_BASELINE:
+        baseline = baselines.get(baseline_tick)
+        if baseline is None:
+            raise ProtocolError(f"Snapshot {tick} refers to unknown baseline {baseline_tick}")
+        cars = dict(zip(baseline.ids.tolist(), baseline.states.tolist()))
+
+    offset = SNAPSHOT_HEADER.size
+    for player_id in data[offset:offset + removed]:
+        cars.pop(player_id, None)
+    offset += removed
+
+    try:
+        for _ in range(count):
+            player_id, mask = data[offset], data[offset + 1]
+            record, columns = _record_layout(mask)
+            values = record.unpack_from(data, offset)[2:]
+            offset += record.size
+            state = cars.get(player_id)
+            if state is None:
+                if mask != FULL_RECORD:
+                    raise ProtocolError(f"Delta for car {player_id} missing from the baseline")
+                state = cars[player_id] = [0] * STATE_FIELDS
+            previous_distance = state[DISTANCE]
+            for column, value in zip(columns, values):
+                state[column] = value
+            if mask & FIELD_DISTANCE_DELTA:
+                state[DISTANCE] += previous_distance
+    except (IndexError, struct.error) as e:
+        raise ProtocolError(f"Truncated snapshot: {e}") from None
+
+    ids = np.array(sorted(cars), dtype=np.uint8)
+    states = np.array([cars[player_id] for player_id in ids.tolist()], dtype=np.int64)
+    return Snapshot(tick, ids, states.reshape(len(ids), STATE_FIELDS)), input_ack
+
+
+def decode_hello(data: bytes) -> int:
+    """Decode a HELLO datagram into the client's nonce."""
+    try:
+        _, version, nonce = HELLO_FORMAT.unpack_from(data)
+    except struct.error as e:
+        raise ProtocolError(f"Truncated hello: {e}") from None
+    if version != PROTOCOL_VERSION:
+        raise ProtocolError(f"Unsupported protocol version {version}")
+    return nonce
+
+
+def decode_welcome(data: bytes) -> Welcome:
+    """Decode a WELCOME datagram."""
+    try:
+        _, version, *fields = WELCOME_FORMAT.unpack_from(data)
+    except struct.error as e:
+        raise ProtocolError(f"Truncated welcome: {e}") from None
+    if version != PROTOCOL_VERSION:
+        raise ProtocolError(f"Unsupported protocol version {version}")
+    return Welcome(*fields)
+
+
+def decode_input(data: bytes) -> InputPacket:
+    """Decode an INPUT datagram."""
+    try:
+        _, player_id, ack_tick, sequence, count = INPUT_HEADER.unpack_from(data)
+        inputs = [INPUT_PAIR.unpack_from(data, INPUT_HEADER.size + i * INPUT_PAIR.size)
+                  for i in range(count)]
+    except struct.error as e:
+        raise ProtocolError(f"Truncated input: {e}") from None
+    return InputPacket(player_id, ack_tick, sequence, inputs)
+
+
+def decode_bye(data: bytes) -> int:
+    """Decode a BYE datagram into the player id."""
+    try:
+        return BYE_FORMAT.unpack_from(data)[1]
+    except struct.error as e:
+        raise ProtocolError(f"Truncated bye: {e}") from None
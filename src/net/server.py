@@ -0,0 +1,346 @@
+# Authoritative race server over asyncio UDP.
+#
+# The server owns the simulation: every player's car is one entry of a
+# CarBatch stepped at a fixed tick rate. Clients send their inputs tagged
+# with sequence numbers; the server applies one input per player per tick
+# and tells each client the newest sequence number it applied, so the
+# client can replay its newer inputs on top of the server state.
+#
+# Every snapshot_interval ticks the server quantises all cars once and
+# sends each client the changes since the snapshot that client last
+# acknowledged. Clients that acknowledged the same snapshot get the same
+# body, so encoding costs scale with the number of distinct baselines
+# rather than the number of clients.
+import os
+import sys
+import asyncio
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+import numpy as np
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.utils.constants import PHYSICS_HZ
+from src.core.car_batch import CarBatch
+from src.core.track import Track
+from src.net import protocol
+from src.net.protocol import InputPacket, ProtocolError, Snapshot, Welcome
+
+DEFAULT_SNAPSHOT_RATE = 20  # Snapshots per second
+SNAPSHOT_HISTORY = 32  # Snapshots kept as delta baselines
+MAX_INPUT_BACKLOG = 4  # Queued inputs per player beyond which the oldest are dropped
+CLIENT_TIMEOUT = 5.0  # Seconds of silence before a player is dropped
+
+Address = Tuple[str, int]
+
+
+class Player:
+    """Server-side state of one connected client.
+
+    Attributes:
+        player_id: Id of the player's car, also its index in the CarBatch.
+        address: Address snapshots are sent to.
+        inputs: Received inputs not yet applied, as (sequence, throttle,
+            steering).
+        last_sequence: Sequence number of the newest input received.
+        applied_sequence: Sequence number of the newest input applied.
+        ack_tick: Newest snapshot the client acknowledged.
+        last_heard: Server clock time of the last datagram from the client.
+        bytes_sent: Snapshot bytes sent to the client.
+        bytes_received: Bytes received from the client.
+    """
+
+    def __init__(self, player_id: int, address: Address, now: float):
+        self.player_id = player_id
+        self.address = address
+        self.inputs: Deque[Tuple[int, float, float]] = deque()
+        self.last_sequence = 0
+        self.applied_sequence = 0
+        self.throttle = 0.0
+        self.steering = 0.0
+        self.ack_tick = protocol.NO_SNAPSHOT
+        self.last_heard = now
+        self.joined = now
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+
+class _ServerProtocol(asyncio.DatagramProtocol):
+    def __init__(self, server: 'RaceServer'):
+        self.server = server
+
+    def datagram_received(self, data: bytes, addr: Address):
+        self.server.handle_datagram(data, addr)
+
+
+class RaceServer:
+    """Runs the authoritative simulation and serves snapshots to clients.
+
+    Typical use::
+
+        server = RaceServer(seed=7)
+        host, port = await server.start('0.0.0.0', 7777)
+        await server.serve()
+    """
+
+    def __init__(self, track: Optional[Track] = None, seed: Optional[int] = None,
+                 screen_size: Tuple[int, int] = (1200, 800), max_players: int = 32,
+                 tick_rate: int = PHYSICS_HZ, snapshot_rate: int = DEFAULT_SNAPSHOT_RATE,
+                 timeout: float = CLIENT_TIMEOUT, capacity: int = 600,
+                 clock: Callable[[], float] = time.perf_counter):
+        """Create the server and its simulation.
+
+        Args:
+            track: Seeded track to race on. Clients regenerate it from its
+                seed, so it must be an unmodified generated track. When None
+                one is generated from ``seed``.
+            seed: Track seed when no track is given; random when None.
+            screen_size: Screen size the track is generated for.
+            max_players: Most players at once; every player's full car
+                record must fit in one snapshot datagram.
+            tick_rate: Simulation steps per second.
+            snapshot_rate: Snapshots sent per second.
+            timeout: Seconds without a datagram before a player is dropped.
+            capacity: Number of tick costs kept for statistics.
+            clock: Function returning the current time in seconds.
+        """
+        # Each player id takes at most one full record or removal per snapshot
+        if protocol.SNAPSHOT_HEADER.size + max_players * protocol.record_size() > protocol.MAX_DATAGRAM:
+            raise ValueError(f"max_players={max_players} does not fit in one snapshot datagram")
+        if track is None:
+            track = Track(*screen_size, num_lanes=protocol.NUM_LANES, seed=seed)
+        self.track = track
+        self.screen_size = (track.screen_width, track.screen_height)
+        self.max_players = max_players
+        self.tick_rate = tick_rate
+        self.dt = 1.0 / tick_rate
+        self.snapshot_interval = max(1, round(tick_rate / snapshot_rate))
+        self.timeout = timeout
+        self.clock = clock
+
+        self.cars = CarBatch(track, max_players, num_lanes=protocol.NUM_LANES)
+        self.throttle = np.zeros(max_players)
+        self.steering = np.zeros(max_players)
+        self.players: Dict[int, Player] = {}
+        self._by_address: Dict[Address, Player] = {}
+        self._free_ids = list(range(max_players - 1, -1, -1))
+        self.snapshots: 'OrderedDict[int, Snapshot]' = OrderedDict()
+
+        self.tick_count = 0
+        self.capacity = capacity
+        self.tick_costs = np.zeros(capacity, dtype=np.float64)
+        self.snapshot_count = 0
+        self.snapshot_time = 0.0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.transport: Optional[asyncio.DatagramTransport] = None
+        self.running = False
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> Address:
+        """Open the UDP socket.
+
+        Args:
+            host: Address to bind.
+            port: Port to bind; 0 picks a free port.
+
+        Returns:
+            The bound (host, port).
+        """
+        loop = asyncio.get_running_loop()
+        self.transport, _ = await loop.create_datagram_endpoint(
+            lambda: _ServerProtocol(self), local_addr=(host, port))
+        return self.transport.get_extra_info('sockname')[:2]
+
+    async def serve(self, duration: Optional[float] = None):
+        """Run ticks at the tick rate until stopped.
+
+        Args:
+            duration: Seconds to run for, or None until ``stop`` is called.
+        """
+        self.running = True
+        start = self.clock()
+        deadline = start
+        while self.running and (duration is None or self.clock() - start < duration):
+            self.tick()
+            deadline += self.dt
+            delay = deadline - self.clock()
+            if delay < -self.dt * 4:
+                deadline = self.clock()  # Too far behind to catch up
+            await asyncio.sleep(max(0.0, delay))
+        self.running = False
+
+    def stop(self):
+        """Make ``serve`` return after the current tick."""
+        self.running = False
+
+    def close(self):
+        """Tell every client the session ended and close the socket."""
+        self.running = False
+        if self.transport is not None:
+            for player in self.players.values():
+                self.transport.sendto(protocol.encode_bye(player.player_id), player.address)
+            self.transport.close()
+            self.transport = None
+
+    def handle_datagram(self, data: bytes, addr: Address):
+        """Handle one datagram from a client; malformed ones are ignored."""
+        if not data:
+            return
+        self.bytes_received += len(data)
+        try:
+            kind = data[0]
+            if kind == protocol.INPUT:
+                self._handle_input(protocol.decode_input(data), addr, len(data))
+            elif kind == protocol.HELLO:
+                self._handle_hello(protocol.decode_hello(data), addr)
+            elif kind == protocol.BYE:
+                player = self._by_address.get(addr)
+                if player is not None and player.player_id == protocol.decode_bye(data):
+                    self.remove_player(player.player_id)
+        except ProtocolError:
+            pass
+
+    def _handle_hello(self, nonce: int, addr: Address):
+        player = self._by_address.get(addr)
+        if player is None:
+            if not self._free_ids:
+                return  # Full; the client times out
+            player = self.add_player(addr)
+        welcome = Welcome(nonce, player.player_id, self.track.seed, *self.screen_size,
+                          self.tick_rate, self.snapshot_interval)
+        self._send(player, protocol.encode_welcome(welcome))
+
+    def _handle_input(self, packet: InputPacket, addr: Address, size: int):
+        player = self._by_address.get(addr)
+        if player is None or player.player_id != packet.player_id:
+            return
+        player.last_heard = self.clock()
+        player.bytes_received += size
+        if packet.ack_tick != protocol.NO_SNAPSHOT and (
+                player.ack_tick == protocol.NO_SNAPSHOT or packet.ack_tick > player.ack_tick):
+            player.ack_tick = packet.ack_tick
+
+        # Inputs are redundant across packets; queue only the new ones
+        first = packet.sequence - len(packet.inputs) + 1
+        for offset, (throttle, steering) in enumerate(packet.inputs):
+            sequence = first + offset
+            if sequence > player.last_sequence:
+                player.inputs.append((sequence, protocol.dequantize_input(throttle),
+                                      protocol.dequantize_input(steering)))
+                player.last_sequence = sequence
+        while len(player.inputs) > MAX_INPUT_BACKLOG:
+            player.inputs.popleft()
+
+    def add_player(self, address: Address) -> Player:
+        """Add a player and place their car on the start line.
+
+        Raises:
+            RuntimeError: If the server is full.
+        """
+        if not self._free_ids:
+            raise RuntimeError("Server is full")
+        player_id = self._free_ids.pop()
+        player = Player(player_id, address, self.clock())
+        self.players[player_id] = player
+        self._by_address[address] = player
+        mask = np.zeros(self.max_players, dtype=bool)
+        mask[player_id] = True
+        self.cars.reset(mask, distance=0.0, lane=protocol.start_lane(player_id))
+        return player
+
+    def remove_player(self, player_id: int):
+        """Remove a player; their car disappears from the next snapshot."""
+        player = self.players.pop(player_id, None)
+        if player is None:
+            return
+        del self._by_address[player.address]
+        self.throttle[player_id] = 0.0
+        self.steering[player_id] = 0.0
+        self._free_ids.append(player_id)
+
+    def tick(self):
+        """Apply one input per player, step the simulation and send snapshots."""
+        start = self.clock()
+        for player in list(self.players.values()):
+            if start - player.last_heard > self.timeout:
+                self.remove_player(player.player_id)
+                continue
+            # Without a new input the player keeps their last one
+            if player.inputs:
+                player.applied_sequence, player.throttle, player.steering = player.inputs.popleft()
+            self.throttle[player.player_id] = player.throttle
+            self.steering[player.player_id] = player.steering
+
+        self.cars.step(self.throttle, self.steering, self.dt)
+        self.tick_count += 1
+
+        if self.tick_count % self.snapshot_interval == 0:
+            snapshot_start = self.clock()
+            self._send_snapshots()
+            self.snapshot_time += self.clock() - snapshot_start
+            self.snapshot_count += 1
+
+        self.tick_costs[(self.tick_count - 1) % self.capacity] = self.clock() - start
+
+    def take_snapshot(self) -> Snapshot:
+        """Quantise the current state of every player's car."""
+        ids = np.array(sorted(self.players), dtype=np.int64)
+        cars = self.cars
+        return protocol.quantize_cars(
+            self.tick_count, ids, cars.distance_along_track[ids], cars.y[ids], cars.speed[ids],
+            cars.rotation[ids], cars.lane[ids], cars.is_changing_lanes[ids],
+            cars.lane_change_direction[ids])
+
+    def _send_snapshots(self):
+        snapshot = self.take_snapshot()
+        self.snapshots[snapshot.tick] = snapshot
+        while len(self.snapshots) > SNAPSHOT_HISTORY:
+            self.snapshots.popitem(last=False)
+
+        bodies: Dict[int, Tuple[bytes, int, int]] = {}
+        for player in self.players.values():
+            baseline = self.snapshots.get(player.ack_tick)
+            key = protocol.NO_BASELINE if baseline is None else baseline.tick
+            body = bodies.get(key)
+            if body is None:
+                body = bodies[key] = protocol.encode_snapshot_body(snapshot, baseline)
+            self._send(player, protocol.encode_snapshot(snapshot, baseline,
+                                                        player.applied_sequence, body))
+
+    def _send(self, player: Player, data: bytes):
+        if self.transport is None:
+            return
+        self.transport.sendto(data, player.address)
+        player.bytes_sent += len(data)
+        self.bytes_sent += len(data)
+
+    def get_stats(self) -> Dict[str, float]:
+        """Get tick cost and bandwidth statistics.
+
+        Returns:
+            Tick cost percentiles, mean and max in milliseconds over the
+            buffered ticks, the mean cost of sending snapshots, and the
+            snapshot bytes per second sent to each player on average.
+            Empty before the first tick.
+        """
+        data = self.tick_costs[:min(self.tick_count, self.capacity)] * 1000.0
+        if not len(data):
+            return {}
+        values = np.percentile(data, (50, 95, 99))
+        now = self.clock()
+        rates = [player.bytes_sent / max(now - player.joined, 1e-9)
+                 for player in self.players.values()]
+        return {
+            'tick_p50_ms': float(values[0]),
+            'tick_p95_ms': float(values[1]),
+            'tick_p99_ms': float(values[2]),
+            'tick_mean_ms': float(data.mean()),
+            'tick_max_ms': float(data.max()),
+            'snapshot_mean_ms': self.snapshot_time / max(self.snapshot_count, 1) * 1000.0,
+            'ticks': self.tick_count,
+            'players': len(self.players),
+            'bytes_per_player_per_s': float(np.mean(rates)) if rates else 0.0,
+        }
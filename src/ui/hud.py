@@ -1,37 +1,101 @@
 # Heads-Up Display (HUD) for the racing game.
+import os
+import sys
+import time
 import pygame
 import math
 
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.utils.constants import HUD_REFRESH_HZ
+from src.utils.text_cache import get_text_cache
+
 class HUD:
     # Manages the display of game information on screen.
+    #
+    # Every widget is kept as a cached surface in an overlay, a list of
+    # (surface, position) layers drawn with a single Surface.blits call per
+    # frame. Values are sampled at most refresh_hz times per second, and a
+    # widget's surface is only rebuilt when the text or bar it shows changes.
     
-    def __init__(self, screen):
+    def __init__(self, screen, refresh_hz=HUD_REFRESH_HZ, clock=time.perf_counter):
         # Initialize the HUD with the game screen
+        # Args:
+        #   screen: Surface to draw on
+        #   refresh_hz: How often displayed values are updated; 0 or None
+        #       updates them every frame
+        #   clock: Function returning the current time in seconds
         self.screen = screen
+        self.refresh_interval = 1.0 / refresh_hz if refresh_hz else 0.0
+        self.clock = clock
+        self._next_refresh = None
+        
+        # Fonts and rendered labels come from the shared text cache, so
+        # labels are only rasterised again when their text changes
+        self.text_cache = get_text_cache()
         
         # Try to load system fonts, fall back to default font if not available
         try:
-            self.font = pygame.font.SysFont('Arial', 24)
-            self.small_font = pygame.font.SysFont('Arial', 18)
+            self.font_name = 'Arial'
+            self.font_size = 24
+            self.small_font_size = 18
+            self.font = self.text_cache.get_font(self.font_size, self.font_name)
+            self.small_font = self.text_cache.get_font(self.small_font_size, self.font_name)
         except Exception as e:
             print(f"Warning: Could not load system fonts: {e}")
             print("Falling back to default font.")
             # Use pygame's default font
-            self.font = pygame.font.Font(None, 36)
-            self.small_font = pygame.font.Font(None, 24)
+            self.font_name = None
+            self.font_size = 36
+            self.small_font_size = 24
+            self.font = self.text_cache.get_font(self.font_size)
+            self.small_font = self.text_cache.get_font(self.small_font_size)
         
         # Colors
         self.text_color = (255, 255, 255)  # White
         self.speed_color = (0, 255, 0)     # Green
         self.warning_color = (255, 0, 0)   # Red
         
+        # Speed bar geometry; the background and border are baked into one
+        # surface and the indicator colour for every width into a table
+        self.bar_width = 150
+        self.bar_height = 20
+        self.bar_pos = (self.screen.get_width() - self.bar_width - 10, 50)
+        self._bar_frame = self._bake_bar_frame()
+        self._bar_colors = self._bake_bar_colors()
+        self._bar_surface = self._bar_frame.copy()
+        
+        # Content and surface of every layer, in drawing order, and the
+        # (surface, position) list handed to blits
+        self._layers = {}
+        self._blit_list = []
+        self._dirty = []
+        
+        # The controls help never changes, so it is laid out once
+        self._add_controls_help()
+    
     def render(self, lap_time, best_lap, lap_count, speed):
-        # Render the HUD elements
+        # Render the HUD elements and return the screen areas that changed
+        # since the previous render
         # Args:
         #   lap_time: Current lap time in seconds
         #   best_lap: Best lap time in seconds
         #   lap_count: Current lap number
         #   speed: Current speed of the car
+        now = self.clock()
+        if self._next_refresh is None or now >= self._next_refresh:
+            self._next_refresh = now + self.refresh_interval
+            self._refresh(lap_time, best_lap, lap_count, speed)
+        
+        dirty, self._dirty = self._dirty, []
+        if dirty:
+            self._blit_list = [(surface, rect) for _, surface, rect in self._layers.values()]
+        self.screen.blits(self._blit_list, doreturn=False)
+        return dirty
+    
+    def _refresh(self, lap_time, best_lap, lap_count, speed):
+        # Update every widget from the current values
         # Convert speed to km/h (assuming speed is in pixels/frame)
         speed_kmh = abs(speed) * 10
         
@@ -46,49 +110,76 @@ class HUD:
         self._draw_text(f"Lap: {lap_count}", 10, 10)
         self._draw_text(f"Time: {lap_time_str}", 10, 40)
         self._draw_text(f"Best: {best_lap_str}", 10, 70)
-        
-        # Draw controls help (only show for first few seconds)
-        self._draw_controls_help()
+    
+    def _set_layer(self, key, content, make_surface, pos):
+        # Replace a layer's surface if its content changed, marking the old
+        # and new areas dirty
+        # Args:
+        #   key: Layer identifier; new layers are drawn above existing ones
+        #   content: Value the layer shows, compared to detect changes
+        #   make_surface: Function building the surface for the content
+        #   pos: Top-left corner on the screen
+        previous = self._layers.get(key)
+        if previous is not None and previous[0] == content:
+            return
+        surface = make_surface()
+        rect = surface.get_rect(topleft=pos)
+        self._layers[key] = (content, surface, rect)
+        self._dirty.append(rect if previous is None else rect.union(previous[2]))
+    
+    def _bake_bar_frame(self):
+        # Draw the speed bar background and border once
+        frame = pygame.Surface((self.bar_width, self.bar_height)).convert(self.screen)
+        frame.fill((50, 50, 50))
+        pygame.draw.rect(frame, (200, 200, 200), frame.get_rect(), 2)
+        return frame
+    
+    def _bake_bar_colors(self):
+        # Indicator colour for every width, from green when empty to red when full
+        colors = []
+        for width in range(self.bar_width + 1):
+            speed_ratio = width / self.bar_width
+            r = int(min(255, speed_ratio * 2 * 255))
+            g = int(min(255, (1 - speed_ratio) * 2 * 255))
+            colors.append((r, g, 0))
+        return colors
     
     def _draw_speedometer(self, speed):
-        # Draw the speedometer on the screen
+        # Update the speedometer layers
         # Draw speed number
         speed_text = f"{int(speed)} km/h"
-        speed_surface = self.font.render(speed_text, True, self.speed_color)
-        self.screen.blit(speed_surface, (self.screen.get_width() - 150, 10))
-        
-        # Draw speed bar
-        bar_width = 150
-        bar_height = 20
-        bar_x = self.screen.get_width() - bar_width - 10
-        bar_y = 50
-        
-        # Background
-        pygame.draw.rect(self.screen, (50, 50, 50), (bar_x, bar_y, bar_width, bar_height))
-        
-        # Speed indicator (green to red)
-        speed_ratio = min(speed / 200.0, 1.0)  # Cap at 200 km/h for display
-        indicator_width = int(bar_width * speed_ratio)
+        self._set_layer('speed_text', speed_text,
+                        lambda: self.text_cache.render(speed_text, self.speed_color,
+                                                       self.font_size, self.font_name),
+                        (self.screen.get_width() - 150, 10))
         
-        # Color gradient from green to red
-        r = int(min(255, speed_ratio * 2 * 255))
-        g = int(min(255, (1 - speed_ratio) * 2 * 255))
-        
-        pygame.draw.rect(self.screen, (r, g, 0), (bar_x, bar_y, indicator_width, bar_height))
-        
-        # Draw border
-        pygame.draw.rect(self.screen, (200, 200, 200), (bar_x, bar_y, bar_width, bar_height), 2)
+        # Speed indicator, capped at 200 km/h for display
+        speed_ratio = min(speed / 200.0, 1.0)
+        indicator_width = int(self.bar_width * speed_ratio)
+        self._set_layer('speed_bar', indicator_width,
+                        lambda: self._draw_speed_bar(indicator_width), self.bar_pos)
+    
+    def _draw_speed_bar(self, indicator_width):
+        # Composite the baked frame and an indicator of the given width; the
+        # indicator stays inside the 2 pixel border
+        self._bar_surface.blit(self._bar_frame, (0, 0))
+        inner = pygame.Rect(0, 0, indicator_width, self.bar_height).clip(
+            self._bar_surface.get_rect().inflate(-4, -4))
+        if inner.width > 0:
+            self._bar_surface.fill(self._bar_colors[indicator_width], inner)
+        return self._bar_surface
     
     def _draw_text(self, text, x, y, color=None):
-        # Helper method to draw text on the screen
+        # Helper method to update a text layer
         if color is None:
             color = self.text_color
-            
-        text_surface = self.font.render(text, True, color)
-        self.screen.blit(text_surface, (x, y))
+        
+        self._set_layer(('text', x, y), (text, color),
+                        lambda: self.text_cache.render(text, color, self.font_size, self.font_name),
+                        (x, y))
     
-    def _draw_controls_help(self):
-        # Display the controls help text
+    def _add_controls_help(self):
+        # Lay out the controls help text
         controls = [
             "Controls:",
             "↑/W - Accelerate",
@@ -100,15 +191,17 @@ class HUD:
         y_pos = self.screen.get_height() - 120
         for i, line in enumerate(controls):
             color = (200, 200, 0) if i == 0 else (150, 150, 150)
-            text_surface = self.small_font.render(line, True, color)
-            self.screen.blit(text_surface, (10, y_pos + i * 20))
+            self._set_layer(('help', i), line,
+                            lambda: self.text_cache.render(line, color, self.small_font_size,
+                                                           self.font_name),
+                            (10, y_pos + i * 20))
     
     @staticmethod
     def _format_time(seconds):
         # Format time in seconds to MM:SS.mmm format
         if seconds == float('inf'):
             return "--:--.---"
-            
+        
         minutes = int(seconds // 60)
         seconds = seconds % 60
         return f"{minutes:02d}:{seconds:06.3f}"
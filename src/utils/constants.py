@@ -1,9 +1,12 @@
 # Game-wide constants and configuration settings.
+import os
 
 # Screen dimensions
 SCREEN_WIDTH = 1200
 SCREEN_HEIGHT = 800
 FPS = 60
+PHYSICS_HZ = 60  # Fixed simulation rate; car tuning is per 60 Hz tick
+HUD_REFRESH_HZ = 15  # How often HUD values such as timers are redrawn
 
 # Colors (RGB)
 BLACK = (0, 0, 0)
@@ -23,6 +26,7 @@ CAR_ACCELERATION = 0.2
 CAR_MAX_SPEED = 10
 CAR_ROTATION_SPEED = 0.05
 CAR_FRICTION = 0.95
+ROTATION_ATLAS_STEP = 0.5  # Degrees between pre-rendered car sprite rotations
 
 # Track settings
 TRACK_WIDTH = 800
@@ -40,5 +44,11 @@ HUD_TEXT_COLOR = WHITE
 HUD_SPEED_COLOR = GREEN
 HUD_WARNING_COLOR = RED
 
+# Data directories
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'data'))
+TRACK_DATA_DIR = os.path.join(DATA_DIR, 'tracks')
+TRACK_CACHE_DIR = os.path.join(TRACK_DATA_DIR, 'cache')  # Baked tracks keyed by seed
+SAVEGAME_DIR = os.path.join(DATA_DIR, 'savegames')
+
 # Input settings
-INPUT_DEADZONE = 0.1  # For gamepad support (not implemented yet)
+INPUT_DEADZONE = 0.1  # Gamepad stick deflection ignored around the centre
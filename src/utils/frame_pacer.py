@@ -0,0 +1,193 @@
+# High-precision frame pacing with jitter statistics.
+import time
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+from src.utils.constants import FPS
+
+PERCENTILES = (50, 95, 99)
+
+# Time before a deadline that is spun rather than slept, in seconds. The
+# margin adapts to measured sleep overshoot between these bounds.
+MIN_SPIN_MARGIN = 0.0005
+DEFAULT_SPIN_MARGIN = 0.002
+MAX_SPIN_MARGIN = 0.004
+
+# Waking this fraction of a frame past the deadline counts as a missed deadline
+LATE_WAKE_FRACTION = 0.1
+
+# Longest single sleep while a poll callback is given, so events are
+# picked up within about a millisecond of arriving
+POLL_INTERVAL = 0.001
+
+
+class FramePacer:
+    """Paces frames to a target rate using ``time.perf_counter``.
+
+    Frame deadlines are scheduled at fixed intervals from the first frame,
+    so rounding never accumulates into drift. ``wait`` sleeps until shortly
+    before the deadline and spins for the rest. Sleep overshoot is measured
+    and the spin margin adapts to it, so coarse OS timers cost a little
+    CPU instead of a late frame. A frame whose work overruns its deadline,
+    or whose wait ends well past it, counts as missed. After an overrun of
+    more than a whole frame the schedule restarts from now rather than
+    rushing to catch up.
+
+    With ``vsync`` the display's buffer swap already blocks until the next
+    refresh, so ``wait`` does not sleep. It tracks the refresh period from
+    measured intervals instead, and snaps the returned frame time to whole
+    refresh periods so timestamp noise does not reach the physics.
+    """
+
+    def __init__(self, target_hz: Optional[float] = FPS, vsync: bool = False,
+                 capacity: int = 600, clock: Callable[[], float] = time.perf_counter,
+                 sleep: Callable[[float], None] = time.sleep):
+        """Create the pacer.
+
+        Args:
+            target_hz: Frames per second to pace to; None or 0 does not wait.
+                With vsync this is the expected refresh rate.
+            vsync: Track the display refresh instead of sleeping.
+            capacity: Number of frame intervals kept for statistics.
+            clock: Function returning the current time in seconds.
+            sleep: Function sleeping for a number of seconds.
+        """
+        self.target_hz = target_hz
+        self.period = 1.0 / target_hz if target_hz else 0.0
+        self.vsync = vsync
+        self.capacity = capacity
+        self.clock = clock
+        self.sleep = sleep
+
+        self.spin_margin = DEFAULT_SPIN_MARGIN
+        self.refresh_period = self.period  # Measured refresh period with vsync
+        self.frame_count = 0
+        self.missed_deadlines = 0
+        self.intervals = np.zeros(capacity, dtype=np.float64)
+
+        self._last: Optional[float] = None
+        self._deadline = 0.0
+
+    def start(self):
+        """Start the schedule from now; called automatically on the first wait."""
+        self._last = self.clock()
+        self._deadline = self._last + self.period
+
+    def wait(self, poll: Optional[Callable[[], None]] = None) -> float:
+        """Wait for the end of the current frame.
+
+        Args:
+            poll: Called between sleeps, e.g. to pump input events while
+                waiting. Sleeps are then cut into POLL_INTERVAL slices. It
+                is not called during the final spin.
+
+        Returns:
+            Seconds since the previous wait returned, the frame time to
+            simulate next.
+        """
+        if self._last is None:
+            self.start()
+
+        if self.vsync:
+            now = self.clock()
+            interval = now - self._last
+            self._last = now
+            self._record(interval, interval > self.refresh_period * 1.5)
+            return self._snap_to_refresh(interval)
+
+        missed = False
+        if self.period:
+            now = self.clock()
+            if now > self._deadline:
+                missed = True
+                if now - self._deadline > self.period:
+                    self._deadline = now  # Too late to keep the schedule
+            self._sleep_until(self._deadline, poll)
+
+        now = self.clock()
+        if self.period and now - self._deadline > self.period * LATE_WAKE_FRACTION:
+            missed = True  # The OS woke us up too late
+        interval = now - self._last
+        self._last = now
+        self._deadline += self.period
+        self._record(interval, missed)
+        return interval
+
+    def _sleep_until(self, deadline: float, poll: Optional[Callable[[], None]]):
+        # Sleep while the deadline is further away than the spin margin,
+        # then spin; each sleep's overshoot tunes the margin
+        while True:
+            remaining = deadline - self.clock()
+            if remaining <= self.spin_margin:
+                break
+            if poll is not None:
+                poll()
+                remaining = deadline - self.clock()
+                if remaining <= self.spin_margin:
+                    break
+            requested = remaining - self.spin_margin
+            if poll is not None:
+                requested = min(requested, POLL_INTERVAL)
+            before = self.clock()
+            self.sleep(requested)
+            overshoot = self.clock() - before - requested
+            self._adapt_margin(overshoot)
+        while self.clock() < deadline:
+            pass
+
+    def _adapt_margin(self, overshoot: float):
+        # Rise quickly after a late wake-up, decay slowly when sleep is accurate
+        target = min(MAX_SPIN_MARGIN, max(MIN_SPIN_MARGIN, overshoot * 1.5))
+        if target > self.spin_margin:
+            self.spin_margin = target
+        else:
+            self.spin_margin += (target - self.spin_margin) * 0.05
+
+    def _snap_to_refresh(self, interval: float) -> float:
+        # Follow the measured refresh period, then report whole refreshes
+        # when the interval is within 10% of one
+        if self.frame_count >= 8:
+            recent = self._recorded()[-min(self.frame_count, 120):]
+            self.refresh_period = float(np.median(recent))
+        if not self.refresh_period:
+            return interval
+        refreshes = max(1, round(interval / self.refresh_period))
+        snapped = refreshes * self.refresh_period
+        return snapped if abs(interval - snapped) < self.refresh_period * 0.1 else interval
+
+    def _record(self, interval: float, missed: bool):
+        self.intervals[self.frame_count % self.capacity] = interval
+        self.frame_count += 1
+        self.missed_deadlines += missed
+
+    def _recorded(self) -> np.ndarray:
+        # Buffered intervals, oldest first
+        count = min(self.frame_count, self.capacity)
+        start = self.frame_count % self.capacity if self.frame_count > self.capacity else 0
+        return np.roll(self.intervals[:count], -start)
+
+    def get_stats(self) -> Dict[str, float]:
+        """Get frame interval statistics over the buffered frames.
+
+        Returns:
+            Interval percentiles, mean and max in milliseconds, jitter
+            (the standard deviation of intervals) in milliseconds, and the
+            missed deadline count and ratio over all frames. Empty if no
+            frame has been recorded.
+        """
+        data = self._recorded() * 1000.0
+        if not len(data):
+            return {}
+        values = np.percentile(data, PERCENTILES)
+        stats = {f"p{q}_ms": float(values[i]) for i, q in enumerate(PERCENTILES)}
+        stats.update({
+            'target_ms': self.period * 1000.0,
+            'mean_ms': float(data.mean()),
+            'max_ms': float(data.max()),
+            'jitter_ms': float(data.std()),
+            'frames': self.frame_count,
+            'missed_deadlines': self.missed_deadlines,
+            'missed_ratio': self.missed_deadlines / self.frame_count,
+        })
+        return stats
@@ -0,0 +1,171 @@
+# Lightweight per-phase frame profiler.
+import json
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pygame
+
+from src.utils.text_cache import get_text_cache
+
+# Phases recorded by RacingGame. car_update is measured inside update.
+FRAME_PHASES = (
+    'handle_events',
+    'update',
+    'car_update',
+    'track_render',
+    'car_render',
+    'hud_render',
+    'display_flip',
+    'wait',
+)
+
+PERCENTILES = (50, 95, 99)
+
+
+class FrameProfiler:
+    """Records wall time per frame phase into a fixed-size ring buffer.
+
+    Each frame is one row of a NumPy array with a column per phase and a
+    final column for the whole frame. Once the buffer is full the oldest
+    frames are overwritten, so memory use stays constant.
+    """
+
+    def __init__(self, capacity: int = 600, phases: Sequence[str] = FRAME_PHASES,
+                 budget_ms: float = 1000.0 / 60):
+        """Create the profiler.
+
+        Args:
+            capacity: Number of frames kept in the ring buffer.
+            phases: Names of the phases to record.
+            budget_ms: Frame time budget used for the over-budget count.
+        """
+        self.phases = tuple(phases)
+        self.capacity = capacity
+        self.budget_ms = budget_ms
+        self.samples = np.zeros((capacity, len(self.phases) + 1), dtype=np.float64)
+        self.frame_count = 0
+
+        self._columns = {name: i for i, name in enumerate(self.phases)}
+        self._current = [0.0] * len(self.phases)
+        self._frame_start = time.perf_counter()
+        self._last_mark = self._frame_start
+
+        # Overlay state
+        self._overlay_lines: List[str] = []
+        self._overlay_frame = -1
+
+    def begin_frame(self):
+        """Start timing a new frame."""
+        self._current = [0.0] * len(self.phases)
+        self._frame_start = self._last_mark = time.perf_counter()
+
+    def mark(self, phase: str):
+        """Charge the time since the previous mark (or frame start) to a phase."""
+        now = time.perf_counter()
+        self._current[self._columns[phase]] += now - self._last_mark
+        self._last_mark = now
+
+    def add(self, phase: str, seconds: float):
+        """Add a separately measured duration to a phase."""
+        self._current[self._columns[phase]] += seconds
+
+    def end_frame(self):
+        """Store the current frame in the ring buffer."""
+        row = self.samples[self.frame_count % self.capacity]
+        row[:-1] = self._current
+        row[-1] = time.perf_counter() - self._frame_start
+        self.frame_count += 1
+
+    def _recorded(self) -> np.ndarray:
+        # Rows of the ring buffer that hold real frames, in milliseconds
+        return self.samples[:min(self.frame_count, self.capacity)] * 1000.0
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """Get percentile timings for every phase over the buffered frames.
+
+        Returns:
+            Mapping from phase name (plus ``'frame'``) to p50/p95/p99, mean
+            and max in milliseconds. Empty if no frame has been recorded.
+        """
+        data = self._recorded()
+        if not len(data):
+            return {}
+
+        values = np.percentile(data, PERCENTILES, axis=0)
+        means = data.mean(axis=0)
+        maxes = data.max(axis=0)
+        stats = {}
+        for column, name in enumerate(self.phases + ('frame',)):
+            stats[name] = {f"p{q}_ms": float(values[i, column]) for i, q in enumerate(PERCENTILES)}
+            stats[name]['mean_ms'] = float(means[column])
+            stats[name]['max_ms'] = float(maxes[column])
+        return stats
+
+    def dump(self, path: str, extra: Optional[Dict] = None):
+        """Write the current statistics to a JSON file.
+
+        Args:
+            path: Destination file path.
+            extra: Further top-level entries for the report, e.g. pacing
+                statistics.
+        """
+        data = self._recorded()
+        report = {
+            'frames': self.frame_count,
+            'buffered_frames': len(data),
+            'budget_ms': self.budget_ms,
+            'over_budget_frames': int(np.count_nonzero(data[:, -1] > self.budget_ms)) if len(data) else 0,
+            'phases': self.get_stats(),
+        }
+        if extra:
+            report.update(extra)
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    def render_overlay(self, screen: pygame.Surface, refresh_frames: int = 30) -> pygame.Rect:
+        """Draw a table of phase percentiles in the bottom-right corner.
+
+        The table is recomputed every ``refresh_frames`` frames so that the
+        overlay itself stays cheap.
+
+        Args:
+            screen: Surface to draw on.
+            refresh_frames: Frames between statistic refreshes.
+
+        Returns:
+            The screen area covered by the table.
+        """
+        if self.frame_count - self._overlay_frame >= refresh_frames or not self._overlay_lines:
+            self._overlay_frame = self.frame_count
+            self._overlay_lines = ["phase            p50    p95    p99 ms"]
+            for name, stat in self.get_stats().items():
+                self._overlay_lines.append(
+                    f"{name:<14}{stat['p50_ms']:>6.2f} {stat['p95_ms']:>6.2f} {stat['p99_ms']:>6.2f}")
+
+        x = screen.get_width() - 260
+        y = screen.get_height() - 18 * len(self._overlay_lines) - 10
+        text_cache = get_text_cache()
+        area = pygame.Rect(x, y, 0, 0)
+        for i, line in enumerate(self._overlay_lines):
+            text_surface = text_cache.render(line, (255, 255, 0), 20, background=(0, 0, 0))
+            area.union_ip(screen.blit(text_surface, (x, y + i * 18)))
+        return area
+
+
+class NullProfiler:
+    """Drop-in profiler that records nothing, used when profiling is off."""
+
+    frame_count = 0
+
+    def begin_frame(self):
+        pass
+
+    def mark(self, phase: str):
+        pass
+
+    def add(self, phase: str, seconds: float):
+        pass
+
+    def end_frame(self):
+        pass
@@ -0,0 +1,119 @@
+# Adaptive rendering quality driven by measured frame times.
+from typing import List, NamedTuple, Optional, Sequence
+
+from src.utils.constants import FPS, ROTATION_ATLAS_STEP
+
+
+class QualityTier(NamedTuple):
+    """Rendering settings for one quality level.
+
+    Attributes:
+        name: Short label for logs and overlays.
+        show_debug: Draw the car's debug text.
+        rotation_step: Angle step of the car sprite rotations, in degrees.
+        max_obstacles: Most obstacles drawn per frame, or None for all.
+        render_scale: Resolution the world is drawn at before being scaled
+            up to the screen; the HUD is always drawn at full resolution.
+    """
+    name: str
+    show_debug: bool = True
+    rotation_step: float = ROTATION_ATLAS_STEP
+    max_obstacles: Optional[int] = None
+    render_scale: float = 1.0
+
+
+# Highest quality first. Each tier keeps the savings of the tiers above it,
+# shedding the least visible work first. The default tiers keep full
+# resolution: with software rendering the extra scaling blit costs more
+# than drawing the world at a lower resolution saves. Tiers with a
+# render_scale below 1 can be passed in where scaling is cheap.
+QUALITY_TIERS = (
+    QualityTier('high'),
+    QualityTier('no-debug', show_debug=False),
+    QualityTier('coarse-rotation', show_debug=False, rotation_step=3.0),
+    QualityTier('few-obstacles', show_debug=False, rotation_step=3.0, max_obstacles=8),
+)
+
+
+class QualityController:
+    """Steps through quality tiers to keep frame work within a budget.
+
+    Frame times are collected in windows of ``window`` frames. A window
+    whose ``percentile`` frame time exceeds ``downgrade_at`` times the
+    budget drops one tier. Only after ``upgrade_after`` windows in a row
+    below ``upgrade_at`` times the budget does quality go back up one tier,
+    so a tier that only just fits is not left and re-entered every window.
+
+    Frame times should cover the frame's work only, not the time spent
+    waiting for the next frame.
+    """
+
+    def __init__(self, tiers: Sequence[QualityTier] = QUALITY_TIERS, budget: float = 1.0 / FPS,
+                 window: int = 30, percentile: float = 0.9, downgrade_at: float = 0.9,
+                 upgrade_at: float = 0.6, upgrade_after: int = 4):
+        """Create the controller at the highest tier.
+
+        Args:
+            tiers: Quality tiers, highest quality first.
+            budget: Frame time budget in seconds.
+            window: Frames per measurement window.
+            percentile: Frame time percentile compared against the budget,
+                so occasional slow frames count and not just the average.
+            downgrade_at: Fraction of the budget above which quality drops.
+            upgrade_at: Fraction of the budget below which quality may rise.
+            upgrade_after: Consecutive fast windows needed to raise quality.
+        """
+        if not tiers:
+            raise ValueError("At least one quality tier is required")
+        self.tiers = tuple(tiers)
+        self.budget = budget
+        self.window = window
+        self.percentile = percentile
+        self.downgrade_at = downgrade_at
+        self.upgrade_at = upgrade_at
+        self.upgrade_after = upgrade_after
+        self.tier_index = 0
+        self.changes = 0
+        self.last_load = 0.0  # Last window's frame time percentile over the budget
+        self._samples: List[float] = []
+        self._fast_windows = 0
+
+    @property
+    def tier(self) -> QualityTier:
+        return self.tiers[self.tier_index]
+
+    def record(self, frame_time: float) -> Optional[QualityTier]:
+        """Add one frame's work time.
+
+        Args:
+            frame_time: Seconds spent on the frame, excluding any wait.
+
+        Returns:
+            The new tier when this frame completes a window that changes
+            quality, otherwise None.
+        """
+        self._samples.append(frame_time)
+        if len(self._samples) < self.window:
+            return None
+
+        samples = sorted(self._samples)
+        self._samples.clear()
+        self.last_load = samples[min(len(samples) - 1, int(len(samples) * self.percentile))] / self.budget
+
+        if self.last_load > self.downgrade_at:
+            self._fast_windows = 0
+            if self.tier_index + 1 < len(self.tiers):
+                return self._set_tier(self.tier_index + 1)
+        elif self.last_load < self.upgrade_at:
+            self._fast_windows += 1
+            if self._fast_windows >= self.upgrade_after and self.tier_index > 0:
+                self._fast_windows = 0
+                return self._set_tier(self.tier_index - 1)
+        else:
+            self._fast_windows = 0
+        return None
+
+    def _set_tier(self, index: int) -> QualityTier:
+        self.tier_index = index
+        self.changes += 1
+        return self.tier
@@ -0,0 +1,65 @@
+# Pre-rendered sprite rotations for fast per-frame lookups.
+import math
+from typing import Dict, Optional, Tuple
+
+import pygame
+
+
+class RotationAtlas:
+    """Cache of a sprite rotated at quantized angles.
+
+    Angles are rounded to the nearest multiple of ``step`` degrees. Frames
+    inside ``prerender_range`` are rendered up front. Any other angle is
+    rendered the first time it is requested and kept, so the atlas never
+    holds more than ``360 / step`` frames.
+    """
+
+    def __init__(self, surface: pygame.Surface, step: float = 0.5,
+                 prerender_range: Optional[Tuple[float, float]] = None):
+        """Create the atlas.
+
+        Args:
+            surface: Unrotated source sprite.
+            step: Angle quantization in degrees. Must divide 360 evenly.
+            prerender_range: Optional (min, max) angles in degrees to render
+                immediately.
+
+        Raises:
+            ValueError: If ``step`` is not positive or does not divide 360.
+        """
+        slots = 360 / step if step > 0 else 0
+        if step <= 0 or not math.isclose(slots, round(slots)):
+            raise ValueError(f"Rotation step must evenly divide 360 degrees, got {step}")
+
+        self.surface = surface
+        self.step = step
+        self._slots = int(round(slots))
+        self._frames: Dict[int, pygame.Surface] = {}
+
+        if prerender_range is not None:
+            first = int(math.floor(prerender_range[0] / step))
+            last = int(math.ceil(prerender_range[1] / step))
+            for index in range(first, last + 1):
+                self._frame(index % self._slots)
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def _frame(self, slot: int) -> pygame.Surface:
+        # Render and store the frame for a slot on first use
+        frame = self._frames.get(slot)
+        if frame is None:
+            frame = pygame.transform.rotate(self.surface, slot * self.step)
+            self._frames[slot] = frame
+        return frame
+
+    def get(self, angle: float) -> pygame.Surface:
+        """Get the sprite rotated counter-clockwise by ``angle`` degrees.
+
+        Args:
+            angle: Rotation in degrees, as passed to ``pygame.transform.rotate``.
+
+        Returns:
+            The cached rotated surface. Callers must not draw on it.
+        """
+        return self._frame(int(round(angle / self.step)) % self._slots)
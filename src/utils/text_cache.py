@@ -0,0 +1,106 @@
+# Shared cache of fonts and rendered text surfaces.
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import pygame
+
+Color = Tuple[int, ...]
+FontKey = Tuple[Optional[str], int]
+
+
+class TextCache:
+    """Caches fonts and rendered text surfaces across frames.
+
+    Each font is created once per (name, size). Rendered surfaces are keyed
+    by font, text and colours, and are evicted least-recently-used first
+    once ``max_entries`` is reached. Text that stays the same from frame to
+    frame is therefore rasterised only once.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        """Create an empty cache.
+
+        Args:
+            max_entries: Maximum number of rendered text surfaces kept.
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._fonts: Dict[FontKey, pygame.font.Font] = {}
+        self._surfaces: 'OrderedDict[tuple, pygame.Surface]' = OrderedDict()
+        self._quit_hook_registered = False
+
+    def __len__(self) -> int:
+        return len(self._surfaces)
+
+    def clear(self):
+        """Drop every cached font and surface."""
+        self._fonts.clear()
+        self._surfaces.clear()
+
+    def _on_pygame_quit(self):
+        # Fonts are invalid once pygame shuts down; pygame forgets quit
+        # hooks after calling them, so register again with the next font
+        self.clear()
+        self._quit_hook_registered = False
+
+    def get_font(self, size: int, name: Optional[str] = None) -> pygame.font.Font:
+        """Get a font, creating it on first use.
+
+        Args:
+            size: Font size in points.
+            name: System font name, or None for pygame's default font.
+
+        Returns:
+            The cached font.
+        """
+        key = (name, size)
+        font = self._fonts.get(key)
+        if font is None:
+            if not self._quit_hook_registered:
+                pygame.register_quit(self._on_pygame_quit)
+                self._quit_hook_registered = True
+            if not pygame.font.get_init():
+                pygame.font.init()
+            font = pygame.font.SysFont(name, size) if name else pygame.font.Font(None, size)
+            self._fonts[key] = font
+        return font
+
+    def render(self, text: str, color: Color, size: int = 24, name: Optional[str] = None,
+               background: Optional[Color] = None) -> pygame.Surface:
+        """Get a rendered text surface, rasterising it only on a cache miss.
+
+        Args:
+            text: Text to render.
+            color: Text colour.
+            size: Font size in points.
+            name: System font name, or None for pygame's default font.
+            background: Optional background colour.
+
+        Returns:
+            The cached surface. Callers must not draw on it.
+        """
+        key = (name, size, text, color, background)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = self.get_font(size, name).render(text, True, color, background)
+        self._surfaces[key] = surface
+        if len(self._surfaces) > self.max_entries:
+            self._surfaces.popitem(last=False)
+        return surface
+
+
+_shared_cache: Optional[TextCache] = None
+
+
+def get_text_cache() -> TextCache:
+    """Get the text cache shared by the track, car and HUD."""
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = TextCache()
+    return _shared_cache
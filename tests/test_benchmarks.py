@@ -0,0 +1,65 @@
+"""Unit tests for the benchmark runner."""
+import unittest
+import json
+import tempfile
+from unittest import mock
+import sys
+import os
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks import run_benchmarks
+from benchmarks.run_benchmarks import collect_benchmarks, compare, main, measure
+
+def report(**medians):
+    return {'results': {name: {'median_us': value} for name, value in medians.items()}}
+
+class TestBenchmarks(unittest.TestCase):
+    """Test cases for timing and baseline comparison."""
+    
+    def test_compare_flags_slowdowns_over_threshold(self):
+        """Only benchmarks slower than the threshold are regressions."""
+        baseline = report(a=10.0, b=10.0, c=10.0)
+        current = report(a=12.0, b=13.0, c=5.0, new=99.0)
+        regressions = compare(current, baseline, threshold=0.25)
+        self.assertEqual([r['name'] for r in regressions], ['b'])
+        self.assertAlmostEqual(regressions[0]['ratio'], 1.3)
+    
+    def test_measure_reports_per_call_time(self):
+        """measure calibrates the call count and reports microseconds."""
+        result = measure(lambda: None, repeat=3, min_time=0.001)
+        self.assertGreater(result['calls_per_run'], 1)
+        self.assertLessEqual(result['min_us'], result['median_us'])
+    
+    def test_fixtures_built_only_when_run(self):
+        """Listing benchmarks builds no fixtures, so filtered runs stay cheap."""
+        with mock.patch.object(run_benchmarks, 'Track') as track:
+            names = [name for name, _ in collect_benchmarks(display=None)]
+        track.assert_not_called()
+        self.assertIn('track.render[size=800x600]', names)
+        self.assertIn('car.render[cars=10]', names)
+        self.assertEqual(len(names), len(set(names)))
+    
+    def test_baseline_round_trip(self):
+        """A saved baseline passes, and a much faster baseline fails."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            baseline = os.path.join(temp_dir, 'baseline.json')
+            output = os.path.join(temp_dir, 'results.json')
+            args = ['--filter', 'get_path_point[points=1000]', '--repeat', '1',
+                    '--min-time', '0.001', '--baseline', baseline]
+            self.assertEqual(main(args + ['--save-baseline']), 0)
+            self.assertEqual(main(args + ['--output', output, '--threshold', '100']), 0)
+            with open(output) as f:
+                self.assertIn('track.get_path_point[points=1000]', json.load(f)['results'])
+            
+            with open(baseline) as f:
+                data = json.load(f)
+            for result in data['results'].values():
+                result['median_us'] /= 1000
+            with open(baseline, 'w') as f:
+                json.dump(data, f)
+            self.assertEqual(main(args), 1)
+
+if __name__ == '__main__':
+    unittest.main()
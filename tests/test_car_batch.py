@@ -0,0 +1,86 @@
+"""Unit tests for the vectorized car simulator."""
+import unittest
+import sys
+import os
+
+import numpy as np
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.car import Car
+from src.core.car_batch import CarBatch
+from src.core.track import Track
+
+class TestCarBatch(unittest.TestCase):
+    """Test cases for CarBatch."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.track = Track(1200, 800)
+        self.dt = 1/60  # 60 FPS
+    
+    def test_matches_car_update(self):
+        """Batch results match Car.update for random inputs."""
+        rng = np.random.default_rng(42)
+        num_cars = 8
+        cars = [Car(100, 400) for _ in range(num_cars)]
+        for i, car in enumerate(cars):
+            car.acceleration = 0.05 + 0.02 * i
+            car.lane_change_speed = 0.1 + 0.05 * i
+        batch = CarBatch.from_cars(self.track, cars)
+        
+        for _ in range(240):
+            throttle = rng.choice([-1.0, -0.5, 0.0, 0.05, 1.0], size=num_cars)
+            steering = rng.choice([-1.0, 0.0, 1.0], size=num_cars, p=[0.05, 0.9, 0.05])
+            for car, t, s in zip(cars, throttle, steering):
+                car.update(float(t), float(s), self.dt, self.track)
+            batch.step(throttle, steering, self.dt)
+        
+        for i, car in enumerate(cars):
+            state = batch.get_state(i)
+            self.assertEqual(state['lane'], car.lane)
+            self.assertEqual(state['is_changing_lanes'], car.is_changing_lanes)
+            for name in ('speed', 'distance_along_track', 'x', 'y', 'rotation'):
+                self.assertAlmostEqual(state[name], getattr(car, name), places=6, msg=name)
+    
+    def test_scalar_inputs_broadcast(self):
+        """Scalar inputs apply to every car in the batch."""
+        batch = CarBatch(self.track, 100, start_y=400)
+        for _ in range(60):
+            batch.step(1.0, 0.0, self.dt)
+        self.assertTrue(np.all(batch.speed > 0.5))
+        self.assertTrue(np.all(batch.distance_along_track == batch.distance_along_track[0]))
+    
+    def test_per_car_tuning(self):
+        """Per-car tuning values change how far each car travels."""
+        batch = CarBatch(self.track, 3, start_y=400, acceleration=[0.05, 0.1, 0.2])
+        for _ in range(60):
+            batch.step(1.0, 0.0, self.dt)
+        self.assertTrue(np.all(np.diff(batch.distance_along_track) > 0))
+    
+    def test_lane_limits(self):
+        """Cars never leave the outer lanes."""
+        batch = CarBatch(self.track, 2, start_y=400, start_lane=[1, 4])
+        for _ in range(120):
+            batch.step(1.0, [-1.0, 1.0], self.dt)
+        np.testing.assert_array_equal(batch.lane, [1, 4])
+    
+    def test_unknown_tuning_rejected(self):
+        """Misspelt tuning parameters raise an error."""
+        with self.assertRaises(ValueError):
+            CarBatch(self.track, 1, accel=0.3)
+
+    def test_set_state_round_trip(self):
+        """set_state restores a state taken with get_state."""
+        batch = CarBatch(self.track, 2, start_y=400)
+        for _ in range(30):
+            batch.step(1.0, [0.0, 1.0], self.dt)
+        saved = batch.get_state(1)
+        batch.set_state(0, saved)
+        self.assertEqual(batch.get_state(0), saved)
+        with self.assertRaises(ValueError):
+            batch.set_state(0, {'velocity': 1.0})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+"""Unit tests for road-edge and obstacle collisions."""
+import unittest
+import sys
+import os
+
+import numpy as np
+import pygame
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.car import Car
+from src.core.collision import SegmentGrid, segments_intersect_rect
+from src.core.track import Track
+
+class TestSegmentRectIntersection(unittest.TestCase):
+    """Test cases for segments_intersect_rect."""
+    
+    def _hits(self, start, end, rect=pygame.Rect(0, 0, 10, 10)):
+        return bool(segments_intersect_rect(np.array([start], dtype=float),
+                                            np.array([end], dtype=float), rect)[0])
+    
+    def test_crossing(self):
+        """Segments passing through the rectangle hit it."""
+        self.assertTrue(self._hits((-5, 5), (15, 5)))
+        self.assertTrue(self._hits((-5, -5), (15, 15)))
+    
+    def test_inside(self):
+        """Segments entirely inside the rectangle hit it."""
+        self.assertTrue(self._hits((2, 2), (3, 8)))
+    
+    def test_outside(self):
+        """Segments beside the rectangle miss it."""
+        self.assertFalse(self._hits((-5, 20), (15, 20)))
+        self.assertFalse(self._hits((-5, 5), (-1, 5)))
+        self.assertFalse(self._hits((-10, 5), (5, 20)))
+    
+    def test_vertical_and_horizontal(self):
+        """Axis-parallel segments are handled."""
+        self.assertTrue(self._hits((5, -5), (5, 15)))
+        self.assertFalse(self._hits((20, -5), (20, 15)))
+    
+    def test_touching_border(self):
+        """Touching the border counts as a hit."""
+        self.assertTrue(self._hits((-5, 10), (15, 10)))
+
+class TestSegmentGrid(unittest.TestCase):
+    """Test cases for SegmentGrid."""
+    
+    def test_matches_brute_force(self):
+        """Grid queries agree with testing every segment."""
+        rng = np.random.default_rng(3)
+        starts = rng.uniform(0, 20000, (3000, 2))
+        ends = starts + rng.uniform(-60, 60, (3000, 2))
+        grid = SegmentGrid(starts, ends, cell_size=100)
+        for _ in range(50):
+            x, y = rng.uniform(0, 20000, 2)
+            rect = pygame.Rect(int(x), int(y), 60, 100)
+            expected = np.nonzero(segments_intersect_rect(starts, ends, rect))[0]
+            self.assertEqual(sorted(grid.query_rect(rect).tolist()), expected.tolist())
+    
+    def test_query_outside_grid(self):
+        """Queries beyond the grid return nothing."""
+        grid = SegmentGrid(np.array([[0.0, 0.0]]), np.array([[10.0, 0.0]]))
+        self.assertFalse(grid.intersects_rect(pygame.Rect(-500, -5, 10, 10)))
+        self.assertFalse(grid.intersects_rect(pygame.Rect(500, -5, 10, 10)))
+
+class TestTrackCollision(unittest.TestCase):
+    """Test cases for Track.check_collision."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.track = Track(800, 600)
+        self.track.obstacles = []
+        self.track.rebuild_obstacle_index()
+    
+    def test_car_in_lane_is_clear(self):
+        """A car in its lane touches nothing."""
+        car = Car(100, 300)
+        car.x, car.y = self.track.get_path_point(1000)
+        self.assertFalse(self.track.check_collision(car.get_rect()))
+    
+    def test_road_edge(self):
+        """A hitbox straddling the road edge collides."""
+        x, y = self.track.get_path_point(1000)
+        edge_y = y - self.track.num_lanes * self.track.lane_width / 2
+        rect = pygame.Rect(0, 0, 60, 100)
+        rect.center = (int(x), int(edge_y))
+        self.assertTrue(self.track.collide_road_edges(rect))
+    
+    def test_obstacle(self):
+        """Overlapping an obstacle is a collision."""
+        x, y = self.track.get_path_point(1000)
+        self.track.obstacles = [pygame.Rect(int(x), int(y), 30, 30)]
+        self.track.rebuild_obstacle_index()
+        rect = pygame.Rect(int(x) - 20, int(y) - 20, 30, 30)
+        self.assertEqual(self.track.collide_obstacles(rect).tolist(), [0])
+        self.assertTrue(self.track.check_collision(rect))
+        rect.y += 100
+        self.assertFalse(self.track.check_collision(rect))
+
+if __name__ == '__main__':
+    unittest.main()
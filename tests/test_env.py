@@ -0,0 +1,177 @@
+"""Unit tests for the Gym-style training environments."""
+import unittest
+import sys
+import os
+
+import numpy as np
+import pygame
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.car_batch import CarBatch
+from src.core.env import RacingEnv, VectorRacingEnv, COLLISION_PENALTY
+from src.core.track import Track
+
+class TestVectorRacingEnv(unittest.TestCase):
+    """Test cases for VectorRacingEnv."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.track = Track(1200, 800, seed=3, cache_dir=None)
+        self.env = VectorRacingEnv(8, track=self.track, seed=1)
+        self.forward = np.tile([1.0, 0.0], (8, 1))
+
+    def test_observation_shape(self):
+        """Observations are float32 with the advertised size."""
+        obs, info = self.env.reset(seed=1)
+        self.assertEqual(obs.shape, (8, self.env.observation_size))
+        self.assertEqual(obs.dtype, np.float32)
+        self.assertEqual(info, {})
+        obs, rewards, terminated, truncated, _ = self.env.step(self.forward)
+        self.assertEqual(obs.shape, (8, self.env.observation_size))
+        self.assertEqual(rewards.dtype, np.float32)
+        self.assertEqual(terminated.shape, (8,))
+        self.assertEqual(truncated.shape, (8,))
+
+    def test_reset_is_deterministic(self):
+        """Resetting with the same seed gives the same observations."""
+        first, _ = self.env.reset(seed=5)
+        second, _ = self.env.reset(seed=5)
+        np.testing.assert_array_equal(first, second)
+
+    def test_generated_track_follows_seed(self):
+        """A generated track is regenerated when the reset seed changes."""
+        env = VectorRacingEnv(2, seed=1)
+        env.reset(seed=9)
+        self.assertEqual(env.track.seed, 9)
+        self.assertIs(env.cars.track, env.track)
+
+    def test_reward_is_progress(self):
+        """Without collisions the reward is the distance gained."""
+        env = VectorRacingEnv(4, track=Track(1200, 800, seed=3, cache_dir=None), random_start=False)
+        env.track.obstacles = []
+        env.track.rebuild_obstacle_index()
+        env.reset()
+        previous = env.cars.distance_along_track.copy()
+        _, rewards, terminated, _, _ = env.step(np.tile([1.0, 0.0], (4, 1)))
+        gained = env.cars.distance_along_track - previous
+        np.testing.assert_allclose(rewards, gained / (env.cars.max_speed * env.dt * 60), rtol=1e-6)
+        self.assertTrue((rewards > 0).all())
+        self.assertFalse(terminated.any())
+
+    def test_collision_terminates(self):
+        """Driving into an obstacle terminates the episode with a penalty."""
+        env = VectorRacingEnv(4, track=self.track, random_start=False, autoreset=False)
+        env.reset()
+        # Put an obstacle just ahead of the start line in lane 2
+        x, y = self.track.get_path_point(20.0)
+        self.track.obstacles = [pygame.Rect(int(x), int(y - 0.5 * env.cars.lane_width[0]) - 15, 30, 30)]
+        self.track.rebuild_obstacle_index()
+        env.cars.reset(np.array([False, True, True, True]), lane=4)
+        _, rewards, terminated, truncated, _ = env.step(np.zeros((4, 2)))
+        np.testing.assert_array_equal(terminated, [True, False, False, False])
+        self.assertFalse(truncated.any())
+        self.assertAlmostEqual(float(rewards[0]), float(rewards[1]) - COLLISION_PENALTY, places=5)
+
+    def test_obstacle_queries_match_brute_force(self):
+        """Windowed obstacle lookups agree with checking every obstacle."""
+        env = VectorRacingEnv(64, track=self.track, seed=6, autoreset=False)
+        rng = np.random.default_rng(6)
+        n = 200
+        xs = rng.uniform(0, self.track.track_length, n).astype(int)
+        ys = rng.uniform(100, 700, n).astype(int)
+        sizes = rng.integers(10, 80, size=(n, 2))
+        self.track.obstacles = [pygame.Rect(x, y, w, h) for x, y, (w, h) in zip(xs, ys, sizes)]
+        self.track.rebuild_obstacle_index()
+        obs, _ = env.reset()
+        
+        boxes = self.track.obstacle_index.boxes
+        center_x = boxes[:, 0] + boxes[:, 2] / 2
+        center_y = boxes[:, 1] + boxes[:, 3] / 2
+        dx = center_x[None, :] - env.cars.x[:, None]
+        dy = center_y[None, :] - env.cars.y[:, None]
+        hit = ((np.abs(dx) < boxes[:, 2] / 2 + 30) & (np.abs(dy) < boxes[:, 3] / 2 + 50)).any(axis=1)
+        np.testing.assert_array_equal(env._collisions(), hit)
+        self.assertTrue(hit.any() and not hit.all())
+        
+        slots = obs[:, -3 * env.num_obstacles:].reshape(64, env.num_obstacles, 3)
+        for i in range(64):
+            ahead = np.flatnonzero((dx[i] > -30) & (dx[i] < env.obstacle_range))
+            nearest = ahead[np.argsort(dx[i, ahead], kind='stable')][:env.num_obstacles]
+            count = len(nearest)
+            np.testing.assert_allclose(slots[i, :count, 0], dx[i, nearest] / env.obstacle_range, rtol=1e-5)
+            np.testing.assert_allclose(slots[i, :count, 1], dy[i, nearest] / env.cars.lane_width[i],
+                                       rtol=1e-5)
+            np.testing.assert_array_equal(slots[i, :, 2], np.arange(env.num_obstacles) < count)
+
+    def test_truncation_and_autoreset(self):
+        """Episodes are truncated at max_steps and reset automatically."""
+        env = VectorRacingEnv(4, track=self.track, max_steps=5, seed=2)
+        env.track.obstacles = []
+        env.track.rebuild_obstacle_index()
+        env.reset()
+        for _ in range(4):
+            _, _, _, truncated, info = env.step(np.tile([1.0, 0.0], (4, 1)))
+            self.assertFalse(truncated.any())
+        obs, _, _, truncated, info = env.step(np.tile([1.0, 0.0], (4, 1)))
+        self.assertTrue(truncated.all())
+        np.testing.assert_array_equal(info['done_indices'], np.arange(4))
+        self.assertEqual(info['final_observation'].shape, obs.shape)
+        self.assertTrue((env.steps == 0).all())
+        self.assertTrue((env.cars.speed == 0).all())
+        # The returned observations describe the new episodes
+        self.assertTrue((obs[:, 1] == 0).all())
+        self.assertTrue((info['final_observation'][:, 1] > 0).all())
+
+    def test_matches_single_envs(self):
+        """A vector env steps each car exactly like a single env would."""
+        vector = VectorRacingEnv(3, track=self.track, random_start=False, autoreset=False)
+        singles = [RacingEnv(track=self.track, random_start=False) for _ in range(3)]
+        vector_obs, _ = vector.reset()
+        for i, env in enumerate(singles):
+            obs, _ = env.reset()
+            np.testing.assert_array_equal(obs, vector_obs[i])
+
+        rng = np.random.default_rng(0)
+        for _ in range(120):
+            actions = rng.uniform(-1, 1, size=(3, 2))
+            vector_obs, vector_rewards, _, _, _ = vector.step(actions)
+            for i, env in enumerate(singles):
+                obs, reward, _, _, _ = env.step(actions[i])
+                np.testing.assert_allclose(obs, vector_obs[i], rtol=1e-6)
+                self.assertAlmostEqual(reward, float(vector_rewards[i]), places=5)
+
+    def test_single_env_api(self):
+        """RacingEnv returns plain Python scalars for a single car."""
+        env = RacingEnv(track=self.track, seed=4)
+        obs, _ = env.reset()
+        self.assertEqual(obs.shape, (env.observation_size,))
+        _, reward, terminated, truncated, _ = env.step((1.0, 0.0))
+        self.assertIsInstance(reward, float)
+        self.assertIsInstance(terminated, bool)
+        self.assertIsInstance(truncated, bool)
+
+class TestCarBatchReset(unittest.TestCase):
+    """Test cases for CarBatch.reset."""
+
+    def test_reset_subset(self):
+        """Only the selected cars are put back on the track."""
+        track = Track(1200, 800, seed=3, cache_dir=None)
+        batch = CarBatch(track, 4)
+        for _ in range(30):
+            batch.step(np.ones(4), np.zeros(4), 1 / 60)
+        moved = batch.distance_along_track.copy()
+
+        mask = np.array([True, False, True, False])
+        batch.reset(mask, distance=[100.0, 200.0], lane=[1, 4])
+        np.testing.assert_array_equal(batch.distance_along_track, [100.0, moved[1], 200.0, moved[3]])
+        np.testing.assert_array_equal(batch.speed[mask], 0.0)
+        self.assertTrue((batch.speed[~mask] > 0).all())
+        np.testing.assert_array_equal(batch.lane[mask], [1, 4])
+        x, y = track.get_path_point(200.0)
+        self.assertAlmostEqual(batch.x[2], x)
+        self.assertAlmostEqual(batch.y[2], y + 1.5 * batch.lane_width[2])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+"""Unit tests for the frame pacer."""
+import unittest
+import sys
+import os
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.frame_pacer import FramePacer, MAX_SPIN_MARGIN, POLL_INTERVAL
+
+class FakeTime:
+    """Simulated clock; every reading takes 10 us and sleeps overshoot."""
+    
+    def __init__(self, overshoot=0.0):
+        self.now = 0.0
+        self.overshoot = overshoot
+        self.sleeps = []
+    
+    def clock(self):
+        self.now += 1e-5
+        return self.now
+    
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds + self.overshoot
+    
+    def pacer(self, target_hz, **kwargs):
+        return FramePacer(target_hz, clock=self.clock, sleep=self.sleep, **kwargs)
+
+class TestFramePacer(unittest.TestCase):
+    """Test cases for pacing, deadlines and statistics."""
+    
+    def test_paces_to_target(self):
+        """Frames end on schedule at 60, 120 and 144 Hz."""
+        for hz in (60, 120, 144):
+            fake = FakeTime(overshoot=0.001)
+            pacer = fake.pacer(hz)
+            pacer.start()
+            for _ in range(100):
+                fake.now += 0.003  # Frame work
+                pacer.wait()
+            stats = pacer.get_stats()
+            self.assertAlmostEqual(stats['mean_ms'], 1000 / hz, delta=0.01)
+            self.assertLess(stats['jitter_ms'], 0.05)
+            self.assertEqual(stats['missed_deadlines'], 0)
+    
+    def test_no_drift(self):
+        """Deadlines follow a fixed schedule, so timing errors do not add up."""
+        fake = FakeTime(overshoot=0.0003)
+        pacer = fake.pacer(60)
+        pacer.start()
+        start = fake.now
+        for _ in range(600):
+            pacer.wait()
+        self.assertAlmostEqual(fake.now - start, 10.0, delta=0.001)
+    
+    def test_missed_deadlines(self):
+        """Overrunning frames are counted, and long stalls restart the schedule."""
+        fake = FakeTime()
+        pacer = fake.pacer(100)
+        pacer.start()
+        fake.now += 0.012  # A little late: the next frame catches up
+        self.assertAlmostEqual(pacer.wait(), 0.012, delta=1e-4)
+        self.assertAlmostEqual(pacer.wait(), 0.008, delta=1e-4)
+        fake.now += 0.5  # A stall: no burst of short frames afterwards
+        pacer.wait()
+        self.assertAlmostEqual(pacer.wait(), 0.010, delta=1e-4)
+        self.assertEqual(pacer.missed_deadlines, 2)
+        self.assertAlmostEqual(pacer.get_stats()['missed_ratio'], 0.5)
+    
+    def test_sleep_then_spin(self):
+        """Most of the wait is slept and the margin adapts to overshoot."""
+        fake = FakeTime(overshoot=0.0)
+        pacer = fake.pacer(60)
+        pacer.start()
+        pacer.wait()
+        self.assertGreater(sum(fake.sleeps), 0.014)
+        fake.overshoot = 0.005
+        for _ in range(5):
+            pacer.wait()
+        self.assertEqual(pacer.spin_margin, MAX_SPIN_MARGIN)
+        self.assertEqual(pacer.missed_deadlines, 1)  # Only the first late wake-up
+    
+    def test_poll_between_sleeps(self):
+        """The poll callback runs every POLL_INTERVAL while waiting."""
+        fake = FakeTime()
+        pacer = fake.pacer(60)
+        calls = []
+        pacer.wait(poll=lambda: calls.append(fake.now))
+        self.assertGreater(len(calls), 10)
+        self.assertLessEqual(max(fake.sleeps), POLL_INTERVAL)
+    
+    def test_uncapped(self):
+        """Without a target rate wait returns immediately."""
+        fake = FakeTime()
+        pacer = fake.pacer(None)
+        pacer.start()
+        fake.now += 0.001
+        self.assertAlmostEqual(pacer.wait(), 0.001, delta=1e-4)
+        self.assertEqual(fake.sleeps, [])
+    
+    def test_vsync_snaps_to_refresh(self):
+        """With vsync, noisy intervals are reported as whole refreshes."""
+        fake = FakeTime()
+        pacer = fake.pacer(60, vsync=True)
+        pacer.start()
+        intervals = []
+        for i in range(40):
+            fake.now += 1 / 75 + (0.0004 if i % 2 else -0.0004)  # A 75 Hz display
+            intervals.append(pacer.wait())
+        self.assertEqual(fake.sleeps, [])
+        self.assertAlmostEqual(pacer.refresh_period, 1 / 75, delta=0.0005)
+        self.assertAlmostEqual(intervals[-1], pacer.refresh_period)
+        fake.now += 2 / 75  # A dropped frame is two refreshes
+        self.assertAlmostEqual(pacer.wait(), 2 * pacer.refresh_period)
+        self.assertEqual(pacer.missed_deadlines, 1)
+    
+    def test_stats_ring_buffer(self):
+        """Statistics cover the most recent frames only."""
+        fake = FakeTime()
+        pacer = fake.pacer(None, capacity=4)
+        pacer.start()
+        for step in (0.1, 0.1, 0.001, 0.001, 0.001, 0.001):
+            fake.now += step
+            pacer.wait()
+        self.assertLess(pacer.get_stats()['max_ms'], 2.0)
+        self.assertEqual(pacer.get_stats()['frames'], 6)
+        self.assertEqual(FramePacer().get_stats(), {})
+    
+    def test_real_clock(self):
+        """Pacing with the real clock holds the average frame time."""
+        pacer = FramePacer(240)
+        pacer.start()
+        for _ in range(48):
+            pacer.wait()
+        self.assertAlmostEqual(pacer.get_stats()['mean_ms'], 1000 / 240, delta=0.5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+"""Unit tests for the cached HUD overlay."""
+import unittest
+import sys
+import os
+
+import pygame
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.ui.hud import HUD
+
+class FakeClock:
+    """Clock advanced by hand."""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+class TestHUD(unittest.TestCase):
+    """Test cases for widget caching and the refresh rate."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        pygame.init()
+        self.screen = pygame.Surface((1200, 800))
+        self.clock = FakeClock()
+        self.hud = HUD(self.screen, refresh_hz=10, clock=self.clock)
+    
+    def test_first_render_marks_every_widget(self):
+        """The first render reports every widget, including the controls help."""
+        dirty = self.hud.render(1.0, float('inf'), 1, 5.0)
+        self.assertEqual(len(dirty), len(self.hud._layers))
+        self.assertEqual(len(dirty), 10)
+    
+    def test_unchanged_values_are_not_redrawn(self):
+        """Widgets whose values do not change are not reported."""
+        self.hud.render(1.0, 60.0, 1, 5.0)
+        self.clock.now = 1.0
+        self.assertEqual(self.hud.render(1.0, 60.0, 1, 5.0), [])
+    
+    def test_refresh_rate(self):
+        """Values are only sampled refresh_hz times per second."""
+        self.hud.render(1.0, 60.0, 1, 5.0)
+        self.clock.now = 0.05
+        self.assertEqual(self.hud.render(1.05, 60.0, 1, 5.0), [])
+        self.clock.now = 0.1
+        dirty = self.hud.render(1.1, 60.0, 1, 5.0)
+        self.assertEqual(len(dirty), 1)
+        self.assertEqual(self.hud._layers[('text', 10, 40)][0][0], "Time: 00:01.100")
+    
+    def test_every_frame_without_refresh_rate(self):
+        """A refresh rate of 0 samples values every frame."""
+        hud = HUD(self.screen, refresh_hz=0, clock=self.clock)
+        hud.render(1.0, 60.0, 1, 5.0)
+        self.assertEqual(len(hud.render(1.5, 60.0, 2, 5.0)), 2)
+    
+    def test_overlay_drawn_every_frame(self):
+        """Cached widgets are drawn again on frames without a refresh."""
+        self.hud.render(1.0, 60.0, 1, 5.0)
+        expected = pygame.image.tostring(self.screen, 'RGB')
+        self.screen.fill((0, 0, 0))
+        self.clock.now = 0.01
+        self.hud.render(1.0, 60.0, 1, 5.0)
+        self.assertEqual(pygame.image.tostring(self.screen, 'RGB'), expected)
+    
+    def test_speed_bar(self):
+        """The bar colour table runs from green to red, inside the border."""
+        self.assertEqual(self.hud._bar_colors[0], (0, 255, 0))
+        self.assertEqual(self.hud._bar_colors[-1], (255, 0, 0))
+        self.hud.render(1.0, 60.0, 1, 20.0)  # 200 km/h, a full bar
+        x, y = self.hud.bar_pos
+        self.assertEqual(self.screen.get_at((x, y))[:3], (200, 200, 200))
+        self.assertEqual(self.screen.get_at((x + 75, y + 10))[:3], (255, 0, 0))
+        self.clock.now = 1.0
+        dirty = self.hud.render(1.0, 60.0, 1, 0.0)
+        self.assertIn(pygame.Rect(self.hud.bar_pos, (150, 20)), dirty)
+        self.assertEqual(self.screen.get_at((x + 75, y + 10))[:3], (50, 50, 50))
+
+if __name__ == '__main__':
+    unittest.main()
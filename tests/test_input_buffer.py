@@ -0,0 +1,187 @@
+"""Unit tests for timestamped input buffering."""
+import unittest
+import sys
+import os
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.game import RacingGame
+from src.core.input_buffer import (ACCELERATE, STEERING_AXIS, BufferedController, InputBuffer,
+                                   apply_deadzone)
+
+def key_event(key, down=True):
+    return pygame.event.Event(pygame.KEYDOWN if down else pygame.KEYUP, key=key)
+
+def axis_event(axis, value, instance_id=0):
+    return pygame.event.Event(pygame.JOYAXISMOTION, joy=instance_id, instance_id=instance_id,
+                              axis=axis, value=value)
+
+def hat_event(x, y=0):
+    return pygame.event.Event(pygame.JOYHATMOTION, joy=0, instance_id=0, hat=0, value=(x, y))
+
+class TestDeadzone(unittest.TestCase):
+    """Test cases for the stick deadzone."""
+    
+    def test_inside_deadzone_is_zero(self):
+        """Deflections within the deadzone read as centred."""
+        for value in (0.0, 0.05, -0.1):
+            self.assertEqual(apply_deadzone(value, 0.1), 0.0)
+    
+    def test_rescaled_outside_deadzone(self):
+        """Outside the deadzone the output rises continuously from 0 to 1."""
+        self.assertAlmostEqual(apply_deadzone(0.1 + 1e-6, 0.1), 0.0, places=4)
+        self.assertAlmostEqual(apply_deadzone(0.55, 0.1), 0.5)
+        self.assertAlmostEqual(apply_deadzone(-0.55, 0.1), -0.5)
+        self.assertEqual(apply_deadzone(1.0, 0.1), 1.0)
+
+class TestInputBuffer(unittest.TestCase):
+    """Test cases for applying events by timestamp."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.now = 0.0
+        self.buffer = InputBuffer(deadzone=0.1, clock=lambda: self.now)
+    
+    def test_events_apply_in_their_step(self):
+        """An event only takes effect in the step whose time covers it."""
+        self.buffer.push_event(key_event(pygame.K_UP), timestamp=0.020)
+        self.assertEqual(self.buffer.apply_until(0.010), (0.0, 0.0))
+        self.assertEqual(self.buffer.apply_until(0.030), (1.0, 0.0))
+        self.assertEqual(self.buffer.apply_until(0.040), (1.0, 0.0))  # Still held
+        self.buffer.push_event(key_event(pygame.K_UP, down=False), timestamp=0.045)
+        self.assertEqual(self.buffer.apply_until(0.050), (0.0, 0.0))
+    
+    def test_short_tap_is_not_lost(self):
+        """A press released within one step still counts for that step."""
+        self.buffer.push_event(key_event(pygame.K_LEFT), timestamp=0.001)
+        self.buffer.push_event(key_event(pygame.K_LEFT, down=False), timestamp=0.002)
+        self.assertEqual(self.buffer.apply_until(0.004), (0.0, -1.0))
+        self.assertEqual(self.buffer.apply_until(0.008), (0.0, 0.0))
+    
+    def test_control_held_while_any_key_is(self):
+        """Releasing one of two keys bound to a control keeps it pressed."""
+        self.buffer.push_event(key_event(pygame.K_w), timestamp=0.001)
+        self.buffer.push_event(key_event(pygame.K_UP), timestamp=0.002)
+        self.buffer.push_event(key_event(pygame.K_w, down=False), timestamp=0.003)
+        self.assertEqual(self.buffer.apply_until(0.004), (1.0, 0.0))
+        self.assertEqual(self.buffer.apply_until(0.008), (1.0, 0.0))
+        self.buffer.push_event(key_event(pygame.K_UP, down=False), timestamp=0.009)
+        self.buffer.apply_until(0.010)
+        self.assertEqual(self.buffer.apply_until(0.012), (0.0, 0.0))
+    
+    def test_hat_does_not_release_keys(self):
+        """Moving the hat up or down leaves a held arrow key steering."""
+        self.buffer.push_event(key_event(pygame.K_LEFT), timestamp=0.001)
+        self.buffer.push_event(hat_event(0, 1), timestamp=0.002)
+        self.buffer.push_event(hat_event(0, -1), timestamp=0.003)
+        self.buffer.apply_until(0.004)
+        self.assertEqual(self.buffer.apply_until(0.008), (0.0, -1.0))
+        self.assertEqual(len(self.buffer), 0)  # Vertical hat moves queue nothing
+        
+        # The hat steers on its own, and releasing it leaves the key held
+        self.buffer.push_event(hat_event(1), timestamp=0.009)
+        self.assertEqual(self.buffer.apply_until(0.010), (0.0, 1.0))
+        self.buffer.push_event(hat_event(0), timestamp=0.011)
+        self.buffer.apply_until(0.012)
+        self.assertEqual(self.buffer.apply_until(0.014), (0.0, -1.0))
+    
+    def test_joystick_axes(self):
+        """Stick axes steer and throttle through the deadzone."""
+        self.buffer.push_event(axis_event(0, 0.55), timestamp=0.0)
+        self.buffer.push_event(axis_event(1, -1.0), timestamp=0.0)  # Stick pushed up
+        throttle, steering = self.buffer.apply_until(0.001)
+        self.assertAlmostEqual(steering, 0.5)
+        self.assertEqual(throttle, 1.0)
+    
+        # Pulling back reverses at the keyboard's reverse strength
+        self.buffer.push_event(axis_event(1, 1.0), timestamp=0.002)
+        self.assertEqual(self.buffer.apply_until(0.003)[0], -0.5)
+    
+    def test_deadzone_jitter_is_dropped(self):
+        """Noise around the stick centre does not queue events."""
+        for value in (0.02, -0.05, 0.08):
+            self.assertTrue(self.buffer.push_event(axis_event(0, value)))
+        self.assertEqual(len(self.buffer), 0)
+    
+    def test_removed_pad_centres_only_its_axes(self):
+        """Unplugging a pad leaves the axes another pad is holding."""
+        self.buffer.joysticks = {0: None, 1: None}
+        self.buffer.push_event(axis_event(0, 1.0, instance_id=0), timestamp=0.001)
+        self.buffer.push_event(axis_event(1, -1.0, instance_id=1), timestamp=0.002)
+        self.assertEqual(self.buffer.apply_until(0.003), (1.0, 1.0))
+        
+        self.buffer.push_event(pygame.event.Event(pygame.JOYDEVICEREMOVED, instance_id=0),
+                               timestamp=0.004)
+        self.assertEqual(self.buffer.apply_until(0.005), (1.0, 0.0))
+        self.buffer.push_event(pygame.event.Event(pygame.JOYDEVICEREMOVED, instance_id=1),
+                               timestamp=0.006)
+        self.assertEqual(self.buffer.apply_until(0.007), (0.0, 0.0))
+    
+    def test_unbound_events_ignored(self):
+        """Keys without a binding are left to the game."""
+        self.assertFalse(self.buffer.push_event(key_event(pygame.K_ESCAPE)))
+        self.assertEqual(len(self.buffer), 0)
+    
+    def test_latency_measured_at_present(self):
+        """Latency runs from receiving an event to presenting the frame."""
+        self.assertEqual(self.buffer.get_latency_stats(), {})
+        self.buffer.push(ACCELERATE, 1.0, timestamp=0.010)
+        self.buffer.push(STEERING_AXIS, 0.5, timestamp=0.014)
+        self.buffer.apply_until(0.020)
+        self.buffer.presented(0.030)
+        self.buffer.presented(0.040)  # Nothing new applied
+        stats = self.buffer.get_latency_stats()
+        self.assertEqual(stats['events'], 2)
+        self.assertAlmostEqual(stats['max_ms'], 20.0)
+        self.assertAlmostEqual(stats['mean_ms'], 18.0)
+    
+    def test_controller_uses_step_time(self):
+        """The controller applies events up to the announced step time."""
+        controller = BufferedController(self.buffer)
+        self.buffer.push(ACCELERATE, 1.0, timestamp=0.005)
+        controller.begin_step(0.004)
+        self.assertEqual(controller.get_input(), (0.0, 0.0))
+        controller.begin_step(0.008)
+        self.assertEqual(controller.get_input(), (1.0, 0.0))
+
+class TestGameInput(unittest.TestCase):
+    """Test cases for buffered input in the game loop."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.game = RacingGame("Test", 800, 600, headless=True, render_every=0, seed=1, cache_dir=None)
+    
+    def tearDown(self):
+        """Clean up after tests."""
+        pygame.quit()
+    
+    def test_substeps_are_timestamped(self):
+        """Each substep ends one physics step after the previous one."""
+        game = self.game
+        step_times = []
+        begin_step = game.controller.begin_step
+        game.controller.begin_step = lambda t: (step_times.append(t), begin_step(t))
+        game.advance(game.physics_dt * 4.5)
+        self.assertEqual(len(step_times), 4)
+        for earlier, later in zip(step_times, step_times[1:]):
+            self.assertAlmostEqual(later - earlier, game.physics_dt)
+        # Half a step is left for the next frame
+        self.assertLess(step_times[-1], time.perf_counter() - game.physics_dt * 0.4)
+    
+    def test_events_reach_the_car(self):
+        """Buffered key presses drive the car and their latency is measured."""
+        game = self.game
+        game.input.push_event(key_event(pygame.K_UP))
+        game.advance(game.physics_dt * 10)
+        self.assertGreater(game.car.speed, 0)
+        game.present([])
+        self.assertEqual(game.input.get_latency_stats()['events'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,235 @@
+"""Unit tests for networked multiplayer."""
+import unittest
+import asyncio
+import sys
+import os
+
+import numpy as np
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.controllers import ConstantController, ScriptedController
+from src.core.track import Track
+from src.net import protocol
+from src.net.client import RaceClient
+from src.net.conditions import NetworkConditions
+from src.net.loopback import run_loopback
+from src.net.protocol import InputPacket, ProtocolError
+from src.net.server import RaceServer
+
+TRACK = Track(1200, 800, num_lanes=4, seed=3, cache_dir=None)
+
+def snapshot(tick, **cars):
+    # Build a snapshot from {id: (distance, y, speed, rotation, lane)} values
+    ids = sorted(int(name[1:]) for name in cars)
+    rows = np.array([cars[f"p{i}"] for i in ids], dtype=np.float64).reshape(len(ids), 5)
+    lanes = rows[:, 4].astype(np.int64)
+    return protocol.quantize_cars(tick, np.array(ids), rows[:, 0], rows[:, 1], rows[:, 2],
+                                  rows[:, 3], lanes, np.zeros(len(ids), dtype=bool),
+                                  np.zeros(len(ids), dtype=np.int8))
+
+class FakeTransport:
+    """Collects datagrams instead of sending them."""
+    
+    def __init__(self):
+        self.sent = []
+    
+    def sendto(self, data, addr=None):
+        self.sent.append((data, addr))
+    
+    def is_closing(self):
+        return False
+    
+    def close(self):
+        pass
+    
+    def take(self):
+        sent, self.sent = self.sent, []
+        return sent
+
+class TestProtocol(unittest.TestCase):
+    """Test cases for the wire format."""
+    
+    def test_full_snapshot_round_trip(self):
+        """A snapshot without a baseline decodes to the same quantised state."""
+        first = snapshot(3, p0=(10.5, 300.25, 4.0, -1.5, 2), p5=(99.0, 420.0, 8.0, 0.0, 4))
+        data = protocol.encode_snapshot(first, None, input_ack=7)
+        decoded, ack = protocol.decode_snapshot(data, {})
+        self.assertEqual(ack, 7)
+        self.assertEqual(decoded.tick, 3)
+        np.testing.assert_array_equal(decoded.ids, first.ids)
+        np.testing.assert_array_equal(decoded.states, first.states)
+        state = protocol.dequantize_car(decoded.get(0))
+        self.assertAlmostEqual(state['distance_along_track'], 10.5)
+        self.assertAlmostEqual(state['y'], 300.25)
+        self.assertEqual(state['lane'], 2)
+        self.assertEqual(state['lane_change_direction'], 0)
+    
+    def test_delta_snapshot(self):
+        """Deltas carry only changed cars and fields, plus joins and leaves."""
+        base = snapshot(3, p0=(10.0, 300.0, 4.0, 0.0, 2), p1=(50.0, 380.0, 2.0, 0.0, 3),
+                        p2=(70.0, 460.0, 1.0, 0.0, 4))
+        # p0 moved, p1 is unchanged, p2 left and p4 joined
+        current = snapshot(6, p0=(22.0, 300.0, 4.0, 0.0, 2), p1=(50.0, 380.0, 2.0, 0.0, 3),
+                           p4=(0.0, 340.0, 0.5, 0.0, 1))
+        data = protocol.encode_snapshot(current, base, input_ack=1)
+        full = protocol.encode_snapshot(current, None, input_ack=1)
+        self.assertLess(len(data), len(full))
+    
+        body, count, removed = protocol.encode_snapshot_body(current, base)
+        self.assertEqual((count, removed), (2, 1))
+    
+        decoded, _ = protocol.decode_snapshot(data, {3: base})
+        np.testing.assert_array_equal(decoded.ids, [0, 1, 4])
+        np.testing.assert_array_equal(decoded.states, current.states)
+    
+    def test_large_distance_change_sent_in_full(self):
+        """Distance changes that overflow int16 fall back to the full value."""
+        base = snapshot(1, p0=(10.0, 300.0, 4.0, 0.0, 2))
+        current = snapshot(2, p0=(10.0 + 5000.0, 300.0, 4.0, 0.0, 2))
+        decoded, _ = protocol.decode_snapshot(protocol.encode_snapshot(current, base, 0), {1: base})
+        np.testing.assert_array_equal(decoded.states, current.states)
+    
+    def test_unknown_baseline_rejected(self):
+        """A delta against a snapshot the client lacks raises ProtocolError."""
+        base = snapshot(1, p0=(10.0, 300.0, 4.0, 0.0, 2))
+        data = protocol.encode_snapshot(snapshot(2, p0=(12.0, 300.0, 4.0, 0.0, 2)), base, 0)
+        with self.assertRaises(ProtocolError):
+            protocol.decode_snapshot(data, {})
+        with self.assertRaises(ProtocolError):
+            protocol.decode_snapshot(data[:-1], {1: base})
+    
+    def test_input_round_trip(self):
+        """Input packets keep their sequence and quantised inputs."""
+        packet = InputPacket(3, protocol.NO_SNAPSHOT, 41, [(32767, 0), (-16384, 32767)])
+        self.assertEqual(protocol.decode_input(protocol.encode_input(packet)), packet)
+
+class TestServerClient(unittest.TestCase):
+    """Test cases for the server and client over fake transports."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.server = RaceServer(track=TRACK, max_players=4)
+        self.server.transport = FakeTransport()
+        self.address = ('127.0.0.1', 5000)
+    
+    def connect(self, controller):
+        # Join through the handshake, passing datagrams by hand
+        client = RaceClient(controller, track=TRACK)
+        client.transport = FakeTransport()
+        client._send(protocol.encode_hello(client._nonce))
+        self.pump(client)
+        self.assertTrue(client.connected)
+        return client
+    
+    def pump(self, client):
+        # Deliver queued datagrams in both directions
+        for data, _ in client.transport.take():
+            self.server.handle_datagram(data, self.address)
+        for data, addr in self.server.transport.take():
+            if addr == self.address:
+                client.handle_datagram(data)
+    
+    def test_prediction_matches_server(self):
+        """With no loss the predicted car ends where the server's car is."""
+        client = self.connect(ScriptedController([(1.0, 0.0)] * 30 + [(0.0, 1.0)] * 3 + [(1.0, 0.0)] * 60))
+        for _ in range(90):
+            client.tick()
+            self.pump(client)
+            self.server.tick()
+            self.pump(client)
+        self.assertGreater(client.snapshots_received, 20)
+        self.assertLess(client.prediction_error_max, 1.0)
+        server_car = self.server.cars.get_state(client.player_id)
+        self.assertAlmostEqual(client.car.distance_along_track[0], server_car['distance_along_track'],
+                               delta=0.5)
+        self.assertEqual(client.car.lane[0], server_car['lane'])
+    
+    def test_lost_inputs_covered_by_redundancy(self):
+        """Inputs dropped in transit arrive in later packets."""
+        client = self.connect(ConstantController(throttle=1.0))
+        for tick in range(12):
+            client.tick()
+            if tick % 3 != 2:
+                client.transport.take()  # Lose two packets in three
+            self.pump(client)
+        self.assertEqual(self.server.players[client.player_id].last_sequence, 12)
+    
+    def test_reconcile_replays_unacknowledged_inputs(self):
+        """A late snapshot is corrected by replaying the newer inputs."""
+        client = self.connect(ConstantController(throttle=1.0))
+        for _ in range(6):
+            client.tick()
+            self.pump(client)
+            self.server.tick()
+        before = client.car.distance_along_track[0]
+        for _ in range(3):
+            client.tick()  # Not yet delivered
+        sent = client.transport.take()
+        self.pump(client)  # Snapshots acknowledging only the first inputs
+        for data, _ in sent:
+            self.server.handle_datagram(data, self.address)
+        self.assertGreater(client.car.distance_along_track[0], before)
+        self.assertEqual(len(client._pending), 3)
+    
+    def test_remote_cars_interpolated(self):
+        """Other cars are drawn between snapshots, behind the server."""
+        other_address = ('127.0.0.1', 5001)
+        self.server.add_player(other_address)
+        self.server.players[0].last_heard = float('inf')  # Never times out
+        client = self.connect(ConstantController(throttle=1.0))
+        now = [0.0]
+        client.clock = lambda: now[0]
+        for tick in range(30):
+            self.server.players[0].inputs.append((tick + 1, 1.0, 0.0))
+            client.tick()
+            self.pump(client)
+            self.server.tick()
+            self.pump(client)
+            now[0] += self.server.dt
+    
+        poses = client.get_remote_poses()
+        self.assertEqual(list(poses), [0])
+        x, y, _ = poses[0]
+        # Drawn interpolation_delay behind, so behind the server's car
+        server_x = self.server.cars.x[0]
+        self.assertLess(x, server_x)
+        self.assertGreater(x, server_x - 8 * 60 * client.interpolation_delay * 2)
+    
+    def test_players_time_out(self):
+        """Silent players are removed and vanish from snapshots."""
+        client = self.connect(ConstantController())
+        self.server.timeout = 0.0
+        self.server.players[client.player_id].last_heard -= 1.0
+        self.server.tick()
+        self.assertEqual(self.server.players, {})
+        self.assertEqual(len(self.server.take_snapshot().ids), 0)
+    
+    def test_too_many_players_rejected(self):
+        """max_players must fit a full snapshot in one datagram."""
+        with self.assertRaises(ValueError):
+            RaceServer(track=TRACK, max_players=200)
+
+class TestLoopback(unittest.TestCase):
+    """Test cases for races over real UDP sockets on loopback."""
+    
+    def test_loopback_race(self):
+        """Several clients race and the report covers bandwidth and tick cost."""
+        report = asyncio.run(run_loopback(3, seconds=0.5, track=TRACK))
+        self.assertEqual(report.players, 3)
+        self.assertGreater(report.ticks, 10)
+        self.assertGreater(report.down_bytes_per_s, 0)
+        self.assertGreater(report.up_bytes_per_s, 0)
+        self.assertGreater(report.tick_mean_ms, 0)
+        self.assertLess(report.prediction_error_px, 2.0)
+    
+    def test_loopback_with_loss_and_latency(self):
+        """Prediction holds up under simulated latency and loss."""
+        conditions = NetworkConditions(latency=0.03, jitter=0.01, loss=0.1)
+        report = asyncio.run(run_loopback(2, seconds=0.6, track=TRACK, conditions=conditions))
+        self.assertGreater(report.down_bytes_per_s, 0)
+        self.assertLess(report.prediction_error_px, 10.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+"""Unit tests for the frame profiler."""
+import unittest
+import json
+import tempfile
+import sys
+import os
+
+import pygame
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.controllers import ConstantController
+from src.core.game import RacingGame
+from src.utils.profiler import FRAME_PHASES, FrameProfiler
+
+class TestFrameProfiler(unittest.TestCase):
+    """Test cases for FrameProfiler."""
+    
+    def test_ring_buffer_wraps(self):
+        """Only the newest frames are kept once the buffer is full."""
+        profiler = FrameProfiler(capacity=4, phases=('a', 'b'))
+        for i in range(6):
+            profiler.begin_frame()
+            profiler.add('a', i / 1000.0)
+            profiler.end_frame()
+        self.assertEqual(profiler.frame_count, 6)
+        self.assertEqual(profiler.samples.shape, (4, 3))
+        self.assertEqual(sorted(profiler.samples[:, 0] * 1000), [2, 3, 4, 5])
+    
+    def test_percentiles(self):
+        """Statistics report percentiles in milliseconds."""
+        profiler = FrameProfiler(capacity=100, phases=('a',))
+        for i in range(100):
+            profiler.begin_frame()
+            profiler.add('a', (i + 1) / 1000.0)
+            profiler.end_frame()
+        stats = profiler.get_stats()
+        self.assertAlmostEqual(stats['a']['p50_ms'], 50.5)
+        self.assertAlmostEqual(stats['a']['max_ms'], 100.0)
+        self.assertIn('p99_ms', stats['frame'])
+    
+    def test_mark_accumulates(self):
+        """Marks charge elapsed time to the named phase."""
+        profiler = FrameProfiler(phases=('a', 'b'))
+        profiler.begin_frame()
+        profiler.mark('a')
+        profiler.mark('b')
+        profiler.mark('a')
+        profiler.end_frame()
+        row = profiler.samples[0]
+        self.assertGreaterEqual(row[-1], row[0] + row[1])
+    
+    def test_empty_stats(self):
+        """No statistics are reported before the first frame."""
+        self.assertEqual(FrameProfiler().get_stats(), {})
+
+class TestGameProfiling(unittest.TestCase):
+    """Test cases for profiling a game run."""
+    
+    def tearDown(self):
+        """Clean up after tests."""
+        pygame.quit()
+    
+    def test_headless_run_dumps_profile(self):
+        """A profiled run writes every phase to the report on exit."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'profile.json')
+            game = RacingGame("Test Game", 800, 600, headless=True,
+                              controller=ConstantController(throttle=1.0),
+                              profile_path=path)
+            game.show_profiler = True
+            game.run(max_ticks=30)
+            with open(path) as f:
+                report = json.load(f)
+        self.assertEqual(report['frames'], 30)
+        self.assertEqual(set(report['phases']), set(FRAME_PHASES) | {'frame'})
+        self.assertGreater(report['phases']['car_update']['p50_ms'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+"""Unit tests for adaptive rendering quality."""
+import unittest
+import time
+import sys
+import os
+
+import pygame
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.controllers import ConstantController
+from src.core.game import RacingGame
+from src.core.track import Track
+from src.utils.quality import QUALITY_TIERS, QualityController, QualityTier
+
+BUDGET = 1 / 60
+
+class TestQualityController(unittest.TestCase):
+    """Test cases for tier changes driven by frame times."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.controller = QualityController(budget=BUDGET, window=10, upgrade_after=3)
+    
+    def feed(self, frame_time, frames):
+        """Record the same frame time several times and return the tier changes."""
+        changes = [self.controller.record(frame_time) for _ in range(frames)]
+        return [tier for tier in changes if tier is not None]
+    
+    def test_steps_down_when_over_budget(self):
+        """Each slow window drops one tier, stopping at the lowest."""
+        self.assertEqual(self.feed(BUDGET * 1.5, 10), [QUALITY_TIERS[1]])
+        self.feed(BUDGET * 1.5, 100)
+        self.assertEqual(self.controller.tier, QUALITY_TIERS[-1])
+        self.assertEqual(self.controller.changes, len(QUALITY_TIERS) - 1)
+    
+    def test_occasional_spikes_count(self):
+        """Spikes in more than a tenth of frames drop quality."""
+        for _ in range(5):
+            self.controller.record(BUDGET * 0.2)
+            self.controller.record(BUDGET * 2.0)
+        self.assertEqual(self.controller.tier_index, 1)
+    
+    def test_steps_up_only_after_sustained_headroom(self):
+        """Quality rises one tier after several fast windows in a row."""
+        self.feed(BUDGET * 1.5, 20)
+        self.assertEqual(self.controller.tier_index, 2)
+        self.assertEqual(self.feed(BUDGET * 0.3, 20), [])
+        # A window near the budget restarts the count
+        self.feed(BUDGET * 0.8, 10)
+        self.assertEqual(self.feed(BUDGET * 0.3, 20), [])
+        self.assertEqual(self.feed(BUDGET * 0.3, 10), [QUALITY_TIERS[1]])
+        self.feed(BUDGET * 0.3, 100)
+        self.assertEqual(self.controller.tier_index, 0)
+    
+    def test_steady_load_holds_tier(self):
+        """Frames between the thresholds never change quality."""
+        self.assertEqual(self.feed(BUDGET * 0.75, 200), [])
+
+class TestQualitySettings(unittest.TestCase):
+    """Test cases for applying tiers to rendering."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.game = RacingGame("Test Game", 800, 600, headless=True, seed=1, cache_dir=None,
+                               controller=ConstantController(throttle=1.0))
+    
+    def tearDown(self):
+        """Clean up after tests."""
+        pygame.quit()
+    
+    def test_debug_text_hidden(self):
+        """Without debug text the car reports only its sprite."""
+        screen = pygame.Surface((800, 600))
+        self.assertEqual(len(self.game.car.render(screen, 0, 0)), 6)
+        self.game.apply_quality(QUALITY_TIERS[1])
+        self.game.car.x += 5
+        self.assertEqual(len(self.game.car.render(screen, 0, 0)), 1)
+    
+    def test_rotation_step(self):
+        """Tiers switch the car to a coarser rotation atlas."""
+        self.game.apply_quality(QUALITY_TIERS[2])
+        self.assertEqual(self.game.car.rotation_atlas.step, 3.0)
+    
+    def test_max_visible_obstacles(self):
+        """Without a car position the leftmost obstacles in view are drawn."""
+        track = Track(800, 600, seed=1, cache_dir=None)
+        track.obstacles = [pygame.Rect(100 + i * 60, 300, 30, 30) for i in range(6)]
+        track.rebuild_obstacle_index()
+        screen = pygame.Surface((800, 600))
+        track.max_visible_obstacles = 2
+        track.render(screen, 0, 0)
+        drawn = [screen.get_at((115 + i * 60, 315))[:3] == (200, 50, 50) for i in range(6)]
+        self.assertEqual(drawn, [True, True, False, False, False, False])
+    
+    def test_capped_obstacles_ahead_of_car(self):
+        """With obstacles capped, the ones just ahead of the car are drawn."""
+        game = self.game
+        game.apply_quality(QUALITY_TIERS[-1])
+        game.car.x = game.car.prev_x = 500
+        game.camera_x = game.prev_camera_x = 200
+        # More obstacles in view than the tier draws, most behind the car
+        cap = game.track.max_visible_obstacles
+        xs = [210 + i * 10 for i in range(cap)] + [520, 560]
+        game.track.obstacles = [pygame.Rect(x, 100 + (i % 2) * 40, 5, 30) for i, x in enumerate(xs)]
+        game.track.rebuild_obstacle_index()
+        game.render()
+        ahead = [game.screen.get_at((x - 200 + 2, 100 + (i % 2) * 40 + 15))[:3] == (200, 50, 50)
+                 for i, x in enumerate(xs)]
+        self.assertEqual(ahead[-2:], [True, True])
+        self.assertEqual(sum(ahead), cap)
+    
+    def test_reduced_render_scale(self):
+        """A scaled tier draws the world small and fills the screen."""
+        self.game.apply_quality(QualityTier('half', render_scale=0.5))
+        self.assertEqual(self.game.world_surface.get_size(), (400, 300))
+        self.game.render()
+        self.game.render()
+        self.assertIsNone(self.game.last_present_rects)
+        self.game.dirty_rects = True
+        self.game.render()
+        self.assertIsNone(self.game.last_present_rects)  # Scaling always redraws the screen
+        self.game.apply_quality(QUALITY_TIERS[0])
+        self.assertIs(self.game.world_surface, self.game.screen)
+    
+    def test_adaptive_game_runs(self):
+        """A game with adaptive quality records every frame's work."""
+        game = RacingGame("Test Game", 800, 600, headless=True, seed=1, cache_dir=None,
+                          adaptive_quality=True, controller=ConstantController(throttle=1.0))
+        game.quality.budget = 1e-9  # Every frame is over budget
+        game.run(max_ticks=game.quality.window * 2)
+        self.assertEqual(game.quality.tier_index, 2)
+        self.assertFalse(game.car.show_debug)
+    
+    def test_blocking_present_is_not_work(self):
+        """Time blocked in a vsync flip does not lower quality."""
+        game = RacingGame("Test Game", 800, 600, headless=True, seed=1, cache_dir=None,
+                          adaptive_quality=True, controller=ConstantController(throttle=1.0))
+        present = game.present
+        
+        def vsync_present(dirty):
+            time.sleep(0.05)  # Blocked until the display refreshes
+            present(dirty)
+        game.present = vsync_present
+        game.quality.window = 5
+        game.quality.budget = 0.025
+        game.run(max_ticks=game.quality.window * 3)
+        self.assertEqual(game.quality.tier_index, 0)
+        self.assertLess(game.quality.last_load, 0.9)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+"""Unit tests for replay recording and playback."""
+import unittest
+import tempfile
+import sys
+import os
+
+import numpy as np
+import pygame
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.game import RacingGame
+from src.core.controllers import ConstantController, ScriptedController
+from src.core.replay import (HEADER, INPUT_SCALE, RecordingController, Replay, ReplayFormatError,
+                             load_replay, save_replay)
+
+class TestReplayFile(unittest.TestCase):
+    """Test cases for the replay file format."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, 'savegames', 'session.rpl')
+    
+    def tearDown(self):
+        """Clean up after tests."""
+        self.temp_dir.cleanup()
+    
+    def test_round_trip(self):
+        """A saved replay loads back unchanged, creating its directory."""
+        inputs = np.array([[INPUT_SCALE, 0], [-16384, -INPUT_SCALE], [0, 5]], dtype=np.int16)
+        replay = Replay(2 ** 40 + 3, 120, 800, 600, True, inputs)
+        save_replay(self.path, replay)
+        
+        loaded = load_replay(self.path)
+        self.assertEqual(loaded[:5], replay[:5])
+        np.testing.assert_array_equal(loaded.inputs, inputs)
+        self.assertEqual(os.path.getsize(self.path), HEADER.size + inputs.nbytes)
+    
+    def test_recorder_quantizes_what_it_returns(self):
+        """The recorder returns exactly the values a replay plays back."""
+        script = [(1.0, 0.0), (0.3333, -1.0), (-0.5, 2.0)]
+        recorder = RecordingController(ScriptedController(script))
+        live = [recorder.get_input() for _ in script]
+        replayed = recorder.to_replay(1, 60, 800, 600).controller()
+        self.assertEqual(live, [replayed.get_input() for _ in script])
+        self.assertEqual(live[2], (-16384 / INPUT_SCALE, 1.0))  # Clamped to [-1, 1]
+    
+    def test_bad_magic(self):
+        """Files that are not replays are rejected."""
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, 'wb') as f:
+            f.write(b'NOPE' + bytes(40))
+        with self.assertRaises(ReplayFormatError):
+            load_replay(self.path)
+    
+    def test_truncated(self):
+        """Replays with fewer inputs than the header claims are rejected."""
+        save_replay(self.path, Replay(1, 60, 800, 600, False, np.zeros((10, 2), dtype=np.int16)))
+        with open(self.path, 'r+b') as f:
+            f.truncate(40)
+        with self.assertRaises(ReplayFormatError):
+            load_replay(self.path)
+
+class TestReplayPlayback(unittest.TestCase):
+    """Test cases for recording a game and re-simulating it."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, 'session.rpl')
+    
+    def tearDown(self):
+        """Clean up after tests."""
+        self.temp_dir.cleanup()
+        pygame.quit()
+    
+    def test_playback_reproduces_session(self):
+        """Replaying a recording ends in exactly the recorded state."""
+        rng = np.random.default_rng(3)
+        script = list(zip(rng.uniform(-1, 1, 600).tolist(), rng.choice([-1.0, 0.0, 1.0], 600).tolist()))
+        game = RacingGame("Record", 800, 600, headless=True, render_every=0, cache_dir=None,
+                          controller=ScriptedController(script), record_path=self.path)
+        game.run(max_ticks=600)
+        expected = (game.car.x, game.car.y, game.car.lane, game.car.distance_along_track,
+                    game.camera_x, game.track.seed)
+        
+        replay = load_replay(self.path)
+        self.assertEqual(replay.tick_count, 600)
+        playback = RacingGame.from_replay(replay, render_every=0, cache_dir=None)
+        playback.run(max_ticks=replay.tick_count)
+        self.assertEqual((playback.car.x, playback.car.y, playback.car.lane,
+                          playback.car.distance_along_track, playback.camera_x,
+                          playback.track.seed), expected)
+    
+    def test_recording_requires_fixed_timestep(self):
+        """Variable time steps cannot be replayed, so recording refuses them."""
+        with self.assertRaises(ValueError):
+            RacingGame("Record", 800, 600, headless=True, fixed_timestep=False, cache_dir=None,
+                       controller=ConstantController(), record_path=self.path)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+"""Unit tests for parallel rollouts over a shared track."""
+import unittest
+import sys
+import os
+from multiprocessing import shared_memory
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.rollouts import RolloutRunner, RolloutTask, run_rollouts, sweep_tasks
+from src.core.track import Track
+
+class TestRollouts(unittest.TestCase):
+    """Test cases for rollout tasks, in-process runs and the process pool."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.track = Track(1200, 800, seed=3, cache_dir=None)
+        self.tasks = sweep_tasks({'acceleration': [0.05, 0.2], 'lane_change_speed': [0.1, 0.3]},
+                                 start_distances=[0.0, 5000.0], lanes=[1, 3])
+
+    def test_sweep_tasks(self):
+        """A sweep covers every combination once."""
+        self.assertEqual(len(self.tasks), 16)
+        self.assertEqual([task.task_id for task in self.tasks], list(range(16)))
+        combinations = {(task.tuning['acceleration'], task.tuning['lane_change_speed'],
+                         task.start_distance, task.lane) for task in self.tasks}
+        self.assertEqual(len(combinations), 16)
+        with self.assertRaises(ValueError):
+            sweep_tasks({'grip': [1.0]})
+
+    def test_results_independent_of_grouping(self):
+        """A task gives the same result alone as in a batch."""
+        together = run_rollouts(self.track, self.tasks, max_steps=200)
+        for task, result in zip(self.tasks[::5], together[::5]):
+            self.assertEqual(run_rollouts(self.track, [task], max_steps=200), [result])
+
+    def test_tuning_changes_outcome(self):
+        """Faster acceleration covers more distance in the same steps."""
+        slow, fast = run_rollouts(self.track, [RolloutTask(0, {'acceleration': 0.02}),
+                                               RolloutTask(1, {'acceleration': 0.2})], max_steps=60)
+        self.assertEqual(slow.steps, 60)
+        self.assertGreater(fast.distance, slow.distance)
+
+    def test_default_tuning(self):
+        """A task without tuning runs the defaults and shares no overrides."""
+        default, empty = run_rollouts(self.track, [RolloutTask(0), RolloutTask(0, {})],
+                                      max_steps=60)
+        self.assertIsNone(RolloutTask(0).tuning)
+        self.assertEqual(default, empty)
+
+    def test_pool_matches_in_process(self):
+        """Workers attached to shared memory reproduce in-process results."""
+        expected = run_rollouts(self.track, self.tasks, max_steps=200)
+        for start_method in ('fork', 'spawn'):
+            with RolloutRunner(self.track, processes=2, batch_size=5, max_steps=200,
+                               start_method=start_method) as runner:
+                batches = list(runner.run(self.tasks))
+                self.assertEqual(sorted(len(batch) for batch in batches), [1, 5, 5, 5])
+                self.assertEqual(runner.run_all(self.tasks), expected)
+
+    def test_close_frees_shared_memory(self):
+        """Closing the runner unlinks the shared track."""
+        runner = RolloutRunner(self.track, processes=1, max_steps=10)
+        name = runner._block.name
+        runner.close()
+        with self.assertRaises(FileNotFoundError):
+            shared_memory.SharedMemory(name=name)
+
+if __name__ == '__main__':
+    unittest.main()
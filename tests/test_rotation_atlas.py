@@ -0,0 +1,66 @@
+"""Unit tests for the pre-rendered rotation atlas."""
+import unittest
+import sys
+import os
+
+import pygame
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.car import Car
+from src.utils.rotation_atlas import RotationAtlas
+
+class TestRotationAtlas(unittest.TestCase):
+    """Test cases for RotationAtlas and its use by Car."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.sprite = pygame.Surface((60, 100), pygame.SRCALPHA)
+    
+    def test_prerender_range(self):
+        """Angles in the pre-render range are rendered up front."""
+        atlas = RotationAtlas(self.sprite, 0.5, prerender_range=(-30, 30))
+        self.assertEqual(len(atlas), 121)
+    
+    def test_quantized_lookup(self):
+        """Nearby angles share one cached frame."""
+        atlas = RotationAtlas(self.sprite, 0.5)
+        self.assertIs(atlas.get(10.1), atlas.get(9.9))
+        self.assertIs(atlas.get(-350.0), atlas.get(10.0))
+        self.assertIsNot(atlas.get(10.0), atlas.get(10.5))
+    
+    def test_matches_transform_rotate(self):
+        """Frames have the size of a direct rotation."""
+        atlas = RotationAtlas(self.sprite, 0.5)
+        expected = pygame.transform.rotate(self.sprite, 45.0)
+        self.assertEqual(atlas.get(45.0).get_size(), expected.get_size())
+    
+    def test_invalid_step(self):
+        """Steps that do not divide 360 degrees are rejected."""
+        with self.assertRaises(ValueError):
+            RotationAtlas(self.sprite, 0.7)
+        with self.assertRaises(ValueError):
+            RotationAtlas(self.sprite, 0)
+    
+    def test_cars_share_atlas(self):
+        """Cars with the same sprite and step share one atlas."""
+        first = Car(100, 400)
+        second = Car(200, 400)
+        self.assertIs(first.rotation_atlas, second.rotation_atlas)
+        
+        second.set_rotation_step(2.0)
+        self.assertIsNot(first.rotation_atlas, second.rotation_atlas)
+        self.assertEqual(second.rotation_atlas.step, 2.0)
+    
+    def test_render_uses_atlas(self):
+        """Rendering does not create new rotated surfaces."""
+        car = Car(100, 400)
+        car.rotation = 12.3
+        frames = len(car.rotation_atlas)
+        car._update_car_rotation()
+        self.assertIs(car.surface, car.rotation_atlas.get(-12.3))
+        self.assertEqual(len(car.rotation_atlas), frames)
+
+if __name__ == '__main__':
+    unittest.main()
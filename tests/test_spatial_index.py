@@ -0,0 +1,72 @@
+"""Unit tests for the obstacle spatial index."""
+import unittest
+import sys
+import os
+
+import numpy as np
+import pygame
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.spatial_index import ObstacleIndex
+from src.core.track import Track
+
+class TestObstacleIndex(unittest.TestCase):
+    """Test cases for ObstacleIndex."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        rng = np.random.default_rng(7)
+        count = 5000
+        self.boxes = np.column_stack([
+            rng.uniform(0, 100000, count),
+            rng.uniform(0, 600, count),
+            rng.integers(10, 80, count),
+            rng.integers(10, 40, count),
+        ])
+        self.index = ObstacleIndex(self.boxes)
+    
+    def _brute_force(self, x_min, x_max):
+        lefts = self.boxes[:, 0]
+        rights = lefts + self.boxes[:, 2]
+        return set(np.nonzero((lefts < x_max) & (rights > x_min))[0].tolist())
+    
+    def test_matches_linear_scan(self):
+        """Range queries return exactly the overlapping boxes."""
+        for x_min in (-100.0, 0.0, 1234.5, 50000.0, 99990.0):
+            found = self.index.query_range(x_min, x_min + 1200)
+            self.assertEqual(set(found.tolist()), self._brute_force(x_min, x_min + 1200))
+    
+    def test_visible_and_near(self):
+        """Viewport and radius queries are range queries."""
+        self.assertEqual(set(self.index.query_visible(300, 800).tolist()),
+                         self._brute_force(300, 1100))
+        self.assertEqual(set(self.index.query_near(5000, 250).tolist()),
+                         self._brute_force(4750, 5250))
+    
+    def test_empty_index(self):
+        """An empty index returns no results."""
+        index = ObstacleIndex(np.zeros((0, 4)))
+        self.assertEqual(len(index.query_visible(0, 1000)), 0)
+    
+    def test_from_rects(self):
+        """Indices refer back to the original rectangle list."""
+        rects = [pygame.Rect(500, 0, 30, 30), pygame.Rect(10, 0, 30, 30)]
+        index = ObstacleIndex.from_rects(rects)
+        self.assertEqual(index.query_visible(0, 100).tolist(), [1])
+    
+    def test_track_queries(self):
+        """The track culls obstacles by camera position."""
+        track = Track(1200, 800)
+        visible = track.query_visible_obstacles(2000)
+        for i in visible:
+            obstacle = track.obstacles[i]
+            self.assertLess(obstacle.x, 2000 + track.screen_width)
+            self.assertGreater(obstacle.right, 2000)
+        near = track.query_obstacles_near(0, 100)
+        for i in near:
+            self.assertLess(track.obstacles[i].x, 100 + track.get_path_point(0)[0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+"""Unit tests for the endless streaming track."""
+import unittest
+import math
+from unittest import mock
+import sys
+import os
+
+import numpy as np
+import pygame
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.streaming_track import StreamingTrack
+from src.core.track_format import TrackFormatError
+
+class TestStreamingTrack(unittest.TestCase):
+    """Test cases for chunk generation, lookups and eviction."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.track = StreamingTrack(1200, 800, seed=7, memory_cap=64 * 1024)
+
+    def drive(self, track, end, step=500.0):
+        """Prefetch along the track like a car would, up to distance ``end``."""
+        for distance in np.arange(0.0, end, step):
+            track.prefetch(distance)
+
+    def test_deterministic_chunks(self):
+        """The same seed gives the same path, even after eviction."""
+        other = StreamingTrack(1200, 800, seed=7, memory_cap=10 ** 9)
+        self.drive(self.track, 200000)
+        self.drive(other, 200000)
+        self.assertGreater(self.track.chunks_evicted, 0)
+        for distance in (100.0, 50000.0, 150000.0):
+            self.assertEqual(self.track.get_path_point(distance), other.get_path_point(distance))
+
+    def test_path_continuous_across_chunks(self):
+        """Lookups just either side of a chunk boundary agree."""
+        self.drive(self.track, 20000)
+        for k in range(1, 5):
+            boundary = self.track._chunk_arc_starts[k]
+            before = self.track.get_path_point(boundary - 1e-6)
+            after = self.track.get_path_point(boundary + 1e-6)
+            self.assertAlmostEqual(before[0], after[0], places=3)
+            self.assertAlmostEqual(before[1], after[1], places=3)
+
+    def test_heading_across_chunks(self):
+        """Heading lookups generate chunks on demand and stay continuous."""
+        self.drive(self.track, 10000)
+        boundary = self.track._chunk_arc_starts[2]
+        self.assertAlmostEqual(self.track.get_heading(boundary - 1e-3),
+                               self.track.get_heading(boundary + 1e-3), places=2)
+        far = 500000.0
+        self.assertEqual(self.track.get_headings(np.array([far]))[0], self.track.get_heading(far))
+        self.assertIsInstance(self.track.get_curvature(far), float)
+
+    def test_no_wrapping(self):
+        """Distances never wrap and no laps are counted."""
+        self.assertEqual(self.track.track_length, math.inf)
+        self.assertEqual(self.track.path_length, math.inf)
+        x, _ = self.track.get_path_point(100000.0)
+        self.assertGreater(x, 90000)
+
+    def test_memory_stays_capped(self):
+        """Resident chunk memory stays flat over a long drive."""
+        self.drive(self.track, 2_000_000, step=1000.0)
+        self.assertLessEqual(self.track.resident_bytes, self.track.memory_cap)
+        self.assertLess(self.track.last_chunk - self.track.first_chunk, 20)
+        self.assertGreater(self.track.first_chunk, 0)
+
+    def test_prefetch_generates_at_most_one_chunk(self):
+        """Each prefetch call generates no more than one chunk."""
+        for distance in np.arange(0.0, 100000.0, 200.0):
+            before = self.track.chunks_generated
+            self.track.prefetch(distance)
+            self.assertLessEqual(self.track.chunks_generated - before, 1)
+
+    def test_prefetch_stays_ahead(self):
+        """After prefetching, lookups ahead of the car need no generation."""
+        self.drive(self.track, 30000, step=100.0)
+        before = self.track.chunks_generated
+        self.track.get_path_point(30000 + self.track.prefetch_distance * 0.5)
+        self.assertEqual(self.track.chunks_generated, before)
+
+    def test_batch_lookup_matches_scalar(self):
+        """get_path_points spanning many chunks matches get_path_point."""
+        distances = np.linspace(0.0, 40000.0, 97)
+        points = self.track.get_path_points(distances)
+        for distance, point in zip(distances, points):
+            x, y = self.track.get_path_point(distance)
+            self.assertAlmostEqual(point[0], x, places=6)
+            self.assertAlmostEqual(point[1], y, places=6)
+
+    def test_biomes_and_obstacles_follow_window(self):
+        """Biome and obstacle lookups cover the chunks around the camera."""
+        camera_x = 50000.0
+        chunk = int(camera_x // self.track.chunk_length)
+        self.track.render(pygame.Surface((1200, 800)), camera_x, 0)
+        self.assertLessEqual(self.track.first_chunk, chunk)
+        self.assertEqual(self.track.get_current_biome(camera_x), self.track._chunks[chunk].biome)
+        for i in self.track.query_visible_obstacles(camera_x):
+            obstacle = self.track.obstacles[i]
+            self.assertLess(obstacle.left, camera_x + 1200)
+            self.assertGreater(obstacle.right, camera_x)
+
+    def test_window_updates_incrementally(self):
+        """Chunks joining the window are converted alone and match a full build."""
+        self.drive(self.track, 60000, step=300.0)
+        self.track._ensure_chunks(self.track.first_chunk - 2, self.track.last_chunk)  # Drive back
+        with mock.patch.object(StreamingTrack, '_chunk_steering',
+                               wraps=self.track._chunk_steering) as converted:
+            self.track._ensure_chunks(self.track.first_chunk, self.track.last_chunk + 1)
+        self.assertEqual(converted.call_count, 1)
+
+        fresh = StreamingTrack(1200, 800, seed=7, memory_cap=10 ** 9)
+        fresh._ensure_chunks(self.track.first_chunk, self.track.last_chunk)
+        self.assertEqual(fresh.first_chunk, self.track.first_chunk)
+        np.testing.assert_array_equal(fresh.path_xs, self.track.path_xs)
+        np.testing.assert_array_equal(fresh.path_ys, self.track.path_ys)
+        np.testing.assert_array_equal(fresh.arc_lengths, self.track.arc_lengths)
+        np.testing.assert_array_equal(fresh.obstacle_index.boxes, self.track.obstacle_index.boxes)
+        self.assertEqual(fresh.obstacles, self.track.obstacles)
+        for expected, actual in zip(fresh.steering_table, self.track.steering_table):
+            np.testing.assert_array_equal(expected, actual)
+
+    def test_cannot_save(self):
+        """Endless tracks cannot be written to a track file."""
+        with self.assertRaises(TrackFormatError):
+            self.track.save('unused.rtrk')
+
+if __name__ == '__main__':
+    unittest.main()
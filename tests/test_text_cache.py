@@ -0,0 +1,70 @@
+"""Unit tests for the shared text surface cache."""
+import unittest
+import sys
+import os
+
+import pygame
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.text_cache import TextCache, get_text_cache
+
+class TestTextCache(unittest.TestCase):
+    """Test cases for TextCache."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        pygame.init()
+        self.cache = TextCache(max_entries=3)
+    
+    def tearDown(self):
+        """Clean up after tests."""
+        pygame.quit()
+    
+    def test_same_text_is_reused(self):
+        """Identical text, size and colour return the same surface."""
+        first = self.cache.render("Lap: 1", (255, 255, 255))
+        second = self.cache.render("Lap: 1", (255, 255, 255))
+        self.assertIs(first, second)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+        
+        self.assertIsNot(first, self.cache.render("Lap: 1", (255, 0, 0)))
+        self.assertIsNot(first, self.cache.render("Lap: 1", (255, 255, 255), size=18))
+    
+    def test_fonts_created_once(self):
+        """Fonts are shared between renders of the same size."""
+        self.assertIs(self.cache.get_font(24), self.cache.get_font(24))
+        self.assertIsNot(self.cache.get_font(24), self.cache.get_font(36))
+    
+    def test_lru_eviction(self):
+        """The least recently used surface is evicted first."""
+        a = self.cache.render("a", (255, 255, 255))
+        self.cache.render("b", (255, 255, 255))
+        self.cache.render("c", (255, 255, 255))
+        self.cache.render("a", (255, 255, 255))  # Refresh "a"
+        self.cache.render("d", (255, 255, 255))  # Evicts "b"
+        self.assertEqual(len(self.cache), 3)
+        self.assertIs(self.cache.render("a", (255, 255, 255)), a)
+        misses = self.cache.misses
+        self.cache.render("b", (255, 255, 255))
+        self.assertEqual(self.cache.misses, misses + 1)
+    
+    def test_cleared_on_pygame_quit(self):
+        """Fonts do not survive pygame shutting down."""
+        font = self.cache.get_font(24)
+        self.cache.render("x", (255, 255, 255))
+        pygame.quit()
+        self.assertEqual(len(self.cache), 0)
+        pygame.init()
+        self.assertIsNot(self.cache.get_font(24), font)
+        # The quit hook is registered again for the new font
+        pygame.quit()
+        self.assertEqual(self.cache._fonts, {})
+    
+    def test_shared_instance(self):
+        """The track, car and HUD share one cache."""
+        self.assertIs(get_text_cache(), get_text_cache())
+
+if __name__ == '__main__':
+    unittest.main()
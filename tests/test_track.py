@@ -0,0 +1,293 @@
+"""Unit tests for track generation and path lookups."""
+import unittest
+import math
+import tempfile
+from unittest import mock
+import sys
+import os
+
+import numpy as np
+import pygame
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.track import BiomeType, Track
+
+class TestTrackPath(unittest.TestCase):
+    """Test cases for the arc-length path table."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.track = Track(1200, 800)
+    
+    def test_arc_length_table(self):
+        """The arc-length table is cumulative and spans the whole path."""
+        arc = self.track.arc_lengths
+        self.assertEqual(len(arc), len(self.track.path_points))
+        self.assertEqual(arc[0], 0.0)
+        self.assertTrue(np.all(np.diff(arc) > 0))
+        # The path is at least as long as its horizontal extent
+        self.assertGreaterEqual(self.track.path_length, self.track.track_length)
+        self.assertTrue(arc.flags['C_CONTIGUOUS'])
+    
+    def test_path_point_endpoints(self):
+        """Distances 0 and path_length map to the first and last points."""
+        first = self.track.path_points[0]
+        x, y = self.track.get_path_point(0)
+        self.assertAlmostEqual(x, first[0])
+        self.assertAlmostEqual(y, first[1])
+        
+        x, y = self.track.get_path_point(self.track.arc_lengths[10])
+        self.assertAlmostEqual(x, self.track.path_points[10][0])
+        self.assertAlmostEqual(y, self.track.path_points[10][1])
+    
+    def test_path_point_wraps(self):
+        """Distances wrap around the total path length."""
+        distance = 1234.5
+        wrapped = self.track.get_path_point(distance + 2 * self.track.path_length)
+        expected = self.track.get_path_point(distance)
+        self.assertAlmostEqual(wrapped[0], expected[0], places=6)
+        self.assertAlmostEqual(wrapped[1], expected[1], places=6)
+    
+    def test_path_point_is_arc_length(self):
+        """Equal distance steps move an equal length along the path."""
+        start = self.track.arc_lengths[40]  # Stay inside one segment
+        a = self.track.get_path_point(start + 1.0)
+        b = self.track.get_path_point(start + 1.5)
+        self.assertAlmostEqual(math.hypot(b[0] - a[0], b[1] - a[1]), 0.5, places=6)
+    
+    def test_batch_matches_scalar(self):
+        """get_path_points agrees with get_path_point for every distance."""
+        rng = np.random.default_rng(0)
+        distances = rng.uniform(-1000, 3 * self.track.path_length, size=500)
+        points = self.track.get_path_points(distances)
+        self.assertEqual(points.shape, (500, 2))
+        expected = np.array([self.track.get_path_point(d) for d in distances])
+        np.testing.assert_allclose(points, expected, atol=1e-9)
+    
+    def test_batch_keeps_shape(self):
+        """Batch lookups keep the shape of the distance array."""
+        distances = np.linspace(0, 5000, 12).reshape(3, 4)
+        self.assertEqual(self.track.get_path_points(distances).shape, (3, 4, 2))
+
+class TestTrackGeneration(unittest.TestCase):
+    """Test cases for seeded generation and the baked-track cache."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = self.temp_dir.name
+    
+    def tearDown(self):
+        """Clean up after tests."""
+        self.temp_dir.cleanup()
+    
+    def assertSameTrack(self, first, second):
+        np.testing.assert_array_equal(first.path_xs, second.path_xs)
+        np.testing.assert_array_equal(first.path_ys, second.path_ys)
+        self.assertEqual(first.obstacles, second.obstacles)
+        self.assertEqual(first.biome_boundaries, second.biome_boundaries)
+        self.assertEqual(first.track_length, second.track_length)
+    
+    def test_same_seed_same_track(self):
+        """Generation is reproducible for a given seed."""
+        self.assertSameTrack(Track(1200, 800, seed=5, cache_dir=None),
+                             Track(1200, 800, seed=5, cache_dir=None))
+    
+    def test_different_seeds_differ(self):
+        """Different seeds give different tracks."""
+        first = Track(1200, 800, seed=1, cache_dir=None)
+        second = Track(1200, 800, seed=2, cache_dir=None)
+        self.assertFalse(np.array_equal(first.path_ys, second.path_ys))
+    
+    def test_unseeded_tracks_get_a_seed(self):
+        """Unseeded tracks record the seed they were generated with."""
+        track = Track(1200, 800)
+        self.assertIsNone(track.cache_path)
+        self.assertSameTrack(track, Track(1200, 800, seed=track.seed, cache_dir=None))
+    
+    def test_cache_round_trip(self):
+        """Seeded tracks are baked once and then loaded from disk."""
+        first = Track(1200, 800, seed=11, cache_dir=self.cache_dir)
+        self.assertTrue(os.path.exists(first.cache_path))
+        
+        with mock.patch.object(Track, '_generate_path', side_effect=AssertionError):
+            second = Track(1200, 800, seed=11, cache_dir=self.cache_dir)
+        self.assertSameTrack(first, second)
+        self.assertEqual(first.path_length, second.path_length)
+    
+    def test_cache_keyed_by_parameters(self):
+        """Different parameters use different cache entries."""
+        first = Track(1200, 800, seed=11, cache_dir=self.cache_dir)
+        second = Track(800, 600, seed=11, cache_dir=self.cache_dir)
+        self.assertNotEqual(first.cache_path, second.cache_path)
+        self.assertEqual(second.track_length, 8000)
+    
+    def test_corrupt_cache_regenerates(self):
+        """An unreadable cache file is replaced by a fresh track."""
+        expected = Track(1200, 800, seed=3, cache_dir=None)
+        path = expected.get_cache_path(self.cache_dir)
+        with open(path, 'wb') as f:
+            f.write(b'not a track')
+        self.assertSameTrack(Track(1200, 800, seed=3, cache_dir=self.cache_dir), expected)
+    
+    def test_truncated_cache_regenerates(self):
+        """Truncated and empty cache files are replaced by a fresh track."""
+        expected = Track(1200, 800, seed=3, cache_dir=self.cache_dir)
+        with open(expected.cache_path, 'rb') as f:
+            baked = f.read()
+        for data in (baked[:len(baked) // 2], baked[:-1], b''):
+            with open(expected.cache_path, 'wb') as f:
+                f.write(data)
+            self.assertSameTrack(Track(1200, 800, seed=3, cache_dir=self.cache_dir), expected)
+
+class TestTrackBiomes(unittest.TestCase):
+    """Test cases for biome lookups and change events."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.track = Track(1200, 800)
+    
+    def _linear_lookup(self, position):
+        distance = position % self.track.track_length
+        current = BiomeType.GRASSLAND
+        for boundary, biome in sorted(self.track.biome_boundaries, key=lambda b: b[0]):
+            if distance >= boundary:
+                current = biome
+        return current
+    
+    def test_matches_linear_scan(self):
+        """Bisect lookups agree with scanning every boundary."""
+        for position in np.linspace(-500, 3 * self.track.track_length, 997):
+            self.assertEqual(self.track.get_current_biome(position), self._linear_lookup(position))
+    
+    def test_listener_fires_on_change_only(self):
+        """Listeners run once per transition, not once per lookup."""
+        self.track.biome_boundaries = [(0, BiomeType.DESERT), (1000, BiomeType.FOREST)]
+        self.track.rebuild_biome_table()
+        events = []
+        self.track.add_biome_listener(lambda old, new: events.append((old, new)))
+        
+        for position in range(0, 2000, 10):
+            self.track.get_current_biome(position)
+        self.assertEqual(events, [(None, BiomeType.DESERT),
+                                  (BiomeType.DESERT, BiomeType.FOREST)])
+        
+        # Wrapping back to the start is another transition
+        self.track.get_current_biome(self.track.track_length + 5)
+        self.assertEqual(events[-1], (BiomeType.FOREST, BiomeType.DESERT))
+    
+    def test_remove_listener(self):
+        """Removed listeners are not called."""
+        events = []
+        listener = lambda old, new: events.append(new)
+        self.track.add_biome_listener(listener)
+        self.track.remove_biome_listener(listener)
+        self.track.get_current_biome(0)
+        self.assertEqual(events, [])
+
+class TestTrackSteering(unittest.TestCase):
+    """Test cases for the heading and curvature tables."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.track = Track(1200, 800, seed=9, cache_dir=None)
+    
+    def test_heading_matches_path_direction(self):
+        """Headings agree with the direction between nearby path points."""
+        xs = np.linspace(0, 4000, 1001)
+        self.track._set_path(xs, 400 + np.sin(xs / 300) * 150)
+        for distance in (500.0, 1500.0, 3000.0):
+            ahead = self.track.get_path_point(distance + 10)
+            behind = self.track.get_path_point(distance - 10)
+            expected = math.degrees(math.atan2(ahead[1] - behind[1], ahead[0] - behind[0]))
+            self.assertAlmostEqual(self.track.get_heading(distance), expected, delta=0.5)
+    
+    def test_straight_section(self):
+        """Straight sections have zero heading and curvature."""
+        # The section from 60% to 70% of the track is straight
+        distance = self.track.path_length * 0.65
+        self.assertAlmostEqual(self.track.get_heading(distance), 0.0, places=6)
+        self.assertAlmostEqual(self.track.get_curvature(distance), 0.0, places=6)
+    
+    def test_circle_curvature(self):
+        """A circular arc has constant curvature of one over its radius."""
+        radius = 500.0
+        angles = np.linspace(-math.pi / 2, 0, 400)
+        self.track._set_path(radius * np.cos(angles), radius * np.sin(angles) + radius)
+        for distance in (100.0, 300.0, 600.0):
+            self.assertAlmostEqual(self.track.get_curvature(distance), 1 / radius, delta=1e-4)
+            expected = math.degrees(distance / radius)
+            self.assertAlmostEqual(self.track.get_heading(distance), expected, delta=0.5)
+    
+    def test_vectorized_matches_scalar(self):
+        """get_headings and get_curvatures agree with the scalar lookups."""
+        distances = np.linspace(-100.0, self.track.path_length * 2, 53)
+        headings = self.track.get_headings(distances)
+        curvatures = self.track.get_curvatures(distances)
+        for distance, heading, curvature in zip(distances, headings, curvatures):
+            self.assertAlmostEqual(heading, self.track.get_heading(distance))
+            self.assertAlmostEqual(curvature, self.track.get_curvature(distance))
+    
+    def test_table_rebuilt_with_path(self):
+        """Replacing the path discards the old tables."""
+        self.track.get_heading(0.0)
+        xs = np.linspace(0, 1000, 11)
+        self.track._set_path(xs, xs)
+        self.assertAlmostEqual(self.track.get_heading(500.0), 45.0)
+
+class TestTrackRender(unittest.TestCase):
+    """Test cases for the cached track layers."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        pygame.init()
+        self.track = Track(800, 600)
+        self.track.obstacles = []  # Only compare the static layers
+        self.track.rebuild_obstacle_index()
+        self.screen = pygame.Surface((800, 600))
+    
+    def tearDown(self):
+        """Clean up after tests."""
+        pygame.quit()
+    
+    def _frame(self, camera_x):
+        self.track.render(self.screen, camera_x, 0)
+        return pygame.image.tostring(self.screen, 'RGB')
+    
+    def test_layer_cached_per_biome(self):
+        """The background layer is built once and reused."""
+        self._frame(0)
+        layers = dict(self.track._background_layers)
+        self._frame(10)
+        self.assertEqual(len(layers), 1)
+        self.assertEqual(self.track._background_layers, layers)
+    
+    def test_dirty_only_when_scrolled(self):
+        """Renders report the full screen only when the view changes."""
+        full = [self.screen.get_rect()]
+        self.assertEqual(self.track.render(self.screen, 10.2, 0), full)
+        self.assertEqual(self.track.render(self.screen, 10.9, 0), [])
+        self.assertEqual(self.track.render(self.screen, 11.0, 0), full)
+    
+    def test_dirty_when_obstacle_selection_changes(self):
+        """A still camera reports the screen dirty when other obstacles are drawn."""
+        full = [self.screen.get_rect()]
+        self.track.obstacles = [pygame.Rect(100 + i * 200, 300, 30, 30) for i in range(3)]
+        self.track.rebuild_obstacle_index()
+        self.track.max_visible_obstacles = 1
+        self.assertEqual(self.track.render(self.screen, 0, 0, focus_x=0), full)
+        self.assertEqual(self.track.render(self.screen, 0, 0, focus_x=0), [])
+        self.assertEqual(self.track.render(self.screen, 0, 0, focus_x=400), full)
+        self.track.max_visible_obstacles = None
+        self.assertEqual(self.track.render(self.screen, 0, 0, focus_x=400), full)
+    
+    def test_lane_markings_scroll(self):
+        """Lane markings move with the camera and repeat every period."""
+        from src.core.track import LANE_MARKING_SPACING
+        self.assertEqual(self._frame(0), self._frame(LANE_MARKING_SPACING))
+        self.assertNotEqual(self._frame(0), self._frame(LANE_MARKING_SPACING // 2))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+"""Unit tests for the binary track format."""
+import unittest
+import tempfile
+import sys
+import os
+
+import numpy as np
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.track import Track
+from src.core.track_format import (SECTION_ALIGNMENT, TrackFormatError, pack_track,
+                                   read_track_buffer, read_track_file)
+
+class TestTrackFormat(unittest.TestCase):
+    """Test cases for writing and memory-mapping track files."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, 'track.rtrk')
+        self.track = Track(1200, 800, seed=21, cache_dir=None)
+    
+    def tearDown(self):
+        """Clean up after tests."""
+        self.temp_dir.cleanup()
+    
+    def test_round_trip(self):
+        """A saved track loads back with the same elements."""
+        self.track.save(self.path)
+        loaded = Track.from_file(self.path)
+    
+        self.assertEqual(loaded.seed, self.track.seed)
+        self.assertEqual(loaded.track_length, self.track.track_length)
+        self.assertEqual(loaded.obstacles, self.track.obstacles)
+        self.assertEqual(loaded.biome_boundaries, self.track.biome_boundaries)
+        np.testing.assert_array_equal(loaded.path_xs, self.track.path_xs.astype(np.float32))
+        np.testing.assert_array_equal(loaded.path_ys, self.track.path_ys.astype(np.float32))
+        self.assertAlmostEqual(loaded.path_length, self.track.path_length, delta=1e-2)
+        for distance in (0.0, 123.4, 5000.0):
+            for a, b in zip(loaded.get_path_point(distance), self.track.get_path_point(distance)):
+                self.assertAlmostEqual(a, b, delta=1e-2)
+    
+    def test_arrays_are_memory_mapped(self):
+        """Loading maps the file instead of reading it into memory."""
+        self.track.save(self.path)
+        data = read_track_file(self.path)
+        for array in (data.path_xs, data.path_ys, data.arc_lengths, data.obstacles, data.biomes):
+            self.assertIsInstance(array, np.memmap)
+            self.assertEqual(array.offset % SECTION_ALIGNMENT, 0)
+    
+        loaded = Track.from_data(data)
+        self.assertTrue(np.shares_memory(loaded.path_xs, data.path_xs))
+        self.assertTrue(np.shares_memory(loaded.path_ys, data.path_ys))
+        self.assertIs(loaded.arc_lengths, data.arc_lengths)
+    
+    def test_file_matches_packed_bytes(self):
+        """Streaming a file gives the same bytes as packing in memory."""
+        self.track.save(self.path)
+        with open(self.path, 'rb') as f:
+            self.assertEqual(f.read(), pack_track(self.track))
+    
+    def test_read_from_buffer(self):
+        """Packed bytes can be read in place without a file."""
+        data = read_track_buffer(pack_track(self.track))
+        loaded = Track.from_data(data)
+        self.assertEqual(loaded.obstacles, self.track.obstacles)
+        self.assertEqual(loaded.get_current_biome(0), self.track.get_current_biome(0))
+    
+    def test_empty_obstacles(self):
+        """Tracks without obstacles round-trip and still answer queries."""
+        self.track.obstacles = []
+        self.track.save(self.path)
+        loaded = Track.from_file(self.path)
+        self.assertEqual(loaded.obstacles, [])
+        self.assertEqual(len(loaded.query_visible_obstacles(0)), 0)
+    
+    def test_bad_magic(self):
+        """Files that are not track files are rejected."""
+        with open(self.path, 'wb') as f:
+            f.write(b'NOPE' + bytes(200))
+        with self.assertRaises(TrackFormatError):
+            Track.from_file(self.path)
+    
+    def test_truncated_file(self):
+        """Truncated files are rejected instead of mapping past the end."""
+        data = pack_track(self.track)
+        with self.assertRaises(TrackFormatError):
+            read_track_buffer(data[:len(data) // 2])
+
+if __name__ == '__main__':
+    unittest.main()